@@ -1,9 +1,9 @@
 import os
 from datetime import timedelta
 
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_talisman import Talisman
@@ -11,11 +11,17 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 db = SQLAlchemy()
-migrate = Migrate()
 jwt = JWTManager()
 limiter = Limiter(key_func=get_remote_address)
 
 
+def init_migrate(app):
+	"""Flask-Migrate (alembic, ~200 ms d'imports): chargé pour la CLI seulement, pas par les workers."""
+	if "migrate" not in app.extensions:
+		from flask_migrate import Migrate
+		Migrate(app, db, directory=os.path.join(os.path.dirname(app.root_path), "migrations"))
+
+
 def create_app() -> Flask:
 	app = Flask(__name__)
 
@@ -30,10 +36,19 @@ def create_app() -> Flask:
 		database_url = database_url.replace("postgres://", "postgresql://", 1)
 	app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 	app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+	# Pool et réglages par dialecte (Postgres: taille, pre-ping, timeouts; SQLite: WAL, pragmas)
+	from .db_engine import configure_engines, engine_options
+	app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(database_url))
 
 	# Initialize extensions
 	db.init_app(app)
-	migrate.init_app(app, db)
+	configure_engines(app)
+	# Métriques Prometheus (/metrics): latences par route, SQL par requête, appels sortants
+	from .metrics import metrics
+	metrics.init_app(app)
+	if click.get_current_context(silent=True) is not None:
+		# Lancé par la CLI flask (flask db upgrade, bootstrap...)
+		init_migrate(app)
 	jwt.init_app(app)
 	# CORS restrictif via ALLOWED_ORIGINS (séparées par des virgules)
 	allowed = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",") if o.strip()]
@@ -57,9 +72,35 @@ def create_app() -> Flask:
 		session_cookie_http_only=True,
 	)
 
-	# Rate limiting (anti brute-force)
+	# Rate limiting (anti brute-force): compteurs partagés par les workers du pod (SQLite WAL),
+	# et entre pods via la base de l'application si RATELIMIT_CLUSTER_SYNC=true
+	from . import ratelimit  # enregistre le schéma sharedsqlite://
+	storage_uri = os.getenv("RATELIMIT_STORAGE_URI", f"sharedsqlite:///{ratelimit.DEFAULT_PATH}")
+	app.config.setdefault("RATELIMIT_STORAGE_URI", storage_uri)
+	app.config.setdefault("RATELIMIT_STRATEGY", os.getenv("RATELIMIT_STRATEGY", "sliding-window-counter"))
+	app.config.setdefault("RATELIMIT_ENABLED", os.getenv("RATELIMIT_ENABLED", "true").lower() == "true")
+	if storage_uri.startswith("sharedsqlite:") and os.getenv("RATELIMIT_CLUSTER_SYNC", "false").lower() == "true":
+		app.config.setdefault("RATELIMIT_STORAGE_OPTIONS", {
+			"sync_url": database_url,
+			"sync_interval": float(os.getenv("RATELIMIT_SYNC_INTERVAL", "1.0")),
+		})
 	limiter.init_app(app)
 
+	# Cache du portfolio public (mémoire, + fichier SQLite partagé par les workers, ou Redis si CACHE_REDIS_URL)
+	from .cache import portfolio_cache
+	portfolio_cache.init_app(app)
+	# Cache des réponses LLM (LRU mémoire + table llm_cache_entries)
+	from .llm import llm_cache, llm_provider
+	llm_cache.init_app(app)
+	# Fournisseur LLM partagé (pool HTTP, sémaphore, retries); client créé au premier appel
+	llm_provider.init_app(app)
+	# Utilisateur courant des routes JWT (current_user), instantané en cache entre les requêtes
+	from .identity import identity_cache
+	identity_cache.init_app(app)
+	# Hachage des mots de passe dans un pool de processus borné (créé au premier login)
+	from .passwords import password_hasher
+	password_hasher.init_app(app)
+
 	# Blueprints
 	from .routes.health import bp as health_bp
 	app.register_blueprint(health_bp, url_prefix="/api")
@@ -68,40 +109,38 @@ def create_app() -> Flask:
 	from .routes.tasks import bp as tasks_bp
 	app.register_blueprint(tasks_bp, url_prefix="/api")
 	from .routes.auth import bp as auth_bp
-	from .routes.auth import init_oauth
 	app.register_blueprint(auth_bp, url_prefix="/api")
-	init_oauth(app)
 	from .routes.ai import bp as ai_bp
 	app.register_blueprint(ai_bp, url_prefix="/api")
 	from .routes.portfolio import bp as portfolio_bp
 	app.register_blueprint(portfolio_bp, url_prefix="/api")
 	from .routes.kanban import bp as kanban_bp
 	app.register_blueprint(kanban_bp, url_prefix="/api")
+	from .routes.jobs import bp as jobs_bp
+	app.register_blueprint(jobs_bp, url_prefix="/api")
+	from .routes.metrics import bp as metrics_bp
+	app.register_blueprint(metrics_bp)
+
+	# Commandes CLI (processus séparés, hors workers gunicorn)
+	from .repo_refresh import refresh_repos_command
+	app.cli.add_command(refresh_repos_command)
+	from .repo_stats import refresh_repo_stats_command
+	app.cli.add_command(refresh_repo_stats_command)
+	from .jobs import jobs_worker_command
+	app.cli.add_command(jobs_worker_command)
+	from .bootstrap import bootstrap_command
+	app.cli.add_command(bootstrap_command)
 
-	# Optional: auto create DB tables in dev to avoid running migrations
+	# Dev uniquement (flask run, scripts): en production la base est préparée une fois par
+	# `flask bootstrap`, et le boot d'un worker ne fait aucune requête SQL
 	if os.getenv("AUTO_CREATE_DB", "false").lower() == "true":
+		from .bootstrap import bootstrap_database
 		with app.app_context():
-			db.create_all()
-			# Seed minimal data for demo
 			try:
-				from .models import User, Project  # type: ignore
-				if not User.query.first():
-					user = User(email="demo@example.com", username="demo", name="Demo User")
-					db.session.add(user)
-					db.session.commit()
-					project = Project(
-						owner_id=user.id,
-						title="Projet de démonstration",
-						description="Exemple de projet initial",
-						status="in_progress",
-						progress_percent=25,
-						priority="medium",
-					)
-					db.session.add(project)
-					db.session.commit()
+				bootstrap_database(seed=True, migrate=False)
 			except Exception:
 				# Ne bloque pas le démarrage en cas d'erreur de seed
-				pass
+				app.logger.warning("AUTO_CREATE_DB failed", exc_info=True)
 
 	return app
 
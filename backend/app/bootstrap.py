@@ -0,0 +1,77 @@
+"""Initialisation de la base, une fois par déploiement et non à chaque boot de worker.
+
+`flask bootstrap` (init container k8s, service `bootstrap` du docker-compose):
+crée les tables manquantes, applique les migrations alembic puis, si demandé,
+insère les données de démonstration. Idempotent, et sérialisé sous Postgres par
+un verrou consultatif: plusieurs pods qui démarrent ensemble ne se marchent
+pas dessus.
+"""
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import db, init_migrate
+
+# Clé arbitraire du verrou consultatif Postgres (pg_advisory_lock)
+ADVISORY_LOCK_KEY = 7240311
+
+
+def seed_demo() -> bool:
+	"""Utilisateur et projet de démonstration si la base est vide; True si insérés."""
+	from .models import Project, User
+
+	if db.session.scalar(db.select(User.id).limit(1)) is not None:
+		return False
+	user = User(email="demo@example.com", username="demo", name="Demo User")
+	db.session.add(user)
+	db.session.commit()
+	project = Project(
+		owner_id=user.id,
+		title="Projet de démonstration",
+		description="Exemple de projet initial",
+		status="in_progress",
+		progress_percent=25,
+		priority="medium",
+	)
+	db.session.add(project)
+	db.session.commit()
+	return True
+
+
+def bootstrap_database(seed: bool = True, migrate: bool = True) -> dict:
+	postgres = db.engine.dialect.name == "postgresql"
+	# AUTOCOMMIT: le verrou est de session; sans transaction ouverte, la connexion n'est pas
+	# "idle in transaction" (et tuée par idle_in_transaction_session_timeout) pendant les migrations
+	with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+		if postgres:
+			# L'attente du verrou (un autre pod migre) n'est pas bornée par statement_timeout;
+			# rétabli (RESET) avant le retour de la connexion au pool
+			lock_conn.execute(db.text("SET statement_timeout = 0"))
+			lock_conn.execute(db.text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+		try:
+			# Les tables de base viennent des modèles; les révisions alembic ne font qu'ajouter
+			db.create_all()
+			if migrate:
+				from flask_migrate import upgrade
+				init_migrate(current_app._get_current_object())
+				upgrade()
+			seeded = seed_demo() if seed else False
+		finally:
+			if postgres:
+				lock_conn.execute(db.text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+				lock_conn.execute(db.text("RESET statement_timeout"))
+	return {"migrated": migrate, "seeded": seeded}
+
+
+@click.command("bootstrap")
+@click.option("--seed/--no-seed", default=lambda: os.getenv("SEED_DEMO_DATA", "true").lower() == "true",
+	show_default="SEED_DEMO_DATA", help="Insérer les données de démonstration si la base est vide.")
+@click.option("--skip-migrations", is_flag=True, help="Créer les tables sans appliquer les migrations alembic.")
+@with_appcontext
+def bootstrap_command(seed, skip_migrations):
+	"""Crée / migre la base et insère les données de démo (une fois par déploiement)."""
+	result = bootstrap_database(seed=seed, migrate=not skip_migrations)
+	click.echo(f"bootstrap: schema ok, migrations {'applied' if result['migrated'] else 'skipped'}, "
+		f"demo data {'inserted' if result['seeded'] else 'unchanged'}")
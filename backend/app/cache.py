@@ -0,0 +1,310 @@
+"""Cache de réponses rendues avec coalescence des reconstructions (single-flight).
+
+Deux niveaux: un LRU en mémoire par processus, et un backend partagé. Par
+défaut un fichier SQLite local (CACHE_SQLITE_PATH, WAL) commun aux workers du
+pod; Redis via CACHE_REDIS_URL pour le partager aussi entre pods (ou tout objet
+exposant get/set/add/delete/incr). Une invalidation incrémente la génération
+de la clé dans le backend partagé puis efface l'entrée: les autres workers la
+voient dès que leur copie locale expire (1 s avec SQLite, 5 s avec Redis), et
+une reconstruction en cours dans un autre worker retire la valeur qu'elle vient
+d'écrire si la génération a changé pendant qu'elle lisait la base. Sans backend partagé (CACHE_SQLITE_PATH
+vide), elle ne touche que le processus courant et les autres servent l'ancienne
+valeur jusqu'au TTL. Sur un miss, un seul appelant par clé reconstruit la
+valeur; les autres attendent son résultat au lieu de refaire les requêtes.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "progestion-cache.db")
+
+
+class MemoryBackend:
+	def __init__(self, max_entries: int = 10000):
+		self.max_entries = max_entries
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				return None
+			value, expires_at = entry
+			if expires_at <= time.monotonic():
+				del self._data[key]
+				return None
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key, value, ttl: float):
+		with self._lock:
+			self._data[key] = (value, time.monotonic() + ttl)
+			self._data.move_to_end(key)
+			while len(self._data) > self.max_entries:
+				self._data.popitem(last=False)
+
+	def add(self, key, value, ttl: float) -> bool:
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is not None and entry[1] > time.monotonic():
+				return False
+			self._data[key] = (value, time.monotonic() + ttl)
+			return True
+
+	def incr(self, key, ttl: float):
+		with self._lock:
+			entry = self._data.get(key)
+			current = entry[0] if entry is not None and entry[1] > time.monotonic() else 0
+			self._data[key] = (current + 1, time.monotonic() + ttl)
+
+	def delete(self, key):
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+
+
+class RedisBackend:
+	"""Backend partagé; `redis` est une dépendance optionnelle (pip install redis)."""
+
+	def __init__(self, url: str = None, client=None, prefix: str = "pg:"):
+		if client is None:
+			import redis
+			client = redis.Redis.from_url(url)
+		self.client = client
+		self.prefix = prefix
+
+	def get(self, key):
+		value = self.client.get(self.prefix + key)
+		return value.decode("utf-8") if isinstance(value, bytes) else value
+
+	def set(self, key, value, ttl: float):
+		self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+	def add(self, key, value, ttl: float) -> bool:
+		return bool(self.client.set(self.prefix + key, value, px=int(ttl * 1000), nx=True))
+
+	def incr(self, key, ttl: float):
+		pipe = self.client.pipeline()
+		pipe.incr(self.prefix + key)
+		pipe.pexpire(self.prefix + key, int(ttl * 1000))
+		pipe.execute()
+
+	def delete(self, key):
+		self.client.delete(self.prefix + key)
+
+
+class SQLiteBackend:
+	"""Backend partagé par les workers d'un même nœud (un fichier SQLite en WAL)."""
+
+	SCHEMA = (
+		"CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+	)
+	PURGE_EVERY = 500
+
+	def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+		self.path = path
+		self._local = threading.local()
+		self._writes = 0
+		self._lock = threading.Lock()
+
+	def _conn(self):
+		# Une connexion par thread et par processus (jamais partagée à travers un fork)
+		conn = getattr(self._local, "conn", None)
+		if conn is None or self._local.pid != os.getpid():
+			conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute(self.SCHEMA)
+			self._local.conn = conn
+			self._local.pid = os.getpid()
+		return conn
+
+	def _tick(self, conn, now: float):
+		with self._lock:
+			self._writes += 1
+			purge = self._writes % self.PURGE_EVERY == 0
+		if purge:
+			conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+
+	def get(self, key):
+		row = self._conn().execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+		return row[0] if row else None
+
+	def set(self, key, value, ttl: float):
+		now = time.time()
+		conn = self._conn()
+		self._tick(conn, now)
+		conn.execute(
+			"INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+			"ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+			(key, value, now + ttl),
+		)
+
+	def add(self, key, value, ttl: float) -> bool:
+		now = time.time()
+		return self._conn().execute(
+			"INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+			"ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+			"WHERE entries.expires_at <= ?",
+			(key, value, now + ttl, now),
+		).rowcount == 1
+
+	def incr(self, key, ttl: float):
+		now = time.time()
+		self._conn().execute(
+			"INSERT INTO entries (key, value, expires_at) VALUES (?, '1', ?) "
+			"ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at, value = CASE "
+			"WHEN entries.expires_at > ? THEN CAST(CAST(entries.value AS INTEGER) + 1 AS TEXT) ELSE '1' END",
+			(key, now + ttl, now),
+		)
+
+	def delete(self, key):
+		self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+
+class ResponseCache:
+	def __init__(self, namespace: str, ttl: float = 60.0, local_ttl: float = None):
+		self.namespace = namespace
+		self.ttl = ttl
+		self.local_ttl = local_ttl
+		self.local = MemoryBackend()
+		self.shared = None
+		self.lock_timeout = 10.0
+		self.stats = {"hits": 0, "misses": 0, "builds": 0, "coalesced": 0}
+		self._inflight = {}
+		self._inflight_lock = threading.Lock()
+		self._stats_lock = threading.Lock()
+
+	def init_app(self, app, shared=None):
+		prefix = f"{self.namespace.upper()}_CACHE"
+		self.ttl = float(os.getenv(f"{prefix}_TTL", app.config.get(f"{prefix}_TTL", self.ttl)))
+		redis_url = os.getenv("CACHE_REDIS_URL") or app.config.get("CACHE_REDIS_URL")
+		sqlite_path = os.getenv("CACHE_SQLITE_PATH", app.config.get("CACHE_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+		if shared is None and redis_url:
+			shared = RedisBackend(redis_url)
+		elif shared is None and sqlite_path:
+			shared = SQLiteBackend(sqlite_path)
+		self.shared = shared
+		if self.local_ttl is None:
+			# Avec un backend partagé, la copie locale n'est gardée que brièvement:
+			# une invalidation faite par un autre worker s'y propage vite
+			if isinstance(shared, SQLiteBackend):
+				self.local_ttl = min(self.ttl, 1.0)
+			else:
+				self.local_ttl = min(self.ttl, 5.0) if shared is not None else self.ttl
+		app.extensions[f"{self.namespace}_cache"] = self
+
+	def _count(self, name: str):
+		with self._stats_lock:
+			self.stats[name] += 1
+
+	def _key(self, key: str) -> str:
+		return f"{self.namespace}:{key}"
+
+	def _lookup(self, full_key):
+		value = self.local.get(full_key)
+		if value is None and self.shared is not None:
+			value = self.shared.get(full_key)
+			if value is not None:
+				self.local.set(full_key, value, self.local_ttl or self.ttl)
+		return value
+
+	def get_or_build(self, key: str, builder):
+		"""Valeur en cache ou `builder()`; les appels concurrents sur une même clé
+		partagent une seule exécution de `builder`. Un résultat None n'est pas mis en cache."""
+		full_key = self._key(key)
+		value = self._lookup(full_key)
+		if value is not None:
+			self._count("hits")
+			return value
+		self._count("misses")
+
+		with self._inflight_lock:
+			flight = self._inflight.get(full_key)
+			leader = flight is None
+			if leader:
+				flight = {"event": threading.Event(), "value": None, "error": None, "stale": False}
+				self._inflight[full_key] = flight
+		if not leader:
+			self._count("coalesced")
+			flight["event"].wait(self.lock_timeout)
+			if flight["error"] is not None:
+				raise flight["error"]
+			if flight["event"].is_set():
+				return flight["value"]
+			return builder()
+
+		try:
+			value = self._build_shared(full_key, builder, flight)
+			flight["value"] = value
+			return value
+		except Exception as exc:
+			flight["error"] = exc
+			raise
+		finally:
+			with self._inflight_lock:
+				self._inflight.pop(full_key, None)
+			flight["event"].set()
+
+	def _build_shared(self, full_key, builder, flight):
+		# Entre processus: un verrou court dans le backend partagé désigne le
+		# reconstructeur; les autres attendent que la valeur apparaisse
+		lock_key = f"{full_key}:lock"
+		locked = self.shared is not None and self.shared.add(lock_key, "1", self.lock_timeout)
+		if self.shared is not None and not locked:
+			deadline = time.monotonic() + self.lock_timeout
+			while time.monotonic() < deadline:
+				time.sleep(0.05)
+				value = self.shared.get(full_key)
+				if value is not None:
+					self.local.set(full_key, value, self.local_ttl or self.ttl)
+					return value
+				if self.shared.get(lock_key) is None:
+					# Reconstruction terminée sans résultat (404) ou abandonnée
+					break
+		generation_key = f"{full_key}:gen"
+		# Lue avant la base: toute invalidation ultérieure change la génération
+		generation = self.shared.get(generation_key) if self.shared is not None else None
+		try:
+			self._count("builds")
+			value = builder()
+			# Invalidé pendant la reconstruction: la valeur lue peut être périmée
+			if value is not None and not flight["stale"]:
+				self.local.set(full_key, value, self.local_ttl or self.ttl)
+				if self.shared is not None:
+					self.shared.set(full_key, value, self.ttl)
+					# Vérifié après l'écriture: une invalidation plus tardive efface de toute façon la valeur
+					if self.shared.get(generation_key) != generation:
+						self.shared.delete(full_key)
+						self.local.delete(full_key)
+			return value
+		finally:
+			if locked:
+				self.shared.delete(lock_key)
+
+	def invalidate(self, key: str):
+		full_key = self._key(key)
+		with self._inflight_lock:
+			# Seule une reconstruction en cours a besoin de le savoir (rien à retenir sinon)
+			flight = self._inflight.get(full_key)
+			if flight is not None:
+				flight["stale"] = True
+		self.local.delete(full_key)
+		if self.shared is not None:
+			# Génération d'abord: une reconstruction d'un autre worker qui écrirait après
+			# l'effacement voit le changement et retire sa valeur
+			self.shared.incr(f"{full_key}:gen", self.ttl + self.lock_timeout)
+			self.shared.delete(full_key)
+
+	def clear(self):
+		self.local.clear()
+
+
+portfolio_cache = ResponseCache("portfolio", ttl=60.0)
@@ -0,0 +1,47 @@
+"""GET conditionnels: ETag calculé à partir de filigranes (updated_at, nombre de lignes).
+
+Le filigrane est lu par une requête agrégée légère *avant* la vue: si le client
+envoie un If-None-Match correspondant, on répond 304 sans charger ni sérialiser
+les objets.
+"""
+import hashlib
+from functools import wraps
+
+from flask import current_app, request
+
+
+def make_etag(*parts) -> str:
+	raw = "|".join("" if p is None else str(p) for p in parts)
+	return hashlib.blake2s(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def not_modified(etag: str, cache_control: str):
+	response = current_app.response_class(status=304)
+	response.set_etag(etag, weak=True)
+	response.headers["Cache-Control"] = cache_control
+	return response
+
+
+def conditional(watermark, cache_control: str = "private, no-cache"):
+	"""Décorateur de vue GET.
+
+	`watermark(**view_args)` renvoie un tuple/valeur bon marché qui change dès que
+	la réponse change, ou None pour laisser la vue répondre seule (ex: 404).
+	"""
+	def decorator(view):
+		@wraps(view)
+		def wrapper(*args, **kwargs):
+			mark = watermark(**kwargs)
+			if mark is None:
+				return view(*args, **kwargs)
+			parts = mark if isinstance(mark, tuple) else (mark,)
+			etag = make_etag(request.path, request.query_string.decode("latin-1"), *parts)
+			if request.if_none_match.contains_weak(etag):
+				return not_modified(etag, cache_control)
+			response = current_app.make_response(view(*args, **kwargs))
+			if response.status_code == 200:
+				response.set_etag(etag, weak=True)
+				response.headers["Cache-Control"] = cache_control
+			return response
+		return wrapper
+	return decorator
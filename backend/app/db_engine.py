@@ -0,0 +1,135 @@
+"""Options du moteur SQLAlchemy par dialecte, et métriques du pool de connexions.
+
+Postgres: pool dimensionné sur la concurrence d'un processus (GUNICORN_THREADS,
+exporté par gunicorn.conf.py) plus les threads de fond, pre-ping (connexions
+coupées par un redémarrage / un proxy), recyclage, et statement_timeout /
+idle_in_transaction_session_timeout posés à la connexion (levés par
+`bootstrap_database` pour l'attente de son verrou et par migrations/env.py
+pour la transaction d'une migration).
+
+SQLite (fichier): WAL (lecteurs non bloqués par l'écrivain, commit sans fsync
+avec synchronous=NORMAL), mmap et busy_timeout, posés par événement à chaque
+nouvelle connexion.
+
+`pool_stats()` expose, par moteur, les checkouts, le temps d'attente d'une
+connexion (total / max), les timeouts et l'état courant du pool.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from . import db
+
+
+def _env(name: str, default):
+	value = os.getenv(name)
+	return type(default)(value) if value not in (None, "") else default
+
+
+class MeteredQueuePool(QueuePool):
+	"""QueuePool qui mesure l'attente d'une connexion (y compris son ouverture)."""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.metrics = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0, "timeouts": 0, "connects": 0, "invalidated": 0}
+		self._metrics_lock = threading.Lock()
+
+	def recreate(self):
+		# Appelé par engine.dispose(): les compteurs survivent au remplacement du pool
+		pool = super().recreate()
+		pool.metrics = self.metrics
+		return pool
+
+	def connect(self):
+		start = time.perf_counter()
+		try:
+			return super().connect()
+		except PoolTimeout:
+			with self._metrics_lock:
+				self.metrics["timeouts"] += 1
+			raise
+		finally:
+			waited = time.perf_counter() - start
+			with self._metrics_lock:
+				self.metrics["checkouts"] += 1
+				self.metrics["wait_total"] += waited
+				self.metrics["wait_max"] = max(self.metrics["wait_max"], waited)
+
+
+def engine_options(database_url: str) -> dict:
+	url = make_url(database_url)
+	concurrency = _env("GUNICORN_THREADS", 1)
+	if url.get_backend_name() == "postgresql":
+		# Threads de requête + quelques threads de fond (jobs, rafraîchissements), plafonné
+		pool_size = _env("DB_POOL_SIZE", min(concurrency + 2, 20))
+		statement_timeout = _env("DB_STATEMENT_TIMEOUT_MS", 30000)
+		idle_timeout = _env("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", 60000)
+		return {
+			"poolclass": MeteredQueuePool,
+			"pool_size": pool_size,
+			"max_overflow": _env("DB_MAX_OVERFLOW", max(2, pool_size // 2)),
+			"pool_timeout": _env("DB_POOL_TIMEOUT", 10.0),
+			"pool_recycle": _env("DB_POOL_RECYCLE", 1800),
+			"pool_pre_ping": True,
+			"connect_args": {
+				"application_name": os.getenv("DB_APPLICATION_NAME", "progestion"),
+				"options": f"-c statement_timeout={statement_timeout} -c idle_in_transaction_session_timeout={idle_timeout}",
+			},
+		}
+	if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+		return {
+			"poolclass": MeteredQueuePool,
+			"pool_size": _env("DB_POOL_SIZE", concurrency + 2),
+			"max_overflow": _env("DB_MAX_OVERFLOW", 10),
+			"pool_timeout": _env("DB_POOL_TIMEOUT", 10.0),
+			"connect_args": {"timeout": _env("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000},
+		}
+	return {}
+
+
+def _sqlite_pragmas(dbapi_connection, _record):
+	cursor = dbapi_connection.cursor()
+	try:
+		cursor.execute("PRAGMA journal_mode=WAL")
+		cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+		cursor.execute(f"PRAGMA busy_timeout={_env('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+		cursor.execute(f"PRAGMA mmap_size={_env('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}")
+		cursor.execute("PRAGMA temp_store=MEMORY")
+	finally:
+		cursor.close()
+
+
+def configure_engines(app):
+	"""À appeler après db.init_app: événements de connexion et compteurs des pools."""
+	with app.app_context():
+		for engine in db.engines.values():
+			if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+				event.listen(engine, "connect", _sqlite_pragmas)
+			pool = engine.pool
+			if isinstance(pool, MeteredQueuePool):
+				event.listen(engine, "connect", lambda *_args, metrics=pool.metrics: _bump(metrics, "connects"))
+				event.listen(engine, "invalidate", lambda *_args, metrics=pool.metrics: _bump(metrics, "invalidated"))
+
+
+def _bump(metrics: dict, name: str):
+	metrics[name] += 1
+
+
+def pool_stats() -> dict:
+	stats = {}
+	for bind, engine in db.engines.items():
+		pool = engine.pool
+		entry = {"dialect": engine.dialect.name, "pool": type(pool).__name__}
+		if isinstance(pool, QueuePool):
+			entry.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(), idle=pool.checkedin())
+		metrics = getattr(pool, "metrics", None)
+		if metrics:
+			entry.update(metrics)
+			entry["wait_avg"] = metrics["wait_total"] / metrics["checkouts"] if metrics["checkouts"] else 0.0
+		stats[bind or "default"] = entry
+	return stats
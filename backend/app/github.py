@@ -0,0 +1,177 @@
+"""Client GitHub partagé: pool de connexions, pagination concurrente, requêtes conditionnelles.
+
+Les pages sont mémorisées par compte avec leur ETag; une page inchangée est
+revalidée par If-None-Match et GitHub répond 304, ce qui ne consomme pas de
+quota. GITHUB_API_URL permet de viser un faux serveur local.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from .cache import MemoryBackend
+from .metrics import metrics
+
+PER_PAGE = 100
+PAGE_CACHE_TTL = 24 * 3600
+
+_session = None
+_session_lock = threading.Lock()
+_page_cache = MemoryBackend(max_entries=5000)
+# Label "operation" des métriques: un chemin par type d'appel, pas par dépôt
+_ROUTE_PATTERNS = ((re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{repo}"), (re.compile(r"^/users/[^/]+"), "/users/{user}"))
+
+
+class RateLimits:
+	"""Dernier état X-RateLimit-* connu, par compte (le quota GitHub est par jeton)."""
+
+	def __init__(self):
+		self._state = {}
+		self._lock = threading.Lock()
+
+	def update(self, account_key: str, headers):
+		remaining = headers.get("X-RateLimit-Remaining")
+		reset = headers.get("X-RateLimit-Reset")
+		if remaining is None or reset is None:
+			return
+		try:
+			with self._lock:
+				self._state[account_key] = (int(remaining), int(reset))
+		except ValueError:
+			pass
+
+	def seconds_until_available(self, account_key: str, min_remaining: int = 1) -> float:
+		with self._lock:
+			state = self._state.get(account_key)
+		if state is None or state[0] >= min_remaining:
+			return 0.0
+		return max(0.0, state[1] - time.time())
+
+
+rate_limits = RateLimits()
+
+
+class GitHubError(Exception):
+	def __init__(self, status_code: int, message: str = ""):
+		super().__init__(message or f"GitHub API error {status_code}")
+		self.status_code = status_code
+
+
+def api_url() -> str:
+	return os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+
+def get_session():
+	global _session
+	if _session is None:
+		with _session_lock:
+			if _session is None:
+				# requests (~100 ms d'imports) chargé au premier appel GitHub, pas au boot des workers
+				import requests
+				from requests.adapters import HTTPAdapter
+				from urllib3.util.retry import Retry
+				session = requests.Session()
+				retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+				adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("GITHUB_POOL_SIZE", "16")), max_retries=retry)
+				session.mount("https://", adapter)
+				session.mount("http://", adapter)
+				session.headers.update({"Accept": "application/vnd.github+json"})
+				_session = session
+	return _session
+
+
+def reset_session():
+	"""Ferme le pool (à appeler après un fork: les sockets ne se partagent pas)."""
+	global _session
+	with _session_lock:
+		if _session is not None:
+			_session.close()
+		_session = None
+
+
+def _route(path: str) -> str:
+	for pattern, replacement in _ROUTE_PATTERNS:
+		path = pattern.sub(replacement, path)
+	return path
+
+
+def _last_page(links) -> int:
+	last = (links or {}).get("last", {}).get("url")
+	if not last:
+		return 1
+	try:
+		return int(parse_qs(urlparse(last).query).get("page", ["1"])[0])
+	except ValueError:
+		return 1
+
+
+class GitHubClient:
+	def __init__(self, token: str, account_key: str = None, max_workers: int = 8, timeout: float = 15):
+		self.token = token
+		# Le cache est cloisonné par compte (et par jeton, qui peut être renouvelé)
+		token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+		self.account_key = f"{account_key or 'anon'}:{token_hash}"
+		self.max_workers = max_workers
+		self.timeout = timeout
+
+	def get(self, path: str, params: dict = None):
+		"""GET conditionnel; renvoie (données JSON, liens de pagination)."""
+		url = f"{api_url()}{path}"
+		if params:
+			url = f"{url}?{urlencode(sorted(params.items()))}"
+		cache_key = f"{self.account_key}:{url}"
+		cached = _page_cache.get(cache_key)
+		headers = {"Authorization": f"token {self.token}"}
+		if cached:
+			headers["If-None-Match"] = cached[0]
+		start = time.perf_counter()
+		try:
+			resp = get_session().get(url, headers=headers, timeout=self.timeout)
+		except Exception as exc:
+			metrics.observe_upstream("github", _route(path), type(exc).__name__, time.perf_counter() - start)
+			raise
+		metrics.observe_upstream("github", _route(path), resp.status_code, time.perf_counter() - start)
+		rate_limits.update(self.account_key, resp.headers)
+		if resp.status_code == 304 and cached:
+			return cached[1], cached[2]
+		if resp.status_code != 200:
+			raise GitHubError(resp.status_code)
+		data = resp.json()
+		etag = resp.headers.get("ETag")
+		if etag:
+			_page_cache.set(cache_key, (etag, data, resp.links), PAGE_CACHE_TTL)
+		return data, resp.links
+
+	def get_all_pages(self, path: str, params: dict = None) -> list:
+		# Page 1 d'abord pour connaître le nombre de pages (Link: rel="last"),
+		# puis les suivantes en parallèle
+		params = {**(params or {}), "per_page": PER_PAGE}
+		first, links = self.get(path, {**params, "page": 1})
+		last = _last_page(links)
+		if last <= 1:
+			return list(first)
+		def fetch_page(page):
+			return self.get(path, {**params, "page": page})[0]
+
+		if self.max_workers <= 1:
+			# Déjà dans un pool (appels par dépôt): pages à la suite, sans pool imbriqué
+			pages = [fetch_page(page) for page in range(2, last + 1)]
+		else:
+			with ThreadPoolExecutor(max_workers=min(self.max_workers, last - 1)) as pool:
+				pages = list(pool.map(fetch_page, range(2, last + 1)))
+		items = list(first)
+		for page in pages:
+			items.extend(page)
+		return items
+
+	def seconds_until_available(self, min_remaining: int = 1) -> float:
+		return rate_limits.seconds_until_available(self.account_key, min_remaining)
+
+	def get_repo(self, full_name: str) -> dict:
+		return self.get(f"/repos/{full_name}")[0]
+
+	def list_user_repos(self) -> list:
+		return self.get_all_pages("/user/repos")
@@ -0,0 +1,129 @@
+"""Utilisateur courant des routes JWT, résolu à la demande et mis en cache.
+
+`current_user` charge l'utilisateur du token au premier accès seulement, puis
+le garde pour la durée de la requête: les routes qui ne s'en servent pas
+(`get_jwt_identity()` suffit) ne font aucun SELECT users. Entre les requêtes, un
+instantané des colonnes (pas l'objet ORM, lié à une session) est gardé dans un
+LRU mémoire à TTL court. Une écriture ORM sur un User l'invalide au commit
+dans ce processus; les autres workers voient le changement au plus tard après
+IDENTITY_CACHE_TTL. Les UPDATE en masse (`update(User)`) doivent appeler
+`identity_cache.invalidate` eux-mêmes. Compteurs (hits = SELECT users évités):
+famille `identity_cache_events_total` de /metrics.
+"""
+import os
+import threading
+from collections import namedtuple
+
+from flask import abort, g, jsonify, make_response
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.local import LocalProxy
+
+from . import db
+from .cache import MemoryBackend
+from .models import User
+
+# Pas de password_hash: l'instantané ne sert qu'à identifier et afficher
+USER_FIELDS = ("id", "email", "username", "name", "bio", "avatar_url")
+CachedUser = namedtuple("CachedUser", USER_FIELDS)
+
+_PENDING_KEY = "identity_cache_pending"
+
+
+class IdentityCache:
+	def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+		self.ttl = ttl
+		self.local = MemoryBackend(max_entries)
+		self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+		# Lectures en cours par utilisateur: [génération, lecteurs]; l'entrée disparaît avec le dernier lecteur
+		self._reads = {}
+		self._lock = threading.Lock()
+
+	def init_app(self, app):
+		self.ttl = float(os.getenv("IDENTITY_CACHE_TTL", app.config.get("IDENTITY_CACHE_TTL", self.ttl)))
+		self.local.max_entries = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", app.config.get("IDENTITY_CACHE_MAX_ENTRIES", self.local.max_entries)))
+		app.extensions["identity_cache"] = self
+
+	def get(self, user_id: int):
+		"""Instantané de l'utilisateur (CachedUser) ou None s'il n'existe plus."""
+		cached = self.local.get(user_id)
+		if cached is not None:
+			with self._lock:
+				self.stats["hits"] += 1
+			return cached
+		with self._lock:
+			self.stats["misses"] += 1
+			read = self._reads.setdefault(user_id, [0, 0])
+			read[1] += 1
+			generation = read[0]
+		try:
+			row = db.session.execute(
+				db.select(*(getattr(User, field) for field in USER_FIELDS)).where(User.id == user_id)
+			).first()
+		finally:
+			with self._lock:
+				read[1] -= 1
+				if read[1] == 0:
+					del self._reads[user_id]
+				# Invalidé pendant la lecture: la ligne lue peut être antérieure au commit
+				fresh = read[0] == generation
+		if row is None:
+			return None
+		user = CachedUser(*row)
+		if fresh:
+			self.local.set(user_id, user, self.ttl)
+		return user
+
+	def invalidate(self, user_id: int):
+		with self._lock:
+			read = self._reads.get(user_id)
+			if read is not None:
+				read[0] += 1
+			self.stats["invalidations"] += 1
+		self.local.delete(user_id)
+
+	def clear(self):
+		self.local.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def _load_current_user():
+	# Mémorisé avec le token décodé de la requête (g peut survivre à la requête, ex. tests, CLI)
+	claims = get_jwt()
+	token, user = g.get("identity_user", (None, None))
+	if token is not claims:
+		try:
+			user_id = int(claims["sub"])
+		except (KeyError, TypeError, ValueError):
+			user_id = None
+		user = identity_cache.get(user_id) if user_id is not None else None
+		g.identity_user = (claims, user)
+	if user is None:
+		abort(make_response(jsonify({"error": "user not found"}), 401))
+	return user
+
+
+# À lire dans une route @jwt_required(); 401 si l'utilisateur du token n'existe plus
+current_user = LocalProxy(_load_current_user)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_writes(session, _flush_context):
+	for obj in list(session.dirty) + list(session.deleted):
+		if isinstance(obj, User) and obj.id is not None:
+			session.info.setdefault(_PENDING_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_user_writes(session):
+	# Après commit: une lecture concurrente ne peut plus remettre l'ancienne ligne en cache
+	for user_id in session.info.pop(_PENDING_KEY, ()):
+		identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_user_writes(session, _previous_transaction):
+	session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,224 @@
+"""File de jobs stockée en base (SQLite / Postgres), sans broker externe.
+
+Une route enfile un job (`enqueue`) et répond tout de suite avec son id; un
+pool borné de threads (`flask jobs-worker`, ou JOBS_INLINE_WORKERS dans le
+processus web pour le dev) prend les jobs un par un et exécute le handler
+enregistré pour leur type. La prise est atomique: UPDATE ... WHERE status =
+'queued' (plus SKIP LOCKED sous Postgres), donc plusieurs workers peuvent
+tourner en parallèle. Un job dont le worker a disparu (heartbeat trop ancien)
+est remis en file.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from . import db
+from .models import Job
+
+HANDLERS = {}
+
+STALE_AFTER = timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+RETENTION = timedelta(days=7)
+
+
+def register_job(kind: str):
+	"""Enregistre `handler(payload, progress)` pour un type de job; le retour (JSON) devient le résultat."""
+	def decorator(handler):
+		HANDLERS[kind] = handler
+		return handler
+	return decorator
+
+
+def enqueue(kind: str, payload: dict, user_id: int = None) -> Job:
+	job = Job(kind=kind, status="queued", user_id=user_id, payload=json.dumps(payload))
+	db.session.add(job)
+	db.session.commit()
+	_ensure_inline_worker(current_app._get_current_object())
+	return job
+
+
+def job_to_dict(job: Job) -> dict:
+	return {
+		"id": job.id,
+		"kind": job.kind,
+		"status": job.status,
+		"progress": job.progress,
+		"stage": job.stage,
+		"result": json.loads(job.result) if job.result else None,
+		"error": job.error,
+		"attempts": job.attempts,
+		"created_at": job.created_at.isoformat() if job.created_at else None,
+		"started_at": job.started_at.isoformat() if job.started_at else None,
+		"finished_at": job.finished_at.isoformat() if job.finished_at else None,
+	}
+
+
+def claim_next(worker_id: str, kinds=None):
+	"""Passe le plus ancien job en attente à `running` et le renvoie (ou None)."""
+	stmt = db.select(Job.id).where(Job.status == "queued").order_by(Job.id).limit(1)
+	if kinds:
+		stmt = stmt.where(Job.kind.in_(kinds))
+	# Postgres: les autres workers sautent la ligne au lieu d'attendre (ignoré par SQLite)
+	job_id = db.session.scalar(stmt.with_for_update(skip_locked=True))
+	if job_id is None:
+		db.session.rollback()
+		return None
+	now = datetime.utcnow()
+	claimed = db.session.execute(
+		update(Job)
+		.where(Job.id == job_id, Job.status == "queued")
+		.values(status="running", worker_id=worker_id, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now, progress=0)
+	).rowcount
+	db.session.commit()
+	if not claimed:
+		# Pris par un autre worker entre le SELECT et l'UPDATE
+		return None
+	return db.session.get(Job, job_id)
+
+
+def _set_progress(job_id: int, progress: int, stage: str = None):
+	db.session.execute(
+		update(Job).where(Job.id == job_id).values(progress=progress, stage=stage, heartbeat_at=datetime.utcnow())
+	)
+	db.session.commit()
+
+
+def run_job(job: Job):
+	handler = HANDLERS.get(job.kind)
+	job_id = job.id
+	try:
+		if handler is None:
+			raise LookupError(f"no handler for job kind {job.kind!r}")
+		result = handler(json.loads(job.payload or "{}"), lambda progress, stage=None: _set_progress(job_id, progress, stage))
+		values = {"status": "succeeded", "progress": 100, "stage": "done", "result": json.dumps(result)}
+	except Exception as exc:
+		db.session.rollback()
+		current_app.logger.warning("job %s (%s) failed: %s", job_id, job.kind, traceback.format_exc())
+		values = {"status": "failed", "error": str(exc) or exc.__class__.__name__}
+	db.session.execute(update(Job).where(Job.id == job_id).values(finished_at=datetime.utcnow(), heartbeat_at=datetime.utcnow(), **values))
+	db.session.commit()
+
+
+def recover_stale(stale_after: timedelta = STALE_AFTER, max_attempts: int = MAX_ATTEMPTS) -> int:
+	"""Remet en file les jobs `running` sans heartbeat récent (worker tué), échoue ceux trop retentés."""
+	threshold = datetime.utcnow() - stale_after
+	stale = (Job.status == "running") & (Job.heartbeat_at < threshold)
+	requeued = db.session.execute(
+		update(Job).where(stale, Job.attempts < max_attempts).values(status="queued", worker_id=None)
+	).rowcount
+	db.session.execute(
+		update(Job).where(stale, Job.attempts >= max_attempts)
+		.values(status="failed", error="worker lost", finished_at=datetime.utcnow())
+	)
+	db.session.commit()
+	return requeued
+
+
+def purge_finished(retention: timedelta = RETENTION) -> int:
+	threshold = datetime.utcnow() - retention
+	deleted = db.session.execute(
+		db.delete(Job).where(Job.status.in_(("succeeded", "failed")), Job.finished_at < threshold)
+	).rowcount
+	db.session.commit()
+	return deleted
+
+
+class JobWorker:
+	"""Pool de `concurrency` threads qui consomment la file."""
+
+	def __init__(self, app, concurrency: int = 2, poll_interval: float = 1.0, kinds=None):
+		self.app = app
+		self.concurrency = concurrency
+		self.poll_interval = poll_interval
+		self.kinds = kinds
+		self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+		self._stop = threading.Event()
+		self._threads = []
+
+	def _loop(self, index: int):
+		worker_id = f"{self.worker_id}:{index}"
+		while not self._stop.is_set():
+			with self.app.app_context():
+				try:
+					job = claim_next(worker_id, self.kinds)
+					if job is not None:
+						run_job(job)
+				except Exception:
+					db.session.rollback()
+					self.app.logger.exception("job worker %s", worker_id)
+					job = None
+				finally:
+					db.session.remove()
+			if job is None:
+				self._stop.wait(self.poll_interval)
+
+	def _maintenance(self):
+		while not self._stop.wait(60):
+			with self.app.app_context():
+				try:
+					recover_stale()
+					purge_finished()
+				except Exception:
+					db.session.rollback()
+					self.app.logger.exception("job maintenance")
+				finally:
+					db.session.remove()
+
+	def start(self):
+		for i in range(self.concurrency):
+			thread = threading.Thread(target=self._loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+			thread.start()
+			self._threads.append(thread)
+		thread = threading.Thread(target=self._maintenance, name="job-maintenance", daemon=True)
+		thread.start()
+		self._threads.append(thread)
+
+	def stop(self, timeout: float = None):
+		self._stop.set()
+		for thread in self._threads:
+			thread.join(timeout)
+
+
+_inline = {"pid": None, "worker": None}
+_inline_lock = threading.Lock()
+
+
+def _ensure_inline_worker(app):
+	# Démarré au premier job, et par processus (après un fork, les threads du parent n'existent plus)
+	concurrency = int(os.getenv("JOBS_INLINE_WORKERS", app.config.get("JOBS_INLINE_WORKERS", 0)))
+	if concurrency <= 0 or _inline["pid"] == os.getpid():
+		return
+	with _inline_lock:
+		if _inline["pid"] != os.getpid():
+			worker = JobWorker(app, concurrency=concurrency, poll_interval=0.5)
+			worker.start()
+			_inline.update(pid=os.getpid(), worker=worker)
+
+
+@click.command("jobs-worker")
+@click.option("--concurrency", default=2, show_default=True, help="Jobs exécutés en parallèle.")
+@click.option("--poll-interval", default=1.0, show_default=True, help="Attente quand la file est vide (s).")
+@click.option("--kind", "kinds", multiple=True, help="Ne traiter que ces types de jobs.")
+@with_appcontext
+def jobs_worker_command(concurrency, poll_interval, kinds):
+	"""Consomme la file de jobs (smart-sync...)."""
+	app = current_app._get_current_object()
+	worker = JobWorker(app, concurrency=concurrency, poll_interval=poll_interval, kinds=list(kinds) or None)
+	recover_stale()
+	worker.start()
+	click.echo(f"jobs-worker {worker.worker_id}: {concurrency} thread(s)")
+	try:
+		while True:
+			time.sleep(3600)
+	except KeyboardInterrupt:
+		worker.stop(timeout=30)
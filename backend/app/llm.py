@@ -0,0 +1,544 @@
+"""Appels LLM (OpenAI): fournisseur partagé et cache de réponses adressé par contenu.
+
+`llm_provider` (initialisé dans create_app) garde un seul client HTTP par
+processus, borne le nombre d'appels simultanés (sémaphore) et répond 503 tout
+de suite quand il est saturé plutôt que d'immobiliser des workers; timeouts et
+retries avec jitter sont configurables. LLM_BACKEND=fake remplace OpenAI par
+un générateur local (tests hors ligne, benchmarks).
+
+La clé de cache est le hash du prompt complet (messages) et des paramètres du
+modèle: deux requêtes identiques à l'octet près partagent la même réponse.
+Trois niveaux: LRU en mémoire par processus, table `llm_cache_entries`
+(persistante, partagée entre workers), puis l'appel amont, exécuté une seule
+fois par clé même si plusieurs requêtes identiques arrivent en même temps.
+
+OPENAI_BASE_URL permet de viser un faux serveur OpenAI local.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .cache import MemoryBackend
+from .metrics import metrics
+from .models import LLMCacheEntry
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def default_model() -> str:
+	return os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
+
+
+class LLMError(Exception):
+	status_code = 502
+	retry_after = None
+
+
+class LLMBusy(LLMError):
+	"""Tous les emplacements d'appel du processus sont pris."""
+	status_code = 503
+	retry_after = 2
+
+
+class LLMRateLimited(LLMError):
+	"""Quota du fournisseur atteint (après retries)."""
+	status_code = 429
+	retry_after = 10
+
+
+class LLMTimeout(LLMError):
+	status_code = 504
+
+
+class OpenAIBackend:
+	def __init__(self, api_key: str, base_url: str = None, timeout: float = 60.0, max_connections: int = 8):
+		import httpx
+		from openai import OpenAI
+		# Un seul pool HTTP (keep-alive) par processus; les retries sont gérés par LLMProvider
+		self.http_client = httpx.Client(
+			timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+			limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+		)
+		self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=self.http_client, max_retries=0)
+
+	def complete(self, model: str, messages: list, temperature: float) -> str:
+		resp = self.client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+		return resp.choices[0].message.content or ""
+
+	def stream(self, model: str, messages: list, temperature: float):
+		stream = self.client.chat.completions.create(model=model, messages=messages, temperature=temperature, stream=True)
+		try:
+			for chunk in stream:
+				if not chunk.choices:
+					continue
+				delta = chunk.choices[0].delta.content
+				if delta:
+					yield delta
+		finally:
+			stream.close()
+
+	def classify(self, exc):
+		"""(erreur LLMError équivalente, retryable) ou None si l'exception n'est pas de l'amont."""
+		import openai
+		if isinstance(exc, openai.APITimeoutError):
+			return LLMTimeout("LLM provider timed out"), True
+		if isinstance(exc, openai.RateLimitError):
+			return LLMRateLimited("LLM provider rate limit reached"), True
+		if isinstance(exc, openai.APIConnectionError):
+			return LLMError("LLM provider unreachable"), True
+		if isinstance(exc, openai.APIStatusError):
+			return LLMError(f"LLM provider error {exc.status_code}"), exc.status_code >= 500
+		return None
+
+	def close(self):
+		self.http_client.close()
+
+
+class FakeBackend:
+	"""Réponses déterministes, sans réseau: une roadmap dérivée du hash du prompt."""
+
+	def __init__(self, latency: float = 0.0, items: int = 8, chunk_delay: float = 0.0):
+		self.latency = latency
+		self.items = items
+		self.chunk_delay = chunk_delay
+		self.calls = 0
+
+	def _text(self, messages: list) -> str:
+		digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+		return "\n".join(
+			f"- [ ] [P{1 + int(digest[i], 16) % 3}] Tâche {i + 1} ({digest[i * 2:i * 2 + 6]}) #fake"
+			for i in range(self.items)
+		)
+
+	def complete(self, model: str, messages: list, temperature: float) -> str:
+		self.calls += 1
+		time.sleep(self.latency)
+		return self._text(messages)
+
+	def stream(self, model: str, messages: list, temperature: float):
+		self.calls += 1
+		time.sleep(self.latency)
+		for line in self._text(messages).splitlines(keepends=True):
+			time.sleep(self.chunk_delay)
+			yield line
+
+	def classify(self, exc):
+		return None
+
+	def close(self):
+		pass
+
+
+class _Slot:
+	"""Itérateur de flux qui libère l'emplacement du sémaphore à la fin (ou à la fermeture)."""
+
+	def __init__(self, iterator, release):
+		self._iterator = iterator
+		self._release = release
+		self._released = False
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		try:
+			return next(self._iterator)
+		except BaseException:
+			self.close()
+			raise
+
+	def close(self):
+		if not self._released:
+			self._released = True
+			close = getattr(self._iterator, "close", None)
+			if close is not None:
+				close()
+			self._release()
+
+	def __del__(self):
+		self.close()
+
+
+class LLMProvider:
+	def __init__(self):
+		self.backend = None
+		self.backend_name = "openai"
+		self.api_key = None
+		self.base_url = None
+		self.max_concurrency = 4
+		self.queue_timeout = 0.5
+		self.timeout = 60.0
+		self.max_retries = 2
+		self.retry_base = 0.5
+		self.fake_latency = 0.0
+		self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+		self._lock = threading.Lock()
+		self._pid = None
+		self.stats = {"calls": 0, "in_flight": 0, "rejected": 0, "retries": 0, "errors": 0}
+
+	def init_app(self, app):
+		def setting(name, default):
+			return os.getenv(name, app.config.get(name, default))
+
+		self.backend_name = str(setting("LLM_BACKEND", "openai")).lower()
+		self.api_key = setting("OPENAI_API_KEY", None)
+		self.base_url = setting("OPENAI_BASE_URL", None)
+		self.max_concurrency = int(setting("LLM_MAX_CONCURRENCY", self.max_concurrency))
+		self.queue_timeout = float(setting("LLM_QUEUE_TIMEOUT", self.queue_timeout))
+		self.timeout = float(setting("LLM_TIMEOUT", self.timeout))
+		self.max_retries = int(setting("LLM_MAX_RETRIES", self.max_retries))
+		self.retry_base = float(setting("LLM_RETRY_BASE", self.retry_base))
+		self.fake_latency = float(setting("LLM_FAKE_LATENCY", self.fake_latency))
+		self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+		self.reset()
+		app.extensions["llm_provider"] = self
+
+	@property
+	def enabled(self) -> bool:
+		return self.backend_name == "fake" or self.backend is not None or bool(self.api_key)
+
+	def get_backend(self):
+		# Construit paresseusement, et une fois par processus (un client HTTP ne survit pas à un fork)
+		if self.backend is None or self._pid != os.getpid():
+			with self._lock:
+				if self.backend is None or self._pid != os.getpid():
+					if self.backend_name == "fake":
+						self.backend = FakeBackend(latency=self.fake_latency)
+					else:
+						self.backend = OpenAIBackend(self.api_key, self.base_url, self.timeout, self.max_concurrency)
+					self._pid = os.getpid()
+		return self.backend
+
+	def reset(self):
+		if self.backend is not None and self._pid == os.getpid():
+			self.backend.close()
+		self.backend = None
+		self._pid = None
+
+	def _count(self, name: str, delta: int = 1):
+		with self._lock:
+			self.stats[name] += delta
+
+	def _acquire(self, queue_timeout: float = None):
+		wait = self.queue_timeout if queue_timeout is None else queue_timeout
+		if not self._semaphore.acquire(timeout=wait):
+			self._count("rejected")
+			raise LLMBusy("LLM capacity exhausted, retry later")
+		self._count("in_flight")
+		self._count("calls")
+
+	def _release(self):
+		self._count("in_flight", -1)
+		self._semaphore.release()
+
+	def _backoff(self, attempt: int) -> float:
+		# "Full jitter": évite que les workers en échec relancent tous au même instant
+		return random.uniform(0, self.retry_base * (2 ** attempt))
+
+	def _call(self, fn, operation: str):
+		backend = self.get_backend()
+		attempt = 0
+		while True:
+			start = time.perf_counter()
+			try:
+				result = fn(backend)
+				metrics.observe_upstream(self.backend_name, operation, 200, time.perf_counter() - start)
+				return result
+			except LLMError:
+				raise
+			except Exception as exc:
+				status = getattr(exc, "status_code", None) or type(exc).__name__
+				metrics.observe_upstream(self.backend_name, operation, status, time.perf_counter() - start)
+				classified = backend.classify(exc)
+				if classified is None:
+					raise
+				error, retryable = classified
+				if not retryable or attempt >= self.max_retries:
+					self._count("errors")
+					raise error from exc
+				self._count("retries")
+				time.sleep(self._backoff(attempt))
+				attempt += 1
+
+	def complete(self, messages: list, model: str = None, temperature: float = 0.2, queue_timeout: float = None) -> str:
+		self._acquire(queue_timeout)
+		try:
+			return self._call(lambda backend: backend.complete(model or default_model(), messages, temperature), "complete")
+		finally:
+			self._release()
+
+	def stream(self, messages: list, model: str = None, temperature: float = 0.2, queue_timeout: float = None):
+		"""Itérateur de fragments. L'emplacement est pris tout de suite (LLMBusy avant tout
+		envoi au client) et gardé jusqu'à la fin du flux; retry seulement avant le premier fragment."""
+		self._acquire(queue_timeout)
+		try:
+			def open_stream(backend):
+				iterator = backend.stream(model or default_model(), messages, temperature)
+				return iterator, next(iterator, None)
+			# Mesuré jusqu'au premier fragment (le reste du flux suit le rythme du client)
+			iterator, first = self._call(open_stream, "stream")
+		except BaseException:
+			self._release()
+			raise
+
+		def chunks():
+			if first is not None:
+				yield first
+			yield from iterator
+
+		return _Slot(chunks(), self._release)
+
+
+llm_provider = LLMProvider()
+
+
+def cache_key(model: str, messages: list, **params) -> str:
+	payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True, ensure_ascii=False)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+	def __init__(self, max_entries: int = 512, ttl: float = 30 * 24 * 3600, wait_timeout: float = 30.0):
+		self.ttl = ttl
+		# Attente maximale d'un appel identique déjà en cours avant d'appeler soi-même
+		self.wait_timeout = wait_timeout
+		self.local = MemoryBackend(max_entries=max_entries)
+		self.stats = {
+			"memory_hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0, "wait_timeouts": 0, "upstream_calls": 0,
+		}
+		self._inflight = {}
+		self._inflight_lock = threading.Lock()
+		self._stats_lock = threading.Lock()
+
+	def init_app(self, app):
+		self.ttl = float(os.getenv("LLM_CACHE_TTL", app.config.get("LLM_CACHE_TTL", self.ttl)))
+		self.wait_timeout = float(os.getenv("LLM_CACHE_WAIT_TIMEOUT", app.config.get("LLM_CACHE_WAIT_TIMEOUT", self.wait_timeout)))
+		max_entries = os.getenv("LLM_CACHE_MAX_ENTRIES") or app.config.get("LLM_CACHE_MAX_ENTRIES")
+		if max_entries:
+			self.local.max_entries = int(max_entries)
+		app.extensions["llm_cache"] = self
+
+	def _count(self, name: str):
+		with self._stats_lock:
+			self.stats[name] += 1
+
+	# Connexions propres au cache (pas la session de la requête): ni commit de l'état
+	# en attente de la route, ni transaction ouverte par une simple lecture
+
+	def _load(self, key: str):
+		with db.engine.connect() as conn:
+			entry = conn.execute(
+				db.select(LLMCacheEntry.response, LLMCacheEntry.expires_at).where(LLMCacheEntry.key == key)
+			).first()
+		if entry is None or (entry.expires_at is not None and entry.expires_at <= datetime.utcnow()):
+			return None
+		return entry.response
+
+	def _store(self, key: str, model: str, response: str):
+		expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+		try:
+			with db.engine.begin() as conn:
+				conn.execute(
+					insert(LLMCacheEntry).values(key=key, model=model, response=response, expires_at=expires_at)
+				)
+		except IntegrityError:
+			# Un autre worker vient d'écrire la même clé (ou une entrée expirée existe)
+			with db.engine.begin() as conn:
+				conn.execute(
+					update(LLMCacheEntry).where(LLMCacheEntry.key == key).values(response=response, expires_at=expires_at)
+				)
+
+	def lookup(self, key: str):
+		"""Réponse en cache (mémoire puis base) ou None."""
+		value = self.local.get(key)
+		if value is not None:
+			self._count("memory_hits")
+			return value
+		value = self._load(key)
+		if value is not None:
+			self._count("db_hits")
+			self.local.set(key, value, self.ttl)
+		return value
+
+	def put(self, key: str, model: str, value: str):
+		# Une réponse vide n'est pas mise en cache (erreur amont probable)
+		if value:
+			self._store(key, model, value)
+			self.local.set(key, value, self.ttl)
+
+	def _join(self, key: str):
+		"""(vol en cours pour `key`, meneur?). Le meneur crée le vol et doit le terminer par `_land`."""
+		with self._inflight_lock:
+			flight = self._inflight.get(key)
+			if flight is not None:
+				return flight, False
+			flight = {"cond": threading.Condition(), "done": False, "parts": [], "value": None, "error": None}
+			self._inflight[key] = flight
+			return flight, True
+
+	def _land(self, key: str, flight: dict):
+		with self._inflight_lock:
+			if self._inflight.get(key) is flight:
+				del self._inflight[key]
+		with flight["cond"]:
+			flight["done"] = True
+			flight["cond"].notify_all()
+
+	def get_or_call(self, key: str, model: str, call):
+		"""(réponse, cached). `call()` n'est exécuté qu'en cas d'absence dans les deux niveaux."""
+		value = self.lookup(key)
+		if value is not None:
+			return value, True
+
+		flight, leader = self._join(key)
+		if not leader:
+			self._count("coalesced")
+			with flight["cond"]:
+				landed = flight["cond"].wait_for(lambda: flight["done"], self.wait_timeout)
+			if landed and flight["error"] is not None:
+				raise flight["error"]
+			if landed and flight["value"] is not None:
+				return flight["value"], True
+			# Meneur bloqué (ou flux abandonné par son client): appel direct,
+			# soumis au sémaphore du fournisseur (LLMBusy -> 503)
+			if not landed:
+				self._count("wait_timeouts")
+			self._count("upstream_calls")
+			value = call()
+			self.put(key, model, value)
+			return value, False
+
+		self._count("misses")
+		try:
+			self._count("upstream_calls")
+			value = call()
+			self.put(key, model, value)
+			flight["value"] = value
+			return value, False
+		except Exception as exc:
+			flight["error"] = exc
+			raise
+		finally:
+			self._land(key, flight)
+
+	def get_or_stream(self, key: str, model: str, open_stream):
+		"""Variante en flux de `get_or_call`: (itérateur de fragments, cached).
+
+		Les requêtes identiques simultanées (en flux ou non) relisent les fragments
+		du flux en cours au lieu d'ouvrir le leur. `open_stream()` est appelé tout de
+		suite par le meneur: LLMBusy sort avant le premier fragment.
+		"""
+		value = self.lookup(key)
+		if value is not None:
+			return iter([value]), True
+
+		flight, leader = self._join(key)
+		if not leader:
+			self._count("coalesced")
+			return self._follow(key, model, flight, open_stream), True
+
+		self._count("misses")
+		self._count("upstream_calls")
+		try:
+			upstream = open_stream()
+		except Exception as exc:
+			flight["error"] = exc
+			self._land(key, flight)
+			raise
+
+		def deltas():
+			try:
+				for delta in upstream:
+					with flight["cond"]:
+						flight["parts"].append(delta)
+						flight["cond"].notify_all()
+					yield delta
+			except Exception as exc:
+				flight["error"] = exc
+				raise
+			value = "".join(flight["parts"])
+			self.put(key, model, value)
+			flight["value"] = value
+
+		def release():
+			close = getattr(upstream, "close", None)
+			if close is not None:
+				close()
+			self._land(key, flight)
+
+		# Flux fermé ou abandonné (client parti, même avant le premier fragment): le vol est terminé
+		return _Slot(deltas(), release), False
+
+	def _follow(self, key: str, model: str, flight: dict, open_stream):
+		sent = 0
+		sent_chars = 0
+		while True:
+			with flight["cond"]:
+				# Le délai repart à chaque fragment: seul un meneur muet est abandonné
+				flight["cond"].wait_for(lambda: flight["done"] or len(flight["parts"]) > sent, self.wait_timeout)
+				parts, done = flight["parts"][sent:], flight["done"]
+			for part in parts:
+				yield part
+			sent += len(parts)
+			sent_chars += sum(len(part) for part in parts)
+			if done or not parts:
+				break
+		if done and flight["error"] is not None:
+			raise flight["error"]
+		if done and flight["value"] is not None:
+			# Meneur sans flux: la réponse arrive d'un bloc
+			if flight["value"][sent_chars:]:
+				yield flight["value"][sent_chars:]
+			return
+		if not done:
+			self._count("wait_timeouts")
+		if sent:
+			raise LLMError("upstream stream interrupted")
+		# Rien reçu du meneur: flux direct, comme get_or_call
+		self._count("upstream_calls")
+		upstream = open_stream()
+		parts = []
+		try:
+			for delta in upstream:
+				parts.append(delta)
+				yield delta
+		finally:
+			close = getattr(upstream, "close", None)
+			if close is not None:
+				close()
+		self.put(key, model, "".join(parts))
+
+	def clear(self):
+		self.local.clear()
+
+
+llm_cache = LLMCache()
+
+
+def chat_completion(messages: list, model: str = None, temperature: float = 0.2, queue_timeout: float = None):
+	"""Contenu de la réponse et indicateur de cache: (texte, cached)."""
+	model = model or default_model()
+	key = cache_key(model, messages, temperature=temperature)
+	return llm_cache.get_or_call(
+		key, model, lambda: llm_provider.complete(messages, model, temperature, queue_timeout=queue_timeout)
+	)
+
+
+def stream_chat_completion(messages: list, model: str = None, temperature: float = 0.2):
+	"""Variante en flux: (itérateur de fragments de texte, cached).
+
+	Même clé de cache et même appel partagé que `chat_completion`. Sur un hit, la
+	réponse complète est renvoyée en un seul fragment; sinon la réponse assemblée
+	est mise en cache une fois le flux terminé.
+	"""
+	model = model or default_model()
+	key = cache_key(model, messages, temperature=temperature)
+	return llm_cache.get_or_stream(key, model, lambda: llm_provider.stream(messages, model, temperature))
@@ -0,0 +1,358 @@
+"""Métriques Prometheus (GET /metrics), agrégées entre les workers gunicorn.
+
+Chaque processus tient ses compteurs et histogrammes en mémoire (un dict sous
+verrou, quelques dizaines de µs par requête) et les recopie en valeurs absolues, toutes les
+METRICS_FLUSH_INTERVAL s, dans un fichier SQLite partagé par les workers du
+conteneur (METRICS_DB_PATH, WAL, comme ratelimit.py). /metrics recopie d'abord
+les valeurs de son propre processus puis somme les lignes de tous les processus.
+Quand un worker meurt (hook child_exit de gunicorn), ses compteurs sont fondus
+dans la ligne pid 0 et ses jauges effacées: les totaux ne reculent pas quand
+max_requests recycle un worker.
+
+Mesuré: latence, statut et requêtes en cours par blueprint / route (http_*),
+nombre et durée des requêtes SQL par requête HTTP (événements SQLAlchemy),
+appels sortants GitHub / OpenAI (upstream_*), hachage des mots de passe, et
+l'état des pools de connexions et des caches.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "progestion-metrics.db")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# nom -> (type, aide, buckets des histogrammes)
+FAMILIES = {
+	"http_requests_total": ("counter", "Requêtes HTTP terminées.", None),
+	"http_request_duration_seconds": ("histogram", "Durée des requêtes HTTP (jusqu'aux en-têtes de réponse).", LATENCY_BUCKETS),
+	"http_requests_in_flight": ("gauge", "Requêtes HTTP en cours.", None),
+	"http_request_db_queries": ("histogram", "Requêtes SQL exécutées par requête HTTP.", QUERY_COUNT_BUCKETS),
+	"http_request_db_seconds": ("histogram", "Temps passé en SQL par requête HTTP.", LATENCY_BUCKETS),
+	"db_queries_total": ("counter", "Requêtes SQL exécutées (requêtes HTTP et tâches de fond).", None),
+	"db_query_seconds_total": ("counter", "Temps total passé en SQL.", None),
+	"upstream_requests_total": ("counter", "Appels sortants (GitHub, fournisseur LLM) par statut.", None),
+	"upstream_request_duration_seconds": ("histogram", "Durée des appels sortants.", LATENCY_BUCKETS),
+	"password_hash_duration_seconds": ("histogram", "Durée du hachage / de la vérification d'un mot de passe, attente du pool comprise.", LATENCY_BUCKETS),
+	"db_pool_checkouts_total": ("counter", "Connexions empruntées au pool.", None),
+	"db_pool_wait_seconds_total": ("counter", "Temps d'attente d'une connexion du pool.", None),
+	"db_pool_timeouts_total": ("counter", "Attentes d'une connexion abandonnées (pool plein).", None),
+	"db_pool_checked_out": ("gauge", "Connexions du pool en cours d'utilisation.", None),
+	"identity_cache_events_total": ("counter", "Cache d'identité: hits, misses, invalidations.", None),
+	"llm_cache_events_total": ("counter", "Cache LLM: hits mémoire / base, misses, coalescences, appels amont.", None),
+	"llm_provider_events_total": ("counter", "Fournisseur LLM: appels, rejets (saturé), retries, erreurs.", None),
+	"llm_provider_in_flight": ("gauge", "Appels au fournisseur LLM en cours.", None),
+	"password_hasher_events_total": ("counter", "Pool de hachage: hachages, vérifications, rehachages, rejets.", None),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+	pid INTEGER NOT NULL,
+	family TEXT NOT NULL,
+	name TEXT NOT NULL,
+	labels TEXT NOT NULL,
+	le TEXT NOT NULL,
+	kind TEXT NOT NULL,
+	value REAL NOT NULL,
+	PRIMARY KEY (pid, name, labels, le)
+) WITHOUT ROWID;
+"""
+
+UPSERT = (
+	"INSERT INTO samples (pid, family, name, labels, le, kind, value) VALUES (?, ?, ?, ?, ?, ?, ?) "
+	"ON CONFLICT (pid, name, labels, le) DO UPDATE SET value = excluded.value"
+)
+
+
+def _escape(value) -> str:
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@lru_cache(maxsize=4096)
+def _labels(pairs: tuple) -> str:
+	return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+def _le(bound: float) -> str:
+	return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+@lru_cache(maxsize=4096)
+def _histogram_keys(family: str, labels: str) -> tuple:
+	"""Clés des séries d'un histogramme: ((borne, clé)...), +Inf, _count, _sum."""
+	buckets = tuple((bound, (family, f"{family}_bucket", labels, _le(bound))) for bound in FAMILIES[family][2])
+	return (
+		buckets,
+		(family, f"{family}_bucket", labels, "+Inf"),
+		(family, f"{family}_count", labels, ""),
+		(family, f"{family}_sum", labels, ""),
+	)
+
+
+class Metrics:
+	def __init__(self):
+		self.enabled = True
+		# Lu aussi ici: le maître gunicorn (hooks when_ready / child_exit) ne passe pas par init_app sans preload
+		self.path = os.getenv("METRICS_DB_PATH", DEFAULT_PATH)
+		self.flush_interval = 5.0
+		# (famille, nom de l'échantillon, labels, le) -> valeur, pour ce processus
+		self._samples = {}
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self._pid = None
+		self._engines = []
+
+	def init_app(self, app):
+		def setting(name, default):
+			return type(default)(os.getenv(name, app.config.get(name, default)))
+
+		self.enabled = setting("METRICS_ENABLED", "true").lower() == "true"
+		self.path = setting("METRICS_DB_PATH", self.path)
+		self.flush_interval = setting("METRICS_FLUSH_INTERVAL", self.flush_interval)
+		app.extensions["metrics"] = self
+		if not self.enabled:
+			return
+		# Enregistrés avant ceux du limiteur: une requête refusée (429) est aussi mesurée
+		app.before_request(_before_request)
+		app.after_request(_after_request)
+		app.teardown_request(_teardown_request)
+		with app.app_context():
+			self._engines = list(db.engines.values())
+		for engine in self._engines:
+			event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+			event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+			event.listen(engine, "handle_error", _cursor_error)
+
+	# Enregistrement (processus courant)
+
+	def _after_fork(self):
+		# Le verrou a pu être copié tenu par un thread du parent; le fils repart de zéro
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self._samples = {}
+		self._pid = None
+
+	def _own(self):
+		# Premier enregistrement du processus: démarre son thread de flush
+		if self._pid != os.getpid():
+			with self._lock:
+				if self._pid != os.getpid():
+					self._pid = os.getpid()
+					threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+	def inc(self, family: str, labels: tuple = (), amount: float = 1):
+		if not self.enabled:
+			return
+		self._own()
+		key = (family, family, _labels(labels), "")
+		with self._lock:
+			self._samples[key] = self._samples.get(key, 0) + amount
+
+	def observe(self, family: str, labels: tuple, value: float):
+		if not self.enabled:
+			return
+		self._own()
+		keys = _histogram_keys(family, _labels(labels))
+		with self._lock:
+			samples = self._samples
+			for bound, key in keys[0]:
+				if value <= bound:
+					samples[key] = samples.get(key, 0) + 1
+			for key, amount in zip(keys[1:], (1, 1, value)):
+				samples[key] = samples.get(key, 0) + amount
+
+	def observe_upstream(self, service: str, operation: str, status, seconds: float):
+		self.inc("upstream_requests_total", (("service", service), ("operation", operation), ("status", status)))
+		self.observe("upstream_request_duration_seconds", (("service", service), ("operation", operation)), seconds)
+
+	def _collect(self) -> list:
+		"""Compteurs déjà tenus par les autres sous-systèmes, lus au moment du flush."""
+		from .identity import identity_cache
+		from .llm import llm_cache, llm_provider
+		from .passwords import password_hasher
+
+		rows = []
+		for index, engine in enumerate(self._engines):
+			metrics = getattr(engine.pool, "metrics", None)
+			if metrics is None:
+				continue
+			labels = (("bind", "default" if index == 0 else str(index)),)
+			rows.append(("db_pool_checkouts_total", labels, metrics["checkouts"]))
+			rows.append(("db_pool_wait_seconds_total", labels, metrics["wait_total"]))
+			rows.append(("db_pool_timeouts_total", labels, metrics["timeouts"]))
+			rows.append(("db_pool_checked_out", labels, engine.pool.checkedout()))
+		for family, stats in (
+			("identity_cache_events_total", identity_cache.stats),
+			("llm_cache_events_total", llm_cache.stats),
+			("llm_provider_events_total", llm_provider.stats),
+			("password_hasher_events_total", password_hasher.stats),
+		):
+			for event_name, value in stats.items():
+				if event_name != "in_flight":
+					rows.append((family, (("event", event_name),), value))
+		rows.append(("llm_provider_in_flight", (), llm_provider.stats["in_flight"]))
+		return rows
+
+	# Partage entre processus
+
+	def _conn(self):
+		conn = getattr(self._local, "conn", None)
+		if conn is None or self._local.pid != os.getpid():
+			conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(SCHEMA)
+			self._local.conn = conn
+			self._local.pid = os.getpid()
+		return conn
+
+	def flush(self):
+		"""Recopie les valeurs de ce processus dans le fichier partagé (valeurs absolues)."""
+		pid = os.getpid()
+		if not self.enabled or self._pid != pid:
+			return
+		with self._lock:
+			samples = list(self._samples.items())
+		rows = [
+			(pid, family, name, labels, le, FAMILIES[family][0], value)
+			for (family, name, labels, le), value in samples
+		]
+		rows.extend(
+			(pid, family, family, _labels(labels), "", FAMILIES[family][0], value)
+			for family, labels, value in self._collect()
+		)
+		conn = self._conn()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			conn.executemany(UPSERT, rows)
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+
+	def _flush_loop(self):
+		pid = os.getpid()
+		while self._pid == pid:
+			time.sleep(self.flush_interval)
+			try:
+				self.flush()
+			except Exception:
+				logger.warning("metrics flush failed", exc_info=True)
+
+	def mark_dead(self, pid: int):
+		"""Worker terminé: ses compteurs passent dans la ligne pid 0, ses jauges disparaissent."""
+		conn = self._conn()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			conn.execute(
+				"INSERT INTO samples (pid, family, name, labels, le, kind, value) "
+				"SELECT 0, family, name, labels, le, kind, value FROM samples WHERE pid = ? AND kind != 'gauge' "
+				"ON CONFLICT (pid, name, labels, le) DO UPDATE SET value = value + excluded.value",
+				(pid,),
+			)
+			conn.execute("DELETE FROM samples WHERE pid = ?", (pid,))
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+
+	def wipe(self):
+		"""Au démarrage du serveur: rien ne reste des processus d'une exécution précédente."""
+		self._conn().execute("DELETE FROM samples")
+
+	def render(self) -> str:
+		"""Format d'exposition texte de Prometheus, sommé sur tous les processus."""
+		self.flush()
+		rows = self._conn().execute(
+			"SELECT family, name, labels, le, SUM(value) FROM samples GROUP BY family, name, labels, le"
+		).fetchall()
+		rows.sort(key=lambda row: (row[0], row[2], row[1], float(row[3]) if row[3] else 0.0))
+		lines = []
+		family = None
+		for row_family, name, labels, le, value in rows:
+			if row_family not in FAMILIES:
+				continue
+			if row_family != family:
+				family = row_family
+				kind, help_text = FAMILIES[family][:2]
+				lines.append(f"# HELP {family} {help_text}")
+				lines.append(f"# TYPE {family} {kind}")
+			if le:
+				labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+			lines.append(f"{name}{{{labels}}} {value!r}" if labels else f"{name} {value!r}")
+		return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+os.register_at_fork(after_in_child=metrics._after_fork)
+
+
+# Requêtes HTTP
+
+def _route_labels() -> tuple:
+	return (("blueprint", request.blueprint or "none"), ("endpoint", request.endpoint or "none"))
+
+
+def _before_request():
+	if not metrics.enabled:
+		return
+	g._metrics_start = time.perf_counter()
+	g._metrics_sql = [0, 0.0]
+	metrics.inc("http_requests_in_flight", (("blueprint", request.blueprint or "none"),))
+
+
+def _after_request(response):
+	g._metrics_status = response.status_code
+	return response
+
+
+def _teardown_request(exc):
+	start = g.pop("_metrics_start", None)
+	if start is None:
+		return
+	elapsed = time.perf_counter() - start
+	status = 500 if exc is not None else g.pop("_metrics_status", 500)
+	queries, sql_seconds = g.pop("_metrics_sql", (0, 0.0))
+	route = _route_labels()
+	metrics.inc("http_requests_in_flight", (("blueprint", request.blueprint or "none"),), -1)
+	metrics.inc("http_requests_total", route + (("method", request.method), ("status", status)))
+	metrics.observe("http_request_duration_seconds", route + (("method", request.method),), elapsed)
+	metrics.observe("http_request_db_queries", route, queries)
+	metrics.observe("http_request_db_seconds", route, sql_seconds)
+
+
+# Requêtes SQL
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+	conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+	starts = conn.info.get("metrics_query_start")
+	if not starts:
+		return
+	elapsed = time.perf_counter() - starts.pop()
+	metrics.inc("db_queries_total")
+	metrics.inc("db_query_seconds_total", (), elapsed)
+	if has_request_context():
+		per_request = g.get("_metrics_sql")
+		if per_request is not None:
+			per_request[0] += 1
+			per_request[1] += elapsed
+
+
+def _cursor_error(context):
+	starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+	if starts:
+		starts.pop()
@@ -38,12 +38,19 @@ class Project(db.Model, TimestampMixin):
 	priority = db.Column(db.String(20), default="medium", nullable=False)
 	roadmap_path = db.Column(db.String(512), nullable=True)
 
+	__table_args__ = (
+		# GET /projects (tri + pagination) et projets d'un propriétaire
+		db.Index("ix_projects_created_id", "created_at", "id"),
+		db.Index("ix_projects_owner_created_id", "owner_id", "created_at", "id"),
+	)
+
 	owner = db.relationship("User", back_populates="projects")
 	tasks = db.relationship("Task", back_populates="project", cascade="all,delete")
 	repository_links = db.relationship(
 		"RepositoryLink", back_populates="project", cascade="all,delete"
 	)
 	kanban_board = db.relationship("KanbanBoard", back_populates="project", uselist=False, cascade="all,delete")
+	roadmap_sync_state = db.relationship("RoadmapSyncState", back_populates="project", uselist=False, cascade="all,delete")
 
 
 class Task(db.Model, TimestampMixin):
@@ -57,15 +64,41 @@ class Task(db.Model, TimestampMixin):
 	priority = db.Column(db.String(20), default="medium", nullable=False)
 	due_date = db.Column(db.DateTime, nullable=True)
 	kanban_column_id = db.Column(db.Integer, db.ForeignKey("kanban_columns.id"), nullable=True, index=True)
+	# Position dans la colonne: rang lexicographique (voir app/ranking.py)
+	rank = db.Column(db.String(64), nullable=True)
+
+	__table_args__ = (
+		# GET /tasks?project_id= (tri + pagination) et dédoublonnage roadmap par titre
+		db.Index("ix_tasks_project_created_id", "project_id", "created_at", "id"),
+		db.Index("ix_tasks_project_title", "project_id", "title"),
+		db.Index("ix_tasks_column_rank", "kanban_column_id", "rank"),
+	)
 
 	project = db.relationship("Project", back_populates="tasks")
 
 
+class RoadmapSyncState(db.Model, TimestampMixin):
+	__tablename__ = "roadmap_sync_states"
+
+	id = db.Column(db.Integer, primary_key=True)
+	project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), unique=True, nullable=False, index=True)
+	path = db.Column(db.String(512), nullable=False)
+	file_hash = db.Column(db.String(64), nullable=False)
+	file_mtime_ns = db.Column(db.BigInteger, nullable=False)
+	file_size = db.Column(db.BigInteger, nullable=False)
+	item_count = db.Column(db.Integer, default=0, nullable=False)
+	fingerprints = db.Column(db.Text, nullable=True)  # JSON {titre: empreinte}
+	# JSON {titre: id} des tâches créées par la synchro: seules celles-ci sont supprimées
+	task_ids = db.Column(db.Text, nullable=True)
+
+	project = db.relationship("Project", back_populates="roadmap_sync_state")
+
+
 class RepositoryLink(db.Model, TimestampMixin):
 	__tablename__ = "repository_links"
 
 	id = db.Column(db.Integer, primary_key=True)
-	project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
+	project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False, index=True)
 	provider = db.Column(db.String(20), nullable=False)  # github | gitlab
 	repo_full_name = db.Column(db.String(255), nullable=False)
 	last_synced_at = db.Column(db.DateTime, nullable=True)
@@ -139,6 +172,25 @@ class PublicRepo(db.Model, TimestampMixin):
 	)
 
 
+class RepoStats(db.Model, TimestampMixin):
+	"""Statistiques agrégées d'un dépôt (une ligne par dépôt, partagée entre utilisateurs)."""
+	__tablename__ = "repo_stats"
+
+	id = db.Column(db.Integer, primary_key=True)
+	provider = db.Column(db.String(20), nullable=False)  # github
+	repo_full_name = db.Column(db.String(255), nullable=False)
+	stars = db.Column(db.Integer, default=0, nullable=False)
+	dominant_language = db.Column(db.String(80), nullable=True)
+	languages = db.Column(db.Text, nullable=True)  # JSON {langage: octets}
+	commits_30d = db.Column(db.Integer, default=0, nullable=False)
+	fetched_at = db.Column(db.DateTime, nullable=True)
+	expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+	__table_args__ = (
+		db.UniqueConstraint("provider", "repo_full_name", name="uq_repo_stats_provider_repo"),
+	)
+
+
 class KanbanBoard(db.Model, TimestampMixin):
 	__tablename__ = "kanban_boards"
 
@@ -161,3 +213,52 @@ class KanbanColumn(db.Model, TimestampMixin):
 	board = db.relationship("KanbanBoard", back_populates="columns")
 	tasks = db.relationship("Task", backref="kanban_column")
 
+
+
+class LLMCacheEntry(db.Model, TimestampMixin):
+	"""Réponse LLM mémorisée, adressée par le hash du prompt complet et des paramètres."""
+	__tablename__ = "llm_cache_entries"
+
+	id = db.Column(db.Integer, primary_key=True)
+	key = db.Column(db.String(64), unique=True, nullable=False, index=True)
+	model = db.Column(db.String(80), nullable=False)
+	response = db.Column(db.Text, nullable=False)
+	hit_count = db.Column(db.Integer, default=0, nullable=False)
+	last_hit_at = db.Column(db.DateTime, nullable=True)
+	expires_at = db.Column(db.DateTime, nullable=True)
+
+
+class Job(db.Model, TimestampMixin):
+	"""Tâche de fond (ex: smart-sync), file d'attente stockée en base."""
+	__tablename__ = "jobs"
+
+	id = db.Column(db.Integer, primary_key=True)
+	kind = db.Column(db.String(50), nullable=False)
+	status = db.Column(db.String(20), default="queued", nullable=False)  # queued | running | succeeded | failed
+	user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
+	payload = db.Column(db.Text, nullable=True)  # JSON
+	result = db.Column(db.Text, nullable=True)  # JSON
+	error = db.Column(db.Text, nullable=True)
+	progress = db.Column(db.Integer, default=0, nullable=False)
+	stage = db.Column(db.String(50), nullable=True)
+	attempts = db.Column(db.Integer, default=0, nullable=False)
+	worker_id = db.Column(db.String(100), nullable=True)
+	heartbeat_at = db.Column(db.DateTime, nullable=True)
+	started_at = db.Column(db.DateTime, nullable=True)
+	finished_at = db.Column(db.DateTime, nullable=True)
+
+	__table_args__ = (
+		# Prise du prochain job: WHERE status = 'queued' ORDER BY id
+		db.Index("ix_jobs_status_id", "status", "id"),
+	)
+
+
+class RateLimitCounter(db.Model):
+	"""Compteurs de rate limit d'un nœud (pod), publiés pour les autres nœuds (RATELIMIT_CLUSTER_SYNC)."""
+	__tablename__ = "rate_limit_counters"
+
+	node = db.Column(db.String(255), primary_key=True)
+	key = db.Column(db.String(512), primary_key=True)
+	bucket = db.Column(db.BigInteger, primary_key=True)  # floor(epoch / durée de la fenêtre)
+	count = db.Column(db.Integer, default=0, nullable=False)
+	expires_at = db.Column(db.Float, nullable=False, index=True)  # epoch (s)
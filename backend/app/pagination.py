@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+	raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+	return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+	"""Retourne (created_at, id) ou lève ValueError si le curseur est invalide."""
+	try:
+		padded = cursor + "=" * (-len(cursor) % 4)
+		created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+		return datetime.fromisoformat(created_at), int(row_id)
+	except Exception as exc:
+		raise ValueError("invalid cursor") from exc
+
+
+def page_args():
+	"""Lit `limit` et `cursor` de la requête courante (ValueError si curseur invalide)."""
+	limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+	limit = max(1, min(limit, MAX_LIMIT))
+	cursor = request.args.get("cursor")
+	return limit, decode_cursor(cursor) if cursor else None
+
+
+def keyset_page(session, stmt, created_col, id_col, limit: int, after=None):
+	"""Exécute `stmt` trié par (created_at, id) décroissants à partir du curseur `after`.
+
+	Le filtre porte sur le couple (created_at, id) et non sur un OFFSET: le coût
+	d'une page est le même quelle que soit sa profondeur.
+	Retourne (lignes, next_cursor).
+	"""
+	if after is not None:
+		stmt = stmt.where(tuple_(created_col, id_col) < tuple_(*after))
+	stmt = stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+	rows = session.execute(stmt).all()
+	next_cursor = None
+	if len(rows) > limit:
+		rows = rows[:limit]
+		last = rows[-1]
+		next_cursor = encode_cursor(last.created_at, last.id)
+	return rows, next_cursor
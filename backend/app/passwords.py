@@ -0,0 +1,155 @@
+"""Hachage des mots de passe hors du thread de requête.
+
+scrypt / pbkdf2 sont volontairement coûteux en CPU: calculés dans le thread de
+la requête, une rafale de logins occupe autant de cœurs que de requêtes en
+cours et affame les autres routes. `password_hasher` les exécute dans un pool
+de processus borné (PASSWORD_HASH_WORKERS, créé au premier appel et une fois
+par processus), avec une file d'attente limitée: au-delà, la requête reçoit
+503 + Retry-After plutôt que de s'empiler. Le pool est démarré en `spawn`: un
+script qui hache des mots de passe doit garder son code sous
+`if __name__ == "__main__":`.
+
+Les paramètres (PASSWORD_HASH_METHOD, format werkzeug: `scrypt:32768:8:1`,
+`pbkdf2:sha256:600000`...) sont réglables: un hash produit avec d'autres
+paramètres est recalculé de façon transparente au login suivant.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from .metrics import metrics
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class PasswordHasherBusy(Exception):
+	"""Trop de calculs de hash en attente dans ce processus."""
+	status_code = 503
+	retry_after = 2
+
+
+def canonical_method(method: str) -> str:
+	"""Forme complète d'une méthode werkzeug, telle qu'elle préfixe les hash produits."""
+	name, _, args = method.partition(":")
+	parts = args.split(":") if args else []
+	if name == "scrypt":
+		if not parts:
+			return DEFAULT_METHOD
+		if len(parts) != 3:
+			raise ValueError(f"invalid scrypt parameters: {method!r} (expected scrypt:n:r:p)")
+		return "scrypt:" + ":".join(str(int(p)) for p in parts)
+	if name == "pbkdf2":
+		hash_name = parts[0] if parts else "sha256"
+		iterations = int(parts[1]) if len(parts) > 1 else DEFAULT_PBKDF2_ITERATIONS
+		return f"pbkdf2:{hash_name}:{iterations}"
+	raise ValueError(f"unsupported password hash method: {method!r}")
+
+
+class PasswordHasher:
+	def __init__(self):
+		self.method = DEFAULT_METHOD
+		self.workers = min(2, os.cpu_count() or 1)
+		self.max_pending = 8
+		self.queue_timeout = 5.0
+		self.timeout = 30.0
+		self.stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0}
+		self._pool = None
+		self._pid = None
+		self._lock = threading.Lock()
+		self._pending = threading.BoundedSemaphore(self.max_pending)
+
+	def init_app(self, app):
+		def setting(name, default):
+			return os.getenv(name, app.config.get(name, default))
+
+		self.method = canonical_method(str(setting("PASSWORD_HASH_METHOD", self.method)))
+		# 0: calcul dans le thread de la requête (dev, tests)
+		self.workers = int(setting("PASSWORD_HASH_WORKERS", self.workers))
+		self.max_pending = int(setting("PASSWORD_HASH_MAX_PENDING", max(1, self.workers) * 4))
+		self.queue_timeout = float(setting("PASSWORD_HASH_QUEUE_TIMEOUT", self.queue_timeout))
+		self.timeout = float(setting("PASSWORD_HASH_TIMEOUT", self.timeout))
+		self._pending = threading.BoundedSemaphore(self.max_pending)
+		self.reset()
+		app.extensions["password_hasher"] = self
+
+	def _get_pool(self):
+		# Un pool par processus: les processus fils du parent ne sont pas hérités par un fork
+		if self._pool is None or self._pid != os.getpid():
+			with self._lock:
+				if self._pool is None or self._pid != os.getpid():
+					# spawn: pas de fork d'un processus qui a déjà des threads (verrous hérités)
+					context = multiprocessing.get_context("spawn")
+					self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+					self._pid = os.getpid()
+		return self._pool
+
+	def reset(self):
+		if self._pool is not None and self._pid == os.getpid():
+			self._pool.shutdown(wait=False, cancel_futures=True)
+		self._pool = None
+		self._pid = None
+
+	def _count(self, name: str):
+		with self._lock:
+			self.stats[name] += 1
+
+	def _run(self, operation: str, fn, *args):
+		start = time.perf_counter()
+		try:
+			return self._submit(fn, *args)
+		finally:
+			metrics.observe("password_hash_duration_seconds", (("operation", operation),), time.perf_counter() - start)
+
+	def _submit(self, fn, *args):
+		if self.workers <= 0:
+			return fn(*args)
+		if not self._pending.acquire(timeout=self.queue_timeout):
+			self._count("rejected")
+			raise PasswordHasherBusy("password hashing capacity exhausted, retry later")
+		try:
+			for attempt in range(2):
+				pool = self._get_pool()
+				try:
+					return pool.submit(fn, *args).result(timeout=self.timeout)
+				except BrokenProcessPool:
+					# Processus du pool tué (OOM...): on en recrée un, une fois
+					with self._lock:
+						if self._pool is pool:
+							self._pool = None
+					if attempt:
+						raise
+				except FutureTimeout:
+					self._count("rejected")
+					raise PasswordHasherBusy("password hashing timed out, retry later")
+		finally:
+			self._pending.release()
+
+	def hash(self, password: str) -> str:
+		self._count("hashed")
+		return self._run("hash", generate_password_hash, password, self.method)
+
+	def verify(self, pwhash: str, password: str) -> bool:
+		if not pwhash:
+			return False
+		self._count("verified")
+		return self._run("verify", check_password_hash, pwhash, password)
+
+	def needs_rehash(self, pwhash: str) -> bool:
+		return pwhash.split("$", 1)[0] != self.method
+
+	def verify_and_update(self, pwhash: str, password: str):
+		"""(valide, nouveau hash ou None) : nouveau hash si les paramètres ont changé."""
+		if not self.verify(pwhash, password):
+			return False, None
+		if not self.needs_rehash(pwhash):
+			return True, None
+		self._count("rehashed")
+		return True, self.hash(password)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,100 @@
+"""Rangs lexicographiques pour ordonner les tâches d'une colonne Kanban.
+
+Un rang est une fraction en base 36 écrite sans le "0.": "h" < "hh" < "i".
+Entre deux rangs il en existe toujours un troisième, donc déplacer une carte
+ne réécrit qu'une seule ligne. Les chiffres sont restreints à [0-9a-z] pour
+que l'ordre reste identique quelle que soit la collation de la base.
+"""
+from sqlalchemy import update
+
+from . import db
+from .models import Task
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+# Au-delà, la colonne est renumérotée (rangs courts et régulièrement espacés)
+MAX_RANK_LENGTH = 24
+
+
+def _midpoint(a: str, b):
+	# a < b; a peut être "" (borne basse), b peut être None (borne haute).
+	# Aucun rang ne se termine par "0", ce qui garantit qu'un milieu existe.
+	if b is not None:
+		n = 0
+		while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+			n += 1
+		if n > 0:
+			return b[:n] + _midpoint(a[n:], b[n:])
+	digit_a = DIGITS.index(a[0]) if a else 0
+	if b is None and a and digit_a < BASE - 1:
+		# Ajout en fin de colonne (cas le plus fréquent): on avance d'un chiffre
+		# plutôt que de couper l'intervalle en deux, les rangs grandissent moins vite
+		return DIGITS[digit_a + 1]
+	digit_b = DIGITS.index(b[0]) if b is not None else BASE
+	if digit_b - digit_a > 1:
+		return DIGITS[(digit_a + digit_b + 1) // 2]
+	if b is not None and len(b) > 1:
+		return b[:1]
+	return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(prev, next_):
+	"""Rang strictement compris entre `prev` et `next_` (None = pas de borne)."""
+	if prev is not None and next_ is not None and prev >= next_:
+		raise ValueError(f"{prev!r} >= {next_!r}")
+	return _midpoint(prev or "", next_)
+
+
+def needs_rebalance(rank) -> bool:
+	return rank is None or len(rank) > MAX_RANK_LENGTH
+
+
+def spread_ranks(count: int) -> list:
+	"""`count` rangs croissants, de même longueur et régulièrement espacés."""
+	width = 1
+	while BASE ** width < (count + 1) * BASE:
+		width += 1
+	step = BASE ** width // (count + 1)
+	ranks = []
+	for i in range(1, count + 1):
+		value = step * i
+		digits = []
+		for _ in range(width):
+			value, d = divmod(value, BASE)
+			digits.append(DIGITS[d])
+		ranks.append("".join(reversed(digits)).rstrip("0"))
+	return ranks
+
+
+def last_rank(column_id: int, exclude_id=None):
+	stmt = db.select(db.func.max(Task.rank)).where(Task.kanban_column_id == column_id)
+	if exclude_id is not None:
+		stmt = stmt.where(Task.id != exclude_id)
+	return db.session.scalar(stmt)
+
+
+def append_rank(column_id: int, exclude_id=None) -> str:
+	rank = rank_between(last_rank(column_id, exclude_id), None)
+	if needs_rebalance(rank):
+		rebalance_column(column_id)
+		rank = rank_between(last_rank(column_id, exclude_id), None)
+	return rank
+
+
+def rebalance_column(column_id: int, batch_size: int = 500) -> int:
+	"""Renumérote toute la colonne avec des rangs courts, par lots d'UPDATE.
+
+	L'ordre affiché est conservé: tâches classées d'abord, puis celles sans rang
+	(créées avant l'ajout du champ) de la plus récente à la plus ancienne,
+	comme dans le snapshot du board. Ne commit pas.
+	"""
+	ids = db.session.scalars(
+		db.select(Task.id)
+		.where(Task.kanban_column_id == column_id)
+		.order_by(Task.rank.is_(None), Task.rank, Task.created_at.desc(), Task.id.desc())
+	).all()
+	ranks = spread_ranks(len(ids))
+	rows = [{"id": task_id, "rank": rank} for task_id, rank in zip(ids, ranks)]
+	for start in range(0, len(rows), batch_size):
+		db.session.execute(update(Task), rows[start:start + batch_size])
+	return len(rows)
@@ -0,0 +1,260 @@
+"""Stockage des compteurs de Flask-Limiter partagé entre workers, sans service réseau.
+
+`sharedsqlite:///chemin.db` (RATELIMIT_STORAGE_URI): un fichier SQLite en WAL
+sur le disque local du nœud, ouvert par tous les workers gunicorn du pod. Un
+hit est une transaction courte (BEGIN IMMEDIATE, lecture des deux fenêtres,
+upsert), sans fsync (synchronous=NORMAL): quelques dizaines de µs, et une
+limite "5/minute" vaut 5 pour tout le pod, pas 5 par worker.
+
+Optionnellement (RATELIMIT_CLUSTER_SYNC), les compteurs "sliding window" sont
+partagés entre pods via la base de l'application (table rate_limit_counters):
+un seul worker par nœud, toutes les RATELIMIT_SYNC_INTERVAL s, publie en un
+lot les compteurs modifiés du nœud et relit la somme de ceux des autres nœuds.
+Aucune requête HTTP n'attend la base; en échange, le dépassement possible est
+borné par ce que les autres nœuds acceptent pendant un intervalle.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "progestion-ratelimit.db")
+FIXED = -1  # bucket des compteurs "fixed window" (expiration propre à chaque compteur)
+PURGE_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+	key TEXT NOT NULL,
+	bucket INTEGER NOT NULL,
+	count INTEGER NOT NULL DEFAULT 0,
+	remote INTEGER NOT NULL DEFAULT 0,
+	expires_at REAL NOT NULL,
+	dirty INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (key, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_counters_expires_at ON counters (expires_at);
+CREATE TABLE IF NOT EXISTS sync_lease (id INTEGER PRIMARY KEY, owner TEXT, until REAL NOT NULL);
+INSERT OR IGNORE INTO sync_lease (id, owner, until) VALUES (1, NULL, 0);
+"""
+
+UPSERT_FIXED = (
+	"INSERT INTO counters (key, bucket, count, expires_at) VALUES (?, ?, ?, ?) "
+	"ON CONFLICT (key, bucket) DO UPDATE SET "
+	"count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, "
+	"expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END "
+	"RETURNING count"
+)
+UPSERT_SLIDING = (
+	"INSERT INTO counters (key, bucket, count, expires_at, dirty) VALUES (?, ?, ?, ?, 1) "
+	"ON CONFLICT (key, bucket) DO UPDATE SET count = count + excluded.count, dirty = 1"
+)
+
+
+class SharedSQLiteStorage(Storage, SlidingWindowCounterSupport):
+	STORAGE_SCHEME = ["sharedsqlite"]
+
+	def __init__(self, uri: str = None, wrap_exceptions: bool = False, sync_url: str = None,
+			sync_interval: float = 1.0, node_id: str = None, **options):
+		# Comme SQLAlchemy: sharedsqlite:///relatif.db, sharedsqlite:////absolu.db
+		path = uri.split("://", 1)[1][1:] if uri and "://" in uri else ""
+		self.path = path or DEFAULT_PATH
+		self.sync_url = sync_url or None
+		self.sync_interval = float(sync_interval)
+		self.node_id = node_id or socket.gethostname()
+		self.stats = {"syncs": 0, "sync_errors": 0, "pushed": 0}
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._ops = 0
+		self._sync_pid = None
+		super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+	@property
+	def base_exceptions(self):
+		return sqlite3.Error
+
+	def _conn(self):
+		# Une connexion par thread et par processus (jamais partagée à travers un fork)
+		conn = getattr(self._local, "conn", None)
+		if conn is None or self._local.pid != os.getpid():
+			conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(SCHEMA)
+			self._local.conn = conn
+			self._local.pid = os.getpid()
+			self._ensure_sync_thread()
+		return conn
+
+	def _tick(self, conn, now: float):
+		# Sous verrou: un += entre threads gthread peut perdre des incréments (et sauter la purge)
+		with self._lock:
+			self._ops += 1
+			purge = self._ops % PURGE_EVERY == 0
+		if purge:
+			conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+
+	# Fenêtre fixe
+
+	def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+		now = time.time()
+		conn = self._conn()
+		self._tick(conn, now)
+		return conn.execute(UPSERT_FIXED, (key, FIXED, amount, now + expiry, now, now)).fetchone()[0]
+
+	def get(self, key: str) -> int:
+		row = self._conn().execute(
+			"SELECT count FROM counters WHERE key = ? AND bucket = ? AND expires_at > ?", (key, FIXED, time.time())
+		).fetchone()
+		return row[0] if row else 0
+
+	def get_expiry(self, key: str) -> float:
+		now = time.time()
+		row = self._conn().execute(
+			"SELECT expires_at FROM counters WHERE key = ? AND bucket = ? AND expires_at > ?", (key, FIXED, now)
+		).fetchone()
+		return row[0] if row else now
+
+	# Fenêtre glissante (compteurs de la fenêtre courante et de la précédente)
+
+	def _window(self, conn, key: str, expiry: int, now: float):
+		current = int(now // expiry)
+		counts = dict(conn.execute(
+			"SELECT bucket, count + remote FROM counters WHERE key = ? AND bucket IN (?, ?) AND expires_at > ?",
+			(key, current - 1, current, now),
+		).fetchall())
+		previous_count = counts.get(current - 1, 0)
+		# Même calcul que limits.storage.MemoryStorage
+		previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+		current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+		return previous_count, previous_ttl, counts.get(current, 0), current_ttl
+
+	def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+		if amount > limit:
+			return False
+		now = time.time()
+		conn = self._conn()
+		self._tick(conn, now)
+		# Verrou d'écriture pris avant la lecture: deux workers ne peuvent pas valider le même dernier hit
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			previous_count, previous_ttl, current_count, _ = self._window(conn, key, expiry, now)
+			if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+				conn.execute("COMMIT")
+				return False
+			current = int(now // expiry)
+			conn.execute(UPSERT_SLIDING, (key, current, amount, (current + 2) * expiry))
+			conn.execute("COMMIT")
+			return True
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+
+	def get_sliding_window(self, key: str, expiry: int):
+		return self._window(self._conn(), key, expiry, time.time())
+
+	def clear_sliding_window(self, key: str, expiry: int) -> None:
+		self.clear(key)
+
+	def clear(self, key: str) -> None:
+		self._conn().execute("DELETE FROM counters WHERE key = ?", (key,))
+
+	def reset(self) -> int:
+		return self._conn().execute("DELETE FROM counters").rowcount
+
+	def check(self) -> bool:
+		self._conn().execute("SELECT 1").fetchone()
+		return True
+
+	# Synchronisation entre nœuds
+
+	def _ensure_sync_thread(self):
+		if not self.sync_url or self._sync_pid == os.getpid():
+			return
+		with self._lock:
+			if self._sync_pid != os.getpid():
+				threading.Thread(target=self._sync_loop, name="ratelimit-sync", daemon=True).start()
+				self._sync_pid = os.getpid()
+
+	def _take_lease(self, conn) -> bool:
+		# Un seul worker du nœud synchronise; le bail expire si son processus disparaît
+		now = time.time()
+		owner = str(os.getpid())
+		return conn.execute(
+			"UPDATE sync_lease SET owner = ?, until = ? WHERE id = 1 AND (until < ? OR owner = ?)",
+			(owner, now + 3 * self.sync_interval, now, owner),
+		).rowcount == 1
+
+	def _sync_loop(self):
+		from sqlalchemy import create_engine
+		engine = create_engine(self.sync_url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+		while True:
+			time.sleep(self.sync_interval)
+			try:
+				if self._take_lease(self._conn()):
+					self.sync_once(engine)
+			except Exception:
+				self.stats["sync_errors"] += 1
+				logger.warning("rate limit sync failed", exc_info=True)
+
+	def sync_once(self, engine):
+		"""Publie les compteurs modifiés du nœud et recopie localement ceux des autres nœuds."""
+		from sqlalchemy import delete, func, select
+		from .models import RateLimitCounter
+
+		table = RateLimitCounter.__table__
+		if engine.dialect.name == "postgresql":
+			from sqlalchemy.dialects.postgresql import insert
+		else:
+			from sqlalchemy.dialects.sqlite import insert
+		now = time.time()
+		conn = self._conn()
+		# Valeurs absolues: republier un compteur est idempotent
+		dirty = conn.execute(
+			"UPDATE counters SET dirty = 0 WHERE dirty = 1 AND bucket >= 0 RETURNING key, bucket, count, expires_at"
+		).fetchall()
+		try:
+			with engine.begin() as db_conn:
+				if dirty:
+					stmt = insert(table)
+					db_conn.execute(
+						stmt.on_conflict_do_update(
+							index_elements=[table.c.node, table.c.key, table.c.bucket],
+							set_={"count": stmt.excluded.count, "expires_at": stmt.excluded.expires_at},
+						),
+						[{"node": self.node_id, "key": k, "bucket": b, "count": c, "expires_at": e} for k, b, c, e in dirty],
+					)
+				remote = db_conn.execute(
+					select(table.c.key, table.c.bucket, func.sum(table.c.count), func.max(table.c.expires_at))
+					.where(table.c.node != self.node_id, table.c.expires_at > now)
+					.group_by(table.c.key, table.c.bucket)
+				).all()
+				db_conn.execute(delete(table).where(table.c.expires_at <= now))
+		except Exception:
+			# Republiés au prochain passage
+			conn.executemany(
+				"UPDATE counters SET dirty = 1 WHERE key = ? AND bucket = ?", [(k, b) for k, b, _, _ in dirty]
+			)
+			raise
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			conn.execute("UPDATE counters SET remote = 0 WHERE remote != 0")
+			conn.executemany(
+				"INSERT INTO counters (key, bucket, remote, expires_at) VALUES (?, ?, ?, ?) "
+				"ON CONFLICT (key, bucket) DO UPDATE SET remote = excluded.remote",
+				[(k, b, int(c), e) for k, b, c, e in remote],
+			)
+			conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+		self.stats["syncs"] += 1
+		self.stats["pushed"] += len(dirty)
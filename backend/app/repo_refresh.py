@@ -0,0 +1,191 @@
+"""Rafraîchissement en tâche de fond des dépôts publiés (étoiles, langage, description).
+
+Hors du chemin des requêtes: `flask refresh-repos` tourne comme un processus à
+part (sidecar, CronJob). À chaque tour, les lignes PublicRepo / RepositoryLink
+les moins récemment synchronisées sont mises en file; un pool de threads borné
+fait les appels GitHub (sans toucher à la base), puis les modifications sont
+écrites en une transaction, champ par champ, uniquement si elles diffèrent.
+Les comptes dont le quota GitHub est épuisé sont écartés de la file jusqu'à sa
+réinitialisation, pour ne pas bloquer les autres.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from . import db
+from .github import GitHubClient, GitHubError
+from .models import OAuthAccount, Project, PublicRepo, RepositoryLink
+
+logger = logging.getLogger(__name__)
+
+# Champs PublicRepo alimentés depuis GET /repos/{owner}/{repo}
+REPO_FIELDS = {
+	"html_url": "html_url",
+	"description": "description",
+	"language": "language",
+	"stars": "stargazers_count",
+	"is_private": "private",
+}
+
+
+class RepoRefresher:
+	def __init__(self, max_workers: int = 4, batch_size: int = 50, stale_after: timedelta = timedelta(hours=6)):
+		self.max_workers = max_workers
+		self.batch_size = batch_size
+		self.stale_after = stale_after
+		self.stats = {"fetched": 0, "updated": 0, "unchanged": 0, "failed": 0, "rate_limited": 0, "errors": 0}
+		# user_id -> instant (monotonic) où son quota GitHub est de nouveau disponible
+		self._deferred = {}
+
+	def _deferred_users(self) -> list:
+		now = time.monotonic()
+		self._deferred = {user_id: until for user_id, until in self._deferred.items() if until > now}
+		return list(self._deferred)
+
+	def pick_stale(self) -> list:
+		"""Jobs (kind, id, user_id, repo, jeton) pour les lignes les plus anciennes."""
+		threshold = datetime.utcnow() - self.stale_after
+		deferred = self._deferred_users()
+		never_first = db.case((PublicRepo.last_synced_at.is_(None), 0), else_=1)
+		public_rows = db.session.execute(
+			db.select(PublicRepo.id, PublicRepo.user_id, PublicRepo.repo_full_name, OAuthAccount.access_token)
+			.join(OAuthAccount, (OAuthAccount.user_id == PublicRepo.user_id) & (OAuthAccount.provider == "github"))
+			.where(PublicRepo.provider == "github", PublicRepo.user_id.not_in(deferred))
+			.where((PublicRepo.last_synced_at.is_(None)) | (PublicRepo.last_synced_at < threshold))
+			.order_by(never_first, PublicRepo.last_synced_at)
+			.limit(self.batch_size)
+		).all()
+		jobs = [("public_repo", r.id, r.user_id, r.repo_full_name, r.access_token) for r in public_rows if r.access_token]
+		remaining = self.batch_size - len(jobs)
+		if remaining > 0:
+			never_first = db.case((RepositoryLink.last_synced_at.is_(None), 0), else_=1)
+			link_rows = db.session.execute(
+				db.select(RepositoryLink.id, Project.owner_id, RepositoryLink.repo_full_name, OAuthAccount.access_token)
+				.join(Project, Project.id == RepositoryLink.project_id)
+				.join(OAuthAccount, (OAuthAccount.user_id == Project.owner_id) & (OAuthAccount.provider == "github"))
+				.where(RepositoryLink.provider == "github", Project.owner_id.not_in(deferred))
+				.where((RepositoryLink.last_synced_at.is_(None)) | (RepositoryLink.last_synced_at < threshold))
+				.order_by(never_first, RepositoryLink.last_synced_at)
+				.limit(remaining)
+			).all()
+			jobs += [("repository_link", r.id, r.owner_id, r.repo_full_name, r.access_token) for r in link_rows if r.access_token]
+		return jobs
+
+	def _fetch(self, job):
+		# Exécuté dans le pool: HTTP uniquement, aucune session SQLAlchemy
+		import requests
+		kind, row_id, user_id, full_name, token = job
+		client = GitHubClient(token, account_key=f"user:{user_id}")
+		wait = client.seconds_until_available()
+		if wait > 0:
+			return job, "rate_limited", wait
+		try:
+			return job, "ok", client.get_repo(full_name)
+		except GitHubError as exc:
+			# 404/401/403: dépôt supprimé, renommé ou jeton révoqué; on repassera plus tard
+			return job, f"http_{exc.status_code}", None
+		except requests.RequestException:
+			return job, "error", None
+
+	def refresh_batch(self) -> int:
+		"""Traite un lot; renvoie le nombre de lignes réellement rafraîchies."""
+		jobs = self.pick_stale()
+		if not jobs:
+			return 0
+		with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+			results = list(pool.map(self._fetch, jobs))
+
+		now = datetime.utcnow()
+		current = {
+			r.id: r for r in db.session.execute(
+				db.select(PublicRepo.id, PublicRepo.user_id, *(getattr(PublicRepo, f) for f in REPO_FIELDS))
+				.where(PublicRepo.id.in_([j[1] for j in jobs if j[0] == "public_repo"]))
+			)
+		}
+		repo_rows, link_rows, touched_users = [], [], set()
+		processed = 0
+		for (kind, row_id, user_id, _, _), status, data in results:
+			if status == "rate_limited":
+				# last_synced_at inchangé, mais le compte sort de la file jusqu'à la fin de l'attente
+				self.stats["rate_limited"] += 1
+				self._deferred[user_id] = time.monotonic() + data
+				continue
+			processed += 1
+			if status != "ok":
+				self.stats["failed"] += 1
+			else:
+				self.stats["fetched"] += 1
+			if kind == "repository_link":
+				link_rows.append({"id": row_id, "last_synced_at": now})
+				continue
+			row = {"id": row_id, "last_synced_at": now}
+			existing = current.get(row_id)
+			if status == "ok" and existing is not None:
+				for field, key in REPO_FIELDS.items():
+					value = data.get(key)
+					if field == "stars":
+						value = int(value or 0)
+					elif field == "is_private":
+						value = bool(value)
+					if getattr(existing, field) != value:
+						row[field] = value
+				if len(row) > 2:
+					touched_users.add(existing.user_id)
+					self.stats["updated"] += 1
+				else:
+					self.stats["unchanged"] += 1
+			repo_rows.append(row)
+
+		# Regroupe par ensemble de colonnes pour des UPDATE groupés (executemany)
+		groups = {}
+		for row in repo_rows:
+			groups.setdefault(tuple(sorted(row)), []).append(row)
+		for rows in groups.values():
+			db.session.execute(update(PublicRepo), rows)
+		if link_rows:
+			db.session.execute(update(RepositoryLink), link_rows)
+		db.session.commit()
+
+		from .routes.portfolio import invalidate_public_portfolio
+		for user_id in touched_users:
+			invalidate_public_portfolio(user_id)
+		return processed
+
+	def run_forever(self, interval: float = 300.0):
+		while True:
+			rate_limited = self.stats["rate_limited"]
+			try:
+				processed = self.refresh_batch()
+			except Exception:
+				# Base ou réseau indisponible: on réessaie au tour suivant au lieu de s'arrêter
+				db.session.rollback()
+				self.stats["errors"] += 1
+				logger.exception("repo refresh failed")
+				processed = 0
+			finally:
+				db.session.remove()
+			# File non vide, ou comptes tout juste écartés (d'autres attendent): on enchaîne
+			if processed < self.batch_size and self.stats["rate_limited"] == rate_limited:
+				time.sleep(interval)
+
+
+@click.command("refresh-repos")
+@click.option("--once", is_flag=True, help="Un seul lot puis sortie (CronJob).")
+@click.option("--interval", default=300.0, show_default=True, help="Pause entre deux tours (s).")
+@click.option("--workers", default=4, show_default=True, help="Appels GitHub simultanés.")
+@click.option("--batch-size", default=50, show_default=True)
+@click.option("--stale-hours", default=6.0, show_default=True, help="Âge à partir duquel une ligne est rafraîchie.")
+@with_appcontext
+def refresh_repos_command(once, interval, workers, batch_size, stale_hours):
+	"""Rafraîchit les dépôts publiés depuis l'API GitHub."""
+	refresher = RepoRefresher(max_workers=workers, batch_size=batch_size, stale_after=timedelta(hours=stale_hours))
+	if once:
+		processed = refresher.refresh_batch()
+		click.echo(f"{processed} dépôt(s) traités: {refresher.stats}")
+		return
+	refresher.run_forever(interval)
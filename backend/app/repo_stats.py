@@ -0,0 +1,217 @@
+"""Statistiques des dépôts (langages, étoiles, commits sur 30 jours) pour le portfolio.
+
+Les appels GitHub (dépôt, langages, commits paginés) de tous les dépôts d'un
+lot sont lancés en parallèle dans un pool borné, puis agrégés dans `repo_stats`
+avec une date d'expiration. Le portfolio ne lit que cette table: il n'attend
+jamais GitHub, au pire il affiche des statistiques un peu anciennes.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, update
+
+from . import db
+from .github import GitHubClient, GitHubError
+from .models import OAuthAccount, Project, PublicRepo, RepoStats, RepositoryLink
+
+logger = logging.getLogger(__name__)
+
+COMMITS_WINDOW = timedelta(days=30)
+
+
+def _commits_since() -> str:
+	# Arrondi au jour: l'URL reste stable d'un passage à l'autre, donc les pages
+	# sont revalidées par ETag (304, sans quota) au lieu d'être retéléchargées
+	day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+	return (day - COMMITS_WINDOW).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def count_recent_commits(client: GitHubClient, full_name: str) -> int:
+	try:
+		return len(client.get_all_pages(f"/repos/{full_name}/commits", {"since": _commits_since()}))
+	except GitHubError as exc:
+		if exc.status_code == 409:  # dépôt vide
+			return 0
+		raise
+
+
+def dominant_language(languages: dict):
+	if not languages:
+		return None
+	return max(languages.items(), key=lambda kv: kv[1])[0]
+
+
+class RepoStatsService:
+	def __init__(self, max_workers: int = 8, ttl: timedelta = timedelta(hours=6), batch_size: int = 200):
+		self.max_workers = max_workers
+		self.ttl = ttl
+		self.batch_size = batch_size
+		self.stats = {"refreshed": 0, "failed": 0, "rate_limited": 0, "errors": 0}
+
+	def stale_targets(self, user_id: int = None) -> list:
+		"""(dépôt, jeton, clé de compte) des dépôts sans statistiques ou expirées."""
+		now = datetime.utcnow()
+		stats_join = (RepoStats.provider == "github") & (RepoStats.repo_full_name == PublicRepo.repo_full_name)
+		stale = (RepoStats.id.is_(None)) | (RepoStats.expires_at < now)
+		public_q = (
+			db.select(PublicRepo.repo_full_name, PublicRepo.user_id, OAuthAccount.access_token)
+			.join(OAuthAccount, (OAuthAccount.user_id == PublicRepo.user_id) & (OAuthAccount.provider == "github"))
+			.outerjoin(RepoStats, stats_join)
+			.where(PublicRepo.provider == "github", stale)
+			.order_by(RepoStats.expires_at.is_not(None), RepoStats.expires_at)
+			.limit(self.batch_size)
+		)
+		link_join = (RepoStats.provider == "github") & (RepoStats.repo_full_name == RepositoryLink.repo_full_name)
+		link_q = (
+			db.select(RepositoryLink.repo_full_name, Project.owner_id, OAuthAccount.access_token)
+			.join(Project, Project.id == RepositoryLink.project_id)
+			.join(OAuthAccount, (OAuthAccount.user_id == Project.owner_id) & (OAuthAccount.provider == "github"))
+			.outerjoin(RepoStats, link_join)
+			.where(RepositoryLink.provider == "github", (RepoStats.id.is_(None)) | (RepoStats.expires_at < now))
+			.order_by(RepoStats.expires_at.is_not(None), RepoStats.expires_at)
+			.limit(self.batch_size)
+		)
+		if user_id is not None:
+			public_q = public_q.where(PublicRepo.user_id == user_id)
+			link_q = link_q.where(Project.owner_id == user_id)
+
+		targets = {}
+		for rows in (db.session.execute(public_q), db.session.execute(link_q)):
+			for full_name, owner_id, token in rows:
+				if token and full_name not in targets and len(targets) < self.batch_size:
+					targets[full_name] = (full_name, token, f"user:{owner_id}")
+		return list(targets.values())
+
+	def fetch(self, targets) -> dict:
+		"""{dépôt: stats | GitHubError | None}. Appels HTTP uniquement, sans session SQLAlchemy."""
+		import requests
+		results = {}
+		with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+			pending = {}
+			for full_name, token, account_key in targets:
+				# max_workers=1: la pagination des commits reste dans ce pool (pas de pool par dépôt)
+				client = GitHubClient(token, account_key=account_key, max_workers=1)
+				if client.seconds_until_available() > 0:
+					self.stats["rate_limited"] += 1
+					continue
+				# Les trois appels d'un dépôt partent ensemble, tous dépôts confondus
+				pending[full_name] = (
+					pool.submit(client.get_repo, full_name),
+					pool.submit(client.get, f"/repos/{full_name}/languages"),
+					pool.submit(count_recent_commits, client, full_name),
+				)
+			for full_name, (repo_f, languages_f, commits_f) in pending.items():
+				try:
+					repo = repo_f.result()
+					languages = languages_f.result()[0] or {}
+					commits = commits_f.result()
+				except GitHubError as exc:
+					results[full_name] = exc
+					continue
+				except requests.RequestException:
+					results[full_name] = None
+					continue
+				results[full_name] = {
+					"stars": int(repo.get("stargazers_count") or 0),
+					"dominant_language": dominant_language(languages) or repo.get("language"),
+					"languages": json.dumps(languages, sort_keys=True),
+					"commits_30d": commits,
+				}
+		return results
+
+	def store(self, results: dict) -> set:
+		"""Upsert groupé dans repo_stats; renvoie les utilisateurs dont le portfolio change."""
+		if not results:
+			return set()
+		now = datetime.utcnow()
+		expires_at = now + self.ttl
+		existing = dict(db.session.execute(
+			db.select(RepoStats.repo_full_name, RepoStats.id)
+			.where(RepoStats.provider == "github", RepoStats.repo_full_name.in_(list(results)))
+		).all())
+		inserts, updates, refreshed = [], [], []
+		for full_name, value in results.items():
+			if value is None:
+				# Erreur réseau: on retentera au prochain passage
+				self.stats["failed"] += 1
+				continue
+			if isinstance(value, GitHubError):
+				# Dépôt introuvable / accès refusé: on n'insiste pas avant l'expiration
+				self.stats["failed"] += 1
+				if full_name in existing:
+					updates.append({"id": existing[full_name], "expires_at": expires_at})
+				else:
+					# Ligne vide (fetched_at NULL), non affichée par le portfolio
+					inserts.append({"provider": "github", "repo_full_name": full_name, "expires_at": expires_at})
+				continue
+			self.stats["refreshed"] += 1
+			refreshed.append(full_name)
+			row = {**value, "fetched_at": now, "expires_at": expires_at}
+			if full_name in existing:
+				updates.append({"id": existing[full_name], **row})
+			else:
+				inserts.append({"provider": "github", "repo_full_name": full_name, **row})
+		if inserts:
+			db.session.execute(insert(RepoStats), inserts)
+		groups = {}
+		for row in updates:
+			groups.setdefault(tuple(sorted(row)), []).append(row)
+		for rows in groups.values():
+			db.session.execute(update(RepoStats), rows)
+		db.session.commit()
+		if not refreshed:
+			return set()
+		return set(db.session.scalars(
+			db.select(PublicRepo.user_id).distinct()
+			.where(PublicRepo.provider == "github", PublicRepo.repo_full_name.in_(refreshed))
+		))
+
+	def refresh(self, user_id: int = None) -> int:
+		"""Un lot: dépôts périmés -> GitHub en parallèle -> repo_stats. Renvoie le nombre de dépôts traités."""
+		targets = self.stale_targets(user_id)
+		if not targets:
+			return 0
+		results = self.fetch(targets)
+		users = self.store(results)
+		from .routes.portfolio import invalidate_public_portfolio
+		for uid in users:
+			invalidate_public_portfolio(uid)
+		# Les dépôts mis de côté (quota épuisé) ne comptent pas: la boucle se met en pause
+		return len(results)
+
+	def run_forever(self, interval: float = 300.0):
+		while True:
+			try:
+				processed = self.refresh()
+			except Exception:
+				# Base ou réseau indisponible: on réessaie au tour suivant au lieu de s'arrêter
+				db.session.rollback()
+				self.stats["errors"] += 1
+				logger.exception("repo stats refresh failed")
+				processed = 0
+			finally:
+				db.session.remove()
+			if processed < self.batch_size:
+				time.sleep(interval)
+
+
+@click.command("refresh-repo-stats")
+@click.option("--once", is_flag=True, help="Un seul lot puis sortie (CronJob).")
+@click.option("--user", "user_id", type=int, default=None, help="Limiter aux dépôts d'un utilisateur.")
+@click.option("--interval", default=300.0, show_default=True, help="Pause entre deux tours (s).")
+@click.option("--workers", default=8, show_default=True, help="Appels GitHub simultanés.")
+@click.option("--ttl-hours", default=6.0, show_default=True, help="Durée de validité des statistiques.")
+@with_appcontext
+def refresh_repo_stats_command(once, user_id, interval, workers, ttl_hours):
+	"""Recalcule les statistiques des dépôts (langages, commits sur 30 jours)."""
+	service = RepoStatsService(max_workers=workers, ttl=timedelta(hours=ttl_hours))
+	if once or user_id is not None:
+		processed = service.refresh(user_id)
+		click.echo(f"{processed} dépôt(s) traités: {service.stats}")
+		return
+	service.run_forever(interval)
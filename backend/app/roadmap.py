@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, insert, update
+
+from . import db
+from .models import RoadmapSyncState, Task
+
+
+# Patterns: "- [ ] task title", "- [x] done task"
+# Optional tags: #tag, priority [P1|P2|P3], due: YYYY-MM-DD
+CHECKBOX_RE = re.compile(r"^- \[( |x)\] (.+)$")
+PRIORITY_RE = re.compile(r"\[(P[1-3])\]")
+DUE_RE = re.compile(r"due:\s*(\d{4}-\d{2}-\d{2})")
+TAG_RE = re.compile(r"#(\w+)")
+# Les trois marqueurs en une seule alternance: un seul balayage par ligne
+TOKEN_RE = re.compile(r"\[(P[1-3])\]|due:\s*(\d{4}-\d{2}-\d{2})|#(\w+)")
+PRIORITY_MAP = {"P1": "high", "P2": "medium", "P3": "low"}
+
+
+def _legacy_clean_title(title: str) -> str:
+	clean_title = PRIORITY_RE.sub("", title)
+	clean_title = DUE_RE.sub("", clean_title)
+	return TAG_RE.sub("", clean_title).strip()
+
+
+def _parse_item_line(line: str):
+	stripped = line.strip()
+	if not stripped.startswith("- ["):
+		return None
+	m = CHECKBOX_RE.match(stripped)
+	if not m:
+		return None
+	checked, title = m.groups()
+	priority_code = None
+	due_raw = None
+	tags = []
+	parts = []
+	pos = 0
+	ambiguous = False
+	tag_end = -1
+	for tok in TOKEN_RE.finditer(title):
+		parts.append(title[pos:tok.start()])
+		# Marqueur collé à un tag: sa suppression prolongerait le tag
+		ambiguous = ambiguous or tok.start() == tag_end
+		pos = tok.end()
+		p, due, tag = tok.groups()
+		if p is not None:
+			if priority_code is None:
+				priority_code = p
+		elif due is not None:
+			if due_raw is None:
+				due_raw = due
+		else:
+			tags.append(tag)
+			tag_end = pos
+			# "#...due: 2025-01-01": le tag masque une échéance
+			ambiguous = ambiguous or tag.endswith("due")
+	parts.append(title[pos:])
+	clean_title = "".join(parts).strip()
+	if ambiguous or "#" in clean_title or "due:" in clean_title or "[P" in clean_title:
+		# Marqueurs imbriqués: on rejoue les substitutions successives historiques
+		# pour garder exactement le même résultat
+		priority_match = PRIORITY_RE.search(title)
+		priority_code = priority_match.group(1) if priority_match else None
+		due_match = DUE_RE.search(title)
+		due_raw = due_match.group(1) if due_match else None
+		tags = TAG_RE.findall(title)
+		clean_title = _legacy_clean_title(title)
+	due_date = None
+	if due_raw:
+		try:
+			due_date = datetime.fromisoformat(due_raw)
+		except Exception:
+			pass
+	return {
+		"title": clean_title.strip("- "),
+		"status": "done" if checked == "x" else "todo",
+		"priority": PRIORITY_MAP.get(priority_code, "medium"),
+		"due_date": due_date.isoformat() if due_date else None,
+		"tags": tags,
+	}
+
+
+def iter_roadmap_items(source):
+	"""Itère paresseusement les items d'une roadmap.
+
+	`source` peut être une chaîne, un fichier texte ouvert ou tout itérable de
+	lignes: rien n'est chargé ni accumulé au-delà de la ligne courante.
+	"""
+	lines = source.splitlines() if isinstance(source, str) else source
+	for line in lines:
+		item = _parse_item_line(line)
+		if item is not None:
+			yield item
+
+
+def parse_roadmap_markdown(markdown_text: str):
+	return list(iter_roadmap_items(markdown_text))
+
+
+def _parse_due(value):
+	if not value:
+		return None
+	try:
+		return datetime.fromisoformat(value)
+	except Exception:
+		return None
+
+
+def import_roadmap_items(project_id: int, items, commit: bool = True) -> list:
+	"""Insère les items absents du projet en une seule requête et un seul commit.
+
+	Les titres existants sont chargés une fois; la déduplication (y compris
+	entre items du même lot) se fait en mémoire. Retourne les ids créés dans
+	l'ordre des items. commit=False laisse le commit à l'appelant.
+	"""
+	seen = set(db.session.scalars(db.select(Task.title).where(Task.project_id == project_id)))
+	now = datetime.utcnow()
+	rows = []
+	for item in items:
+		title = item["title"]
+		if title in seen:
+			continue
+		seen.add(title)
+		rows.append({
+			"project_id": project_id,
+			"title": title,
+			"description": None,
+			"status": item["status"],
+			"priority": item["priority"],
+			"due_date": _parse_due(item.get("due_date")),
+			"created_at": now,
+			"updated_at": now,
+		})
+	if not rows:
+		return []
+	try:
+		stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+		created_ids = list(db.session.scalars(stmt, rows))
+		if commit:
+			db.session.commit()
+	except Exception:
+		db.session.rollback()
+		raise
+	return created_ids
+
+
+def _fingerprint(item) -> str:
+	raw = f"{item['status']}|{item['priority']}|{item.get('due_date') or ''}"
+	return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def sync_roadmap_file(project_id: int, path: str) -> dict:
+	"""Synchronise les tâches du projet avec le fichier roadmap, par différence.
+
+	Si le fichier n'a pas bougé (taille + mtime, puis hash) on ne parse rien.
+	Sinon seuls les items dont l'empreinte a changé sont appliqués: insertion,
+	mise à jour statut/priorité/échéance, ou suppression des tâches issues
+	d'une synchro précédente et disparues du fichier.
+	Lève FileNotFoundError si le fichier est absent.
+	"""
+	st = os.stat(path)
+	state = RoadmapSyncState.query.filter_by(project_id=project_id).first()
+	result = {"created": [], "updated": [], "removed": [], "total": 0, "unchanged": False}
+	if state and state.path == path and state.file_mtime_ns == st.st_mtime_ns and state.file_size == st.st_size:
+		result.update(total=state.item_count, unchanged=True)
+		return result
+
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			digest.update(chunk)
+	file_hash = digest.hexdigest()
+	if state and state.path == path and state.file_hash == file_hash:
+		# Contenu identique (touch, checkout...): on met juste à jour la signature
+		state.file_mtime_ns = st.st_mtime_ns
+		state.file_size = st.st_size
+		db.session.commit()
+		result.update(total=state.item_count, unchanged=True)
+		return result
+
+	current = {}
+	item_count = 0
+	with open(path, "r", encoding="utf-8") as f:
+		for item in iter_roadmap_items(f):
+			item_count += 1
+			current.setdefault(item["title"], item)
+	fingerprints = {title: _fingerprint(item) for title, item in current.items()}
+	same_file = state is not None and state.path == path
+	previous = json.loads(state.fingerprints or "{}") if same_file else {}
+	synced_ids = json.loads(state.task_ids or "{}") if same_file else {}
+
+	changed = {title: current[title] for title, fp in fingerprints.items() if previous.get(title) != fp}
+	removed_titles = [title for title in previous if title not in current]
+
+	try:
+		if changed:
+			existing = db.session.execute(
+				db.select(Task.id, Task.title, Task.status, Task.priority, Task.due_date)
+				.where(Task.project_id == project_id, Task.title.in_(list(changed)))
+			).all()
+			updates = []
+			for row in existing:
+				item = changed.pop(row.title, None)
+				if item is None:
+					continue
+				due_date = _parse_due(item.get("due_date"))
+				if (row.status, row.priority, row.due_date) != (item["status"], item["priority"], due_date):
+					updates.append({"id": row.id, "status": item["status"], "priority": item["priority"], "due_date": due_date, "updated_at": datetime.utcnow()})
+			if updates:
+				db.session.execute(update(Task), updates)
+				result["updated"] = [u["id"] for u in updates]
+		# Une tâche créée à la main avec le même titre (dédoublonnée à l'import) n'est pas à la synchro
+		removed_ids = [synced_ids.pop(title) for title in removed_titles if title in synced_ids]
+		if removed_ids:
+			removed = db.session.scalars(
+				delete(Task)
+				.where(Task.project_id == project_id, Task.id.in_(removed_ids))
+				.returning(Task.id)
+			).all()
+			result["removed"] = list(removed)
+
+		if state is None:
+			state = RoadmapSyncState(project_id=project_id)
+			db.session.add(state)
+		state.path = path
+		state.file_hash = file_hash
+		state.file_mtime_ns = st.st_mtime_ns
+		state.file_size = st.st_size
+		state.item_count = item_count
+		state.fingerprints = json.dumps(fingerprints, ensure_ascii=False)
+		# Titres restants absents du projet: un id par item, dans l'ordre; même transaction (commit unique)
+		created = import_roadmap_items(project_id, changed.values(), commit=False)
+		synced_ids.update(zip(changed, created))
+		state.task_ids = json.dumps(synced_ids, ensure_ascii=False)
+		result["created"] = created
+		db.session.commit()
+	except Exception:
+		db.session.rollback()
+		raise
+	result["total"] = item_count
+	return result
@@ -0,0 +1,164 @@
+"""Recherche des fichiers roadmap*.md sous une racine, avec index mis en cache.
+
+Parcours par os.scandir (pas de stat par fichier), limité à MAX_DEPTH et sans
+descendre dans les dossiers ignorés (.git, node_modules, venv...). L'index
+garde, pour chaque dossier visité, son mtime, ses fichiers candidats et ses
+sous-dossiers: un appel suivant ne fait qu'un stat par dossier et ne relit que
+ceux dont le mtime a changé (ajout / suppression / renommage d'une entrée).
+Le contenu des candidats (présence de cases à cocher) est lu dans un pool de
+threads et mémorisé par (mtime, taille) du fichier.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_DEPTH = 4
+MAX_RESULTS = 10
+SNIFF_BYTES = 20000
+NAME_RE = re.compile(r"roadmap.*\.md$", re.IGNORECASE)
+IGNORED_DIRS = frozenset({
+	".git", ".hg", ".svn", "node_modules", "venv", ".venv", "env", "__pycache__",
+	".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".cache",
+	"site-packages", "dist", "build", ".next", ".nuxt", "coverage", ".idea", ".vscode",
+})
+
+
+def ignored_dirs() -> frozenset:
+	extra = os.getenv("ROADMAP_IGNORE_DIRS", "")
+	return IGNORED_DIRS | {d.strip() for d in extra.split(",") if d.strip()}
+
+
+class _Dir:
+	__slots__ = ("mtime_ns", "files", "subdirs")
+
+	def __init__(self, mtime_ns, files, subdirs):
+		self.mtime_ns = mtime_ns
+		self.files = files
+		self.subdirs = subdirs
+
+
+def _scan_dir(path: str, ignored: frozenset):
+	files, subdirs = [], []
+	try:
+		with os.scandir(path) as it:
+			for entry in it:
+				try:
+					if entry.is_dir(follow_symlinks=False):
+						if entry.name not in ignored:
+							subdirs.append(entry.name)
+					elif NAME_RE.search(entry.name.lower()):
+						files.append(entry.name)
+				except OSError:
+					continue
+	except OSError:
+		pass
+	return files, subdirs
+
+
+def _has_checkboxes(path: str) -> bool:
+	try:
+		with open(path, "r", encoding="utf-8", errors="ignore") as f:
+			text = f.read(SNIFF_BYTES)
+	except OSError:
+		return False
+	return "- [ ]" in text or "- [x]" in text
+
+
+class RoadmapIndex:
+	"""Index d'une racine; `candidates()` le revalide puis renvoie les meilleurs chemins."""
+
+	def __init__(self, root: str, max_depth: int = MAX_DEPTH, workers: int = 8):
+		self.root = root
+		self.max_depth = max_depth
+		self.workers = workers
+		self._dirs = {}
+		self._sniffed = {}
+		self._lock = threading.Lock()
+		self.stats = {"scanned_dirs": 0, "reused_dirs": 0, "sniffed_files": 0}
+
+	def _visit(self, path: str, depth: int, ignored, old: dict, new: dict):
+		try:
+			mtime_ns = os.stat(path).st_mtime_ns
+		except OSError:
+			return
+		entry = old.get(path)
+		if entry is not None and entry.mtime_ns == mtime_ns:
+			self.stats["reused_dirs"] += 1
+		else:
+			# mtime lu avant le scan: une modification pendant le parcours sera vue au prochain appel
+			files, subdirs = _scan_dir(path, ignored)
+			entry = _Dir(mtime_ns, files, subdirs)
+			self.stats["scanned_dirs"] += 1
+		new[path] = entry
+		if depth < self.max_depth:
+			for name in entry.subdirs:
+				self._visit(os.path.join(path, name), depth + 1, ignored, old, new)
+
+	def refresh(self):
+		new = {}
+		self._visit(self.root, 0, ignored_dirs(), self._dirs, new)
+		self._dirs = new
+
+	def _sniff_all(self, paths):
+		todo, keys = [], {}
+		for path in paths:
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue
+			key = (st.st_mtime_ns, st.st_size)
+			keys[path] = key
+			cached = self._sniffed.get(path)
+			if cached is None or cached[0] != key:
+				todo.append(path)
+		if todo:
+			with ThreadPoolExecutor(max_workers=min(self.workers, len(todo))) as pool:
+				for path, found in zip(todo, pool.map(_has_checkboxes, todo)):
+					self._sniffed[path] = (keys[path], found)
+			self.stats["sniffed_files"] += len(todo)
+		# Les fichiers disparus sortent du cache de contenu
+		self._sniffed = {p: v for p, v in self._sniffed.items() if p in keys}
+		return {p: self._sniffed[p][1] for p in keys}
+
+	def candidates(self, limit: int = MAX_RESULTS) -> list:
+		with self._lock:
+			self.refresh()
+			found = []
+			for dir_path, entry in self._dirs.items():
+				depth = dir_path[len(self.root):].count(os.sep)
+				for name in entry.files:
+					found.append((os.path.join(dir_path, name), name.lower(), depth))
+			checkboxes = self._sniff_all([path for path, _, _ in found])
+			scored = []
+			for path, lower, depth in found:
+				if path not in checkboxes:
+					continue
+				score = (10 if lower == "roadmap.md" else 0) - depth + (2 if checkboxes[path] else 0)
+				scored.append((score, path))
+			scored.sort(key=lambda t: (-t[0], t[1]))
+			return [path for _, path in scored[:limit]]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_INDEXES = 16
+
+
+def get_index(root: str) -> RoadmapIndex:
+	root = os.path.abspath(root)
+	with _indexes_lock:
+		index = _indexes.get(root)
+		if index is None:
+			index = RoadmapIndex(root)
+			_indexes[root] = index
+			while len(_indexes) > MAX_INDEXES:
+				_indexes.popitem(last=False)
+		else:
+			_indexes.move_to_end(root)
+		return index
+
+
+def find_roadmap_candidates(root: str, limit: int = MAX_RESULTS) -> list:
+	return get_index(root).candidates(limit)
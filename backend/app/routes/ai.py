@@ -1,10 +1,15 @@
+import json
 import os
+import time
 from textwrap import dedent
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required
 
 from .. import limiter
+from ..conditional import conditional
+from ..llm import LLMError, chat_completion, llm_cache, llm_provider, stream_chat_completion
+from ..roadmap import parse_roadmap_markdown
 
 bp = Blueprint("ai", __name__)
 
@@ -12,10 +17,21 @@ bp = Blueprint("ai", __name__)
 SYSTEM_PROMPT_BASE = "Tu es un assistant qui produit des roadmaps strictement formatées et exploitables par une application."
 
 
+def template_path() -> str:
+	return os.getenv("TEMPLATE_PATH", os.path.join(os.path.dirname(__file__), "../../docs/ROADMAP_TEMPLATE.md"))
+
+
+def _template_watermark():
+	try:
+		st = os.stat(template_path())
+	except OSError:
+		return None
+	return st.st_mtime_ns, st.st_size
+
+
 def read_template() -> str:
-	template_path = os.getenv("TEMPLATE_PATH", os.path.join(os.path.dirname(__file__), "../../docs/ROADMAP_TEMPLATE.md"))
 	try:
-		with open(template_path, "r", encoding="utf-8") as f:
+		with open(template_path(), "r", encoding="utf-8") as f:
 			return f.read()
 	except Exception:
 		return ""
@@ -57,58 +73,155 @@ def build_prompt_reformat(raw_text: str, template: str) -> str:
 	)
 
 
-@bp.post("/ai/generate-roadmap")
-@jwt_required()
-@limiter.limit("10/minute")
-def generate_roadmap():
+def roadmap_messages(prompt: str) -> list:
+	return [
+		{"role": "system", "content": SYSTEM_PROMPT_BASE},
+		{"role": "user", "content": prompt},
+	]
+
+
+def _fallback_roadmap(mode: str, raw_text: str) -> str:
+	if mode == "skeleton":
+		return "\n".join([
+			"- [ ] [P1] Définir le scope du projet due: 2025-09-01 #planning",
+			"- [ ] [P1] Créer le backlog initial #tasks",
+			"- [ ] [P2] Mettre en place CI/CD #devops",
+			"- [ ] [P3] Rédiger README et documentation #docs",
+		])
+	lines = [ln for ln in raw_text.splitlines() if ln.strip().startswith("- [")]
+	return "\n".join(lines[:40])
+
+
+def _roadmap_request():
+	"""(erreur, prompt, fallback) à partir du corps JSON; fallback si pas de clé OpenAI."""
 	data = request.get_json() or {}
 	mode = (data.get("mode") or "skeleton").strip()
 	idea = (data.get("idea") or "").strip()
 	raw_text = (data.get("raw") or "").strip()
-	template = read_template()
 	if mode == "skeleton" and not idea:
-		return jsonify({"error": "idea is required for skeleton mode"}), 400
+		return (jsonify({"error": "idea is required for skeleton mode"}), 400), None, None
 	if mode == "reformat" and not raw_text:
-		return jsonify({"error": "raw is required for reformat mode"}), 400
-
-	api_key = os.getenv("OPENAI_API_KEY")
-	if not api_key:
-		if mode == "skeleton":
-			fallback = "\n".join([
-				"- [ ] [P1] Définir le scope du projet due: 2025-09-01 #planning",
-				"- [ ] [P1] Créer le backlog initial #tasks",
-				"- [ ] [P2] Mettre en place CI/CD #devops",
-				"- [ ] [P3] Rédiger README et documentation #docs",
-			])
-		else:
-			lines = [ln for ln in raw_text.splitlines() if ln.strip().startswith("- [")]
-			fallback = "\n".join(lines[:40])
-		return jsonify({"roadmap": fallback, "provider": "fallback"})
+		return (jsonify({"error": "raw is required for reformat mode"}), 400), None, None
+	if not llm_provider.enabled:
+		return None, None, _fallback_roadmap(mode, raw_text)
+	template = read_template()
+	if mode == "reformat":
+		return None, build_prompt_reformat(raw_text, template), None
+	return None, build_prompt_skeleton(idea, template), None
+
 
+@bp.post("/ai/generate-roadmap")
+@jwt_required()
+@limiter.limit("10/minute")
+def generate_roadmap():
+	error, prompt, fallback = _roadmap_request()
+	if error is not None:
+		return error
+	if prompt is None:
+		return jsonify({"roadmap": fallback, "provider": "fallback"})
 	try:
-		from openai import OpenAI
-		client = OpenAI(api_key=api_key)
-		if mode == "reformat":
-			prompt = build_prompt_reformat(raw_text, template)
-		else:
-			prompt = build_prompt_skeleton(idea, template)
-		resp = client.chat.completions.create(
-			model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-			messages=[
-				{"role": "system", "content": SYSTEM_PROMPT_BASE},
-				{"role": "user", "content": prompt},
-			],
-			temperature=0.2,
-		)
-		content = resp.choices[0].message.content or ""
-		return jsonify({"roadmap": content, "provider": "openai"})
+		# Entrées identiques (mode, texte, template, modèle, température) -> réponse en cache
+		content, cached = chat_completion(roadmap_messages(prompt))
+		return jsonify({"roadmap": content, "provider": llm_provider.backend_name, "cached": cached})
+	except LLMError as e:
+		return _llm_error_response(e)
 	except Exception as e:
 		return jsonify({"error": str(e)}), 500
 
 
+def _llm_error_response(error):
+	response = jsonify({"error": str(error)})
+	response.status_code = error.status_code
+	if error.retry_after:
+		response.headers["Retry-After"] = str(error.retry_after)
+	return response
+
+
+def _sse(event: str, data) -> str:
+	return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@bp.post("/ai/generate-roadmap/stream")
+@jwt_required()
+@limiter.limit("10/minute")
+def generate_roadmap_stream():
+	"""Même entrée que /ai/generate-roadmap, réponse en Server-Sent Events.
+
+	Événements: `token` ({delta}) au fil de la génération, `item` (item parsé,
+	dès qu'une ligne de liste est complète), puis `done` (texte complet et
+	temps jusqu'au premier item) ou `error`.
+	"""
+	error, prompt, fallback = _roadmap_request()
+	if error is not None:
+		return error
+	if prompt is None:
+		deltas, provider, cached = iter([fallback]), "fallback", False
+	else:
+		try:
+			# Saturation / erreur amont détectées ici: réponse JSON classique avant tout flux
+			deltas, cached = stream_chat_completion(roadmap_messages(prompt))
+		except LLMError as e:
+			return _llm_error_response(e)
+		except Exception as e:
+			return jsonify({"error": str(e)}), 500
+		provider = llm_provider.backend_name
+
+	def events():
+		started = time.perf_counter()
+		first_item_ms = None
+		parts, pending, count = [], "", 0
+		try:
+			for delta in deltas:
+				parts.append(delta)
+				yield _sse("token", {"delta": delta})
+				pending += delta
+				if "\n" not in delta:
+					continue
+				*lines, pending = pending.split("\n")
+				for item in parse_roadmap_markdown("\n".join(lines)):
+					if first_item_ms is None:
+						first_item_ms = round((time.perf_counter() - started) * 1000, 1)
+					count += 1
+					yield _sse("item", item)
+			for item in parse_roadmap_markdown(pending):
+				if first_item_ms is None:
+					first_item_ms = round((time.perf_counter() - started) * 1000, 1)
+				count += 1
+				yield _sse("item", item)
+		except Exception as e:
+			yield _sse("error", {"error": str(e)})
+			return
+		total_ms = round((time.perf_counter() - started) * 1000, 1)
+		current_app.logger.info(
+			"roadmap stream: %d items, premier item %s ms, total %s ms (provider=%s, cached=%s)",
+			count, first_item_ms, total_ms, provider, cached,
+		)
+		yield _sse("done", {
+			"roadmap": "".join(parts),
+			"provider": provider,
+			"cached": cached,
+			"items": count,
+			"time_to_first_item_ms": first_item_ms,
+			"total_ms": total_ms,
+		})
+
+	response = current_app.response_class(stream_with_context(events()), mimetype="text/event-stream")
+	response.headers["Cache-Control"] = "no-cache"
+	# Pas de mise en tampon côté nginx / ingress: les événements partent tout de suite
+	response.headers["X-Accel-Buffering"] = "no"
+	return response
+
+
+@bp.get("/ai/cache-stats")
+@jwt_required()
+def cache_stats():
+	return jsonify({**llm_cache.stats, "provider": llm_provider.stats})
+
+
 @bp.get("/ai/template")
 @jwt_required()
 @limiter.limit("30/minute")
+@conditional(_template_watermark, cache_control="private, max-age=300")
 def get_template():
 	return jsonify({"template": read_template()})
 
@@ -1,21 +1,23 @@
 import os
 import secrets
+import threading
 from datetime import timedelta
 
-from flask import Blueprint, jsonify, request, redirect
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
-from authlib.integrations.flask_client import OAuth
+from flask import Blueprint, current_app, jsonify, request, redirect
+from flask_jwt_extended import create_access_token, jwt_required
 
 from .. import db, limiter
+from ..identity import current_user
+from ..passwords import PasswordHasherBusy, password_hasher
 from ..models import User, OAuthAccount
 
 bp = Blueprint("auth", __name__)
-oauth = OAuth()
+_oauth_lock = threading.Lock()
 
 
 def init_oauth(app):
-	oauth.init_app(app)
+	from authlib.integrations.flask_client import OAuth
+	oauth = OAuth(app)
 	oauth.register(
 		"github",
 		client_id=os.getenv("GITHUB_CLIENT_ID", ""),
@@ -34,6 +36,24 @@ def init_oauth(app):
 		api_base_url="https://gitlab.com/api/v4/",
 		client_kwargs={"scope": "read_user read_api"},
 	)
+	return oauth
+
+
+def _oauth_client(provider: str):
+	# Authlib (et requests) ne sont chargés qu'au premier login OAuth, pas au boot des workers
+	app = current_app._get_current_object()
+	oauth = app.extensions.get("authlib.integrations.flask_client")
+	if oauth is None:
+		with _oauth_lock:
+			oauth = app.extensions.get("authlib.integrations.flask_client") or init_oauth(app)
+	return oauth.create_client(provider)
+
+
+def _busy_response(error):
+	response = jsonify({"error": str(error)})
+	response.status_code = error.status_code
+	response.headers["Retry-After"] = str(error.retry_after)
+	return response
 
 
 @bp.post("/auth/register")
@@ -47,7 +67,10 @@ def register():
 		return jsonify({"error": "email and password required"}), 400
 	if User.query.filter_by(email=email).first():
 		return jsonify({"error": "email already used"}), 400
-	password_hash = generate_password_hash(password)
+	try:
+		password_hash = password_hasher.hash(password)
+	except PasswordHasherBusy as e:
+		return _busy_response(e)
 	user = User(email=email, password_hash=password_hash, username=username)
 	db.session.add(user)
 	db.session.commit()
@@ -61,8 +84,18 @@ def login():
 	email = (data.get("email") or "").strip().lower()
 	password = data.get("password") or ""
 	user = User.query.filter_by(email=email).first()
-	if not user or not user.password_hash or not check_password_hash(user.password_hash, password):
+	if not user or not user.password_hash:
+		return jsonify({"error": "invalid credentials"}), 401
+	try:
+		valid, new_hash = password_hasher.verify_and_update(user.password_hash, password)
+	except PasswordHasherBusy as e:
+		return _busy_response(e)
+	if not valid:
 		return jsonify({"error": "invalid credentials"}), 401
+	if new_hash:
+		# Paramètres de hachage modifiés depuis: on profite du mot de passe en clair pour migrer
+		user.password_hash = new_hash
+		db.session.commit()
 	access_token = create_access_token(identity=str(user.id), expires_delta=timedelta(hours=12))
 	return jsonify({"access_token": access_token, "token_type": "Bearer"})
 
@@ -70,8 +103,7 @@ def login():
 @bp.get("/auth/me")
 @jwt_required()
 def me():
-	user_id = int(get_jwt_identity())
-	user = User.query.get_or_404(user_id)
+	user = current_user
 	return jsonify({
 		"id": user.id,
 		"email": user.email,
@@ -86,7 +118,7 @@ def me():
 @limiter.limit("10/minute")
 def oauth_authorize(provider: str):
 	redirect_uri = os.getenv("OAUTH_REDIRECT_URI", "http://localhost:5173/oauth/callback")
-	client = oauth.create_client(provider)
+	client = _oauth_client(provider)
 	if client is None:
 		return jsonify({"error": "provider not configured"}), 400
 	# Encode le provider dans le redirect_uri pour le récupérer au callback
@@ -98,7 +130,7 @@ def oauth_authorize(provider: str):
 @limiter.limit("30/minute")
 def oauth_callback():
 	provider = request.args.get("provider") or "github"
-	client = oauth.create_client(provider)
+	client = _oauth_client(provider)
 	if client is None:
 		return jsonify({"error": "provider not configured"}), 400
 	token = client.authorize_access_token()
@@ -1,4 +1,7 @@
 from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+
+from ..db_engine import pool_stats
 
 bp = Blueprint("health", __name__)
 
@@ -7,3 +10,8 @@ bp = Blueprint("health", __name__)
 def healthcheck():
 	return jsonify({"status": "ok"})
 
+
+@bp.get("/db/pool-stats")
+@jwt_required()
+def db_pool_stats():
+	return jsonify(pool_stats())
@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from .. import db
+from ..jobs import job_to_dict
+from ..models import Job
+
+bp = Blueprint("jobs", __name__)
+
+
+@bp.get("/jobs/<int:job_id>")
+@jwt_required()
+def get_job(job_id: int):
+	job = db.session.get(Job, job_id)
+	# Un job n'est visible que par l'utilisateur qui l'a lancé
+	if job is None or (job.user_id is not None and job.user_id != int(get_jwt_identity())):
+		return jsonify({"error": "job not found"}), 404
+	return jsonify(job_to_dict(job))
@@ -1,14 +1,40 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from sqlalchemy import update
 
 from .. import db
-from ..models import KanbanBoard, KanbanColumn, Project
+from ..conditional import conditional
+from ..models import KanbanBoard, KanbanColumn, Project, Task
+from .tasks import TASK_LIST_COLUMNS, task_row_to_dict
 
 bp = Blueprint("kanban", __name__)
 
 
+def _board_columns_watermark():
+	project_id = request.args.get("project_id", type=int)
+	if not project_id:
+		return None
+	return tuple(db.session.execute(
+		db.select(db.func.count(KanbanColumn.id), db.func.max(KanbanColumn.updated_at))
+		.join(KanbanBoard, KanbanBoard.id == KanbanColumn.board_id)
+		.where(KanbanBoard.project_id == project_id)
+	).one())
+
+
+def _board_snapshot_watermark():
+	columns = _board_columns_watermark()
+	if columns is None:
+		return None
+	project_id = request.args.get("project_id", type=int)
+	tasks = db.session.execute(
+		db.select(db.func.count(Task.id), db.func.max(Task.updated_at)).where(Task.project_id == project_id)
+	).one()
+	return (*columns, *tasks)
+
+
 @bp.get("/kanban/board")
 @jwt_required()
+@conditional(_board_columns_watermark)
 def get_board():
 	project_id = request.args.get("project_id", type=int)
 	if not project_id:
@@ -25,6 +51,58 @@ def get_board():
 	})
 
 
+def _wip_status(count: int, wip_limit):
+	if wip_limit is None:
+		return None
+	if count > wip_limit:
+		return "over_limit"
+	return "at_limit" if count == wip_limit else "ok"
+
+
+@bp.get("/kanban/board/snapshot")
+@jwt_required()
+@conditional(_board_snapshot_watermark)
+def get_board_snapshot():
+	# Board complet en une requête HTTP et 3 requêtes SQL (board, colonnes, tâches),
+	# quel que soit le nombre de colonnes
+	project_id = request.args.get("project_id", type=int)
+	if not project_id:
+		return jsonify({"error": "project_id is required"}), 400
+	board_id = db.session.scalar(db.select(KanbanBoard.id).where(KanbanBoard.project_id == project_id))
+	if board_id is None:
+		return jsonify({"columns": [], "unassigned": []})
+	columns = db.session.execute(
+		db.select(KanbanColumn.id, KanbanColumn.name, KanbanColumn.order_index, KanbanColumn.wip_limit)
+		.where(KanbanColumn.board_id == board_id)
+		.order_by(KanbanColumn.order_index, KanbanColumn.id)
+	).all()
+	tasks = db.session.execute(
+		db.select(*TASK_LIST_COLUMNS)
+		.where(Task.project_id == project_id)
+		.order_by(Task.rank.is_(None), Task.rank, Task.created_at.desc(), Task.id.desc())
+	).all()
+	by_column = {c.id: [] for c in columns}
+	unassigned = []
+	for t in tasks:
+		by_column.get(t.kanban_column_id, unassigned).append(task_row_to_dict(t))
+	return jsonify({
+		"board_id": board_id,
+		"columns": [
+			{
+				"id": c.id,
+				"name": c.name,
+				"order_index": c.order_index,
+				"wip_limit": c.wip_limit,
+				"count": len(by_column[c.id]),
+				"wip_status": _wip_status(len(by_column[c.id]), c.wip_limit),
+				"tasks": by_column[c.id],
+			}
+			for c in columns
+		],
+		"unassigned": unassigned,
+	})
+
+
 @bp.post("/kanban/columns")
 @jwt_required()
 def add_column():
@@ -38,7 +116,10 @@ def add_column():
 		board = KanbanBoard(project_id=int(project_id))
 		db.session.add(board)
 		db.session.flush()
-	order_index = len(board.columns or [])
+	# Prochain index sans charger toutes les colonnes du board
+	order_index = db.session.scalar(
+		db.select(db.func.coalesce(db.func.max(KanbanColumn.order_index) + 1, 0)).where(KanbanColumn.board_id == board.id)
+	)
 	col = KanbanColumn(board_id=board.id, name=name, order_index=order_index)
 	db.session.add(col)
 	db.session.commit()
@@ -60,6 +141,73 @@ def update_column(column_id: int):
 	return jsonify({"status": "updated"})
 
 
+@bp.put("/kanban/columns")
+@jwt_required()
+def batch_update_columns():
+	# Body: {project_id, order: [column_id, ...]} (ordre complet) et/ou
+	# {project_id, columns: [{id, name?, order_index?, wip_limit?}, ...]}.
+	# Une transaction, un UPDATE groupé, renvoie l'état du board.
+	data = request.get_json() or {}
+	project_id = data.get("project_id")
+	order = data.get("order")
+	patches = data.get("columns") or []
+	if not project_id or (order is None and not patches):
+		return jsonify({"error": "project_id and order or columns required"}), 400
+	if not isinstance(patches, list) or (order is not None and not isinstance(order, list)):
+		return jsonify({"error": "order and columns must be lists"}), 400
+	# Verrou sur le board: deux glisser-déposer concurrents s'appliquent l'un après l'autre
+	board = db.session.scalars(
+		db.select(KanbanBoard).where(KanbanBoard.project_id == int(project_id)).with_for_update()
+	).first()
+	if not board:
+		return jsonify({"error": "board not found"}), 404
+	board_id = board.id
+	current = {
+		c.id: {"id": c.id, "name": c.name, "order_index": c.order_index, "wip_limit": c.wip_limit}
+		for c in db.session.execute(
+			db.select(KanbanColumn.id, KanbanColumn.name, KanbanColumn.order_index, KanbanColumn.wip_limit)
+			.where(KanbanColumn.board_id == board_id)
+		)
+	}
+
+	changes = {}
+	try:
+		if order is not None:
+			order = [int(cid) for cid in order]
+			if len(order) != len(current) or set(order) != set(current):
+				return jsonify({"error": "order must list every column of the board exactly once"}), 400
+			for idx, cid in enumerate(order):
+				changes.setdefault(cid, {})["order_index"] = idx
+		for patch in patches:
+			cid = int(patch["id"])
+			if cid not in current:
+				return jsonify({"error": f"column {cid} does not belong to this board"}), 400
+			change = changes.setdefault(cid, {})
+			if "name" in patch and str(patch["name"] or "").strip():
+				change["name"] = str(patch["name"])
+			if "order_index" in patch and order is None:
+				change["order_index"] = int(patch["order_index"])
+			if "wip_limit" in patch:
+				change["wip_limit"] = int(patch["wip_limit"]) if patch["wip_limit"] is not None else None
+	except (KeyError, TypeError, ValueError):
+		return jsonify({"error": "invalid column patch"}), 400
+
+	# Lignes complètes => un seul UPDATE (executemany) pour toutes les colonnes modifiées
+	rows = []
+	for cid, change in changes.items():
+		merged = {**current[cid], **change}
+		if merged != current[cid]:
+			current[cid] = merged
+			rows.append(dict(merged))
+	if rows:
+		db.session.execute(update(KanbanColumn), rows)
+	db.session.commit()
+	return jsonify({
+		"board_id": board_id,
+		"columns": sorted(current.values(), key=lambda c: (c["order_index"], c["id"])),
+	})
+
+
 @bp.delete("/kanban/columns/<int:column_id>")
 @jwt_required()
 def delete_column(column_id: int):
@@ -0,0 +1,19 @@
+import hmac
+import os
+
+from flask import Blueprint, Response, abort, request
+
+from ..metrics import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def prometheus_metrics():
+	if not metrics.enabled:
+		abort(404)
+	# Scrape interne au cluster; METRICS_TOKEN (Bearer) si le port est exposé
+	token = os.getenv("METRICS_TOKEN")
+	if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+		return Response("unauthorized\n", status=401, mimetype="text/plain")
+	return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -1,23 +1,55 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from .. import db
-from ..models import User, Project, PublicProject, PortfolioSettings, OAuthAccount, PublicRepo
-import requests
+from ..cache import portfolio_cache
+from ..conditional import conditional, make_etag, not_modified
+from ..github import GitHubClient, GitHubError
+from ..identity import current_user
+from ..models import User, Project, PublicProject, PortfolioSettings, OAuthAccount, PublicRepo, RepoStats
+import json
 from datetime import datetime
 
 bp = Blueprint("portfolio", __name__)
 
+# Page publique partageable: courte mise en cache navigateur/CDN, revalidation par ETag
+PUBLIC_CACHE_CONTROL = "public, max-age=30"
 
-@bp.get("/portfolio/<username>")
-def public_portfolio(username: str):
-	user = User.query.filter_by(username=username).first_or_404()
+
+def invalidate_public_portfolio(user_id: int):
+	# À appeler après commit: la prochaine lecture reconstruit la page publique
+	username = db.session.scalar(db.select(User.username).where(User.id == user_id))
+	if username:
+		portfolio_cache.invalidate(username)
+
+
+def _repo_stats_dict(stats):
+	if stats is None or stats.fetched_at is None:
+		return None
+	return {
+		"stars": stats.stars,
+		"dominant_language": stats.dominant_language,
+		"languages": json.loads(stats.languages) if stats.languages else {},
+		"commits_30d": stats.commits_30d,
+		"updated_at": stats.fetched_at.isoformat(),
+	}
+
+
+def _render_public_portfolio(username: str):
+	user = User.query.filter_by(username=username).first()
+	if user is None:
+		return None
 	settings = PortfolioSettings.query.filter_by(user_id=user.id).first()
 	public_links = PublicProject.query.filter_by(user_id=user.id).all()
 	project_ids = [pl.project_id for pl in public_links]
 	projects = Project.query.filter(Project.id.in_(project_ids)).all() if project_ids else []
-	repos = PublicRepo.query.filter_by(user_id=user.id, provider="github").all()
-	return jsonify({
+	# Statistiques lues depuis repo_stats (remplie en tâche de fond): jamais d'appel GitHub ici
+	repos = db.session.execute(
+		db.select(PublicRepo, RepoStats)
+		.outerjoin(RepoStats, (RepoStats.provider == PublicRepo.provider) & (RepoStats.repo_full_name == PublicRepo.repo_full_name))
+		.where(PublicRepo.user_id == user.id, PublicRepo.provider == "github")
+	).all()
+	body = current_app.json.dumps({
 		"user": {
 			"username": user.username,
 			"name": user.name,
@@ -42,20 +74,59 @@ def public_portfolio(username: str):
 				"description": r.description,
 				"language": r.language,
 				"stars": r.stars,
+				"stats": _repo_stats_dict(stats),
 			}
-			for r in repos
+			for r, stats in repos
 		]
 	})
+	# ETag calculé une fois par reconstruction et stocké avec le corps
+	return f"{make_etag(body)}\n{body}"
+
+
+@bp.get("/portfolio/<username>")
+def public_portfolio(username: str):
+	# Réponse rendue mise en cache par username; un pic de trafic ne déclenche
+	# qu'une reconstruction (single-flight)
+	cached = portfolio_cache.get_or_build(username, lambda: _render_public_portfolio(username))
+	if cached is None:
+		abort(404)
+	etag, body = cached.split("\n", 1)
+	if request.if_none_match.contains_weak(etag):
+		return not_modified(etag, PUBLIC_CACHE_CONTROL)
+	response = current_app.response_class(body + "\n", mimetype="application/json")
+	response.set_etag(etag, weak=True)
+	response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+	return response
+
+
+def _my_portfolio_watermark():
+	user_id = int(get_jwt_identity())
+	return tuple(db.session.execute(db.select(
+		db.select(User.updated_at).where(User.id == user_id).scalar_subquery(),
+		db.select(PortfolioSettings.updated_at).where(PortfolioSettings.user_id == user_id).scalar_subquery(),
+		db.select(db.func.count(PublicProject.id)).where(PublicProject.user_id == user_id).scalar_subquery(),
+		db.select(db.func.max(PublicProject.updated_at)).where(PublicProject.user_id == user_id).scalar_subquery(),
+		db.select(db.func.count(PublicRepo.id)).where(PublicRepo.user_id == user_id).scalar_subquery(),
+		db.select(db.func.max(PublicRepo.updated_at)).where(PublicRepo.user_id == user_id).scalar_subquery(),
+		db.select(db.func.max(RepoStats.updated_at))
+		.join(PublicRepo, (PublicRepo.provider == RepoStats.provider) & (PublicRepo.repo_full_name == RepoStats.repo_full_name))
+		.where(PublicRepo.user_id == user_id).scalar_subquery(),
+	)).one()) + (user_id,)
 
 
 @bp.get("/portfolio/me")
 @jwt_required()
+@conditional(_my_portfolio_watermark)
 def get_my_portfolio():
-	user_id = int(get_jwt_identity())
-	user = User.query.get_or_404(user_id)
+	user = current_user
+	user_id = user.id
 	settings = PortfolioSettings.query.filter_by(user_id=user_id).first()
 	links = PublicProject.query.filter_by(user_id=user_id).all()
-	repos = PublicRepo.query.filter_by(user_id=user_id).all()
+	repos = db.session.execute(
+		db.select(PublicRepo, RepoStats)
+		.outerjoin(RepoStats, (RepoStats.provider == PublicRepo.provider) & (RepoStats.repo_full_name == PublicRepo.repo_full_name))
+		.where(PublicRepo.user_id == user_id)
+	).all()
 	return jsonify({
 		"user": {"email": user.email, "username": user.username, "name": user.name, "bio": user.bio, "avatar_url": user.avatar_url},
 		"settings": {
@@ -73,8 +144,9 @@ def get_my_portfolio():
 				"description": r.description,
 				"language": r.language,
 				"stars": r.stars,
+				"stats": _repo_stats_dict(stats),
 			}
-			for r in repos
+			for r, stats in repos
 		]
 	})
 
@@ -95,6 +167,7 @@ def update_my_portfolio():
 		settings.skills = ",".join([str(s).strip() for s in skills if str(s).strip()])
 	settings.website_url = data.get("website_url")
 	db.session.commit()
+	invalidate_public_portfolio(user_id)
 	return jsonify({"status": "updated"})
 
 
@@ -120,6 +193,7 @@ def set_public_projects():
 		except Exception:
 			continue
 	db.session.commit()
+	invalidate_public_portfolio(user_id)
 	return jsonify({"status": "updated", "count": len(ids)})
 
 
@@ -130,9 +204,11 @@ def list_my_github_repos():
 	acct = OAuthAccount.query.filter_by(user_id=user_id, provider="github").first()
 	if not acct or not acct.access_token:
 		return jsonify({"error": "github account not linked"}), 400
-	headers = {"Authorization": f"token {acct.access_token}", "Accept": "application/vnd.github+json"}
-	resp = requests.get("https://api.github.com/user/repos?per_page=100", headers=headers, timeout=15)
-	if resp.status_code != 200:
+	import requests
+	client = GitHubClient(acct.access_token, account_key=f"user:{user_id}")
+	try:
+		github_repos = client.list_user_repos()
+	except (GitHubError, requests.RequestException):
 		return jsonify({"error": "failed to fetch repos"}), 502
 	repos = [
 		{
@@ -143,7 +219,7 @@ def list_my_github_repos():
 			"stargazers_count": r.get("stargazers_count"),
 			"private": r.get("private"),
 		}
-		for r in resp.json()
+		for r in github_repos
 	]
 	return jsonify(repos)
 
@@ -156,24 +232,41 @@ def set_public_github_repos():
 	repos = data.get("repos") or []  # list of {full_name, html_url, description, language, stars, private}
 	if not isinstance(repos, list):
 		return jsonify({"error": "repos must be a list"}), 400
-	# Clear existing github repos
-	PublicRepo.query.filter_by(user_id=user_id, provider="github").delete()
+	# Diff avec l'existant: on ne réécrit que ce qui change (les lignes conservées
+	# gardent leur id et leur last_synced_at, utilisé par le rafraîchissement de fond)
+	existing = {r.repo_full_name: r for r in PublicRepo.query.filter_by(user_id=user_id, provider="github")}
+	seen = set()
+	now = datetime.utcnow()
 	for r in repos:
 		try:
-			row = PublicRepo(
-				user_id=user_id,
-				provider="github",
-				repo_full_name=str(r.get("full_name")),
-				html_url=r.get("html_url"),
-				description=r.get("description"),
-				language=r.get("language"),
-				stars=int(r.get("stargazers_count") or 0),
-				is_private=bool(r.get("private")),
-				last_synced_at=datetime.utcnow(),
-			)
-			db.session.add(row)
+			full_name = str(r.get("full_name"))
+			values = {
+				"html_url": r.get("html_url"),
+				"description": r.get("description"),
+				"language": r.get("language"),
+				"stars": int(r.get("stargazers_count") or 0),
+				"is_private": bool(r.get("private")),
+			}
 		except Exception:
 			continue
+		if full_name in seen:
+			continue
+		seen.add(full_name)
+		row = existing.get(full_name)
+		if row is None:
+			db.session.add(PublicRepo(user_id=user_id, provider="github", repo_full_name=full_name, last_synced_at=now, **values))
+			continue
+		changed = False
+		for field, value in values.items():
+			if getattr(row, field) != value:
+				setattr(row, field, value)
+				changed = True
+		if changed:
+			row.last_synced_at = now
+	removed = [row.id for name, row in existing.items() if name not in seen]
+	if removed:
+		PublicRepo.query.filter(PublicRepo.id.in_(removed)).delete(synchronize_session=False)
 	db.session.commit()
+	invalidate_public_portfolio(user_id)
 	return jsonify({"status": "updated", "count": len(repos)})
 
@@ -1,29 +1,59 @@
 import os
-import re
 from flask import Blueprint, jsonify, request, abort
+from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from .. import db
+from ..conditional import conditional
 from ..models import Project, KanbanBoard, KanbanColumn
+from ..pagination import keyset_page, page_args
+from ..roadmap_discovery import find_roadmap_candidates
+from .portfolio import invalidate_public_portfolio
 
 bp = Blueprint("projects", __name__)
 
 
+PROJECT_LIST_COLUMNS = (
+	Project.id, Project.title, Project.description, Project.status, Project.progress_percent,
+	Project.priority, Project.owner_id, Project.roadmap_path, Project.created_at,
+)
+
+
+def _project_row_to_dict(p):
+	return {
+		"id": p.id,
+		"title": p.title,
+		"description": p.description,
+		"status": p.status,
+		"progress_percent": p.progress_percent,
+		"priority": p.priority,
+		"owner_id": p.owner_id,
+		"roadmap_path": p.roadmap_path,
+	}
+
+
+def _projects_watermark():
+	stmt = db.select(db.func.count(Project.id), db.func.max(Project.updated_at)).where(
+		Project.owner_id == int(get_jwt_identity())
+	)
+	return tuple(db.session.execute(stmt).one())
+
+
+def _project_watermark(project_id: int):
+	return db.session.scalar(db.select(Project.updated_at).where(Project.id == project_id))
+
+
 @bp.get("/projects")
+@jwt_required()
+@conditional(_projects_watermark)
 def list_projects():
-	projects = Project.query.order_by(Project.created_at.desc()).all()
-	return jsonify([
-		{
-			"id": p.id,
-			"title": p.title,
-			"description": p.description,
-			"status": p.status,
-			"progress_percent": p.progress_percent,
-			"priority": p.priority,
-			"owner_id": p.owner_id,
-			"roadmap_path": p.roadmap_path,
-		}
-		for p in projects
-	])
+	"""Projets de l'utilisateur connecté, toujours paginés par curseur (created_at, id)."""
+	stmt = db.select(*PROJECT_LIST_COLUMNS).where(Project.owner_id == int(get_jwt_identity()))
+	try:
+		limit, after = page_args()
+	except ValueError:
+		return jsonify({"error": "invalid cursor"}), 400
+	projects, next_cursor = keyset_page(db.session, stmt, Project.created_at, Project.id, limit, after)
+	return jsonify({"items": [_project_row_to_dict(p) for p in projects], "next_cursor": next_cursor})
 
 
 @bp.post("/projects")
@@ -54,6 +84,7 @@ def create_project():
 
 
 @bp.get("/projects/<int:project_id>")
+@conditional(_project_watermark)
 def get_project(project_id: int):
 	project = Project.query.get_or_404(project_id)
 	return jsonify(
@@ -80,48 +111,25 @@ def update_project(project_id: int):
 	if "progress_percent" in data:
 		project.progress_percent = int(data["progress_percent"])  # type: ignore
 	db.session.commit()
+	invalidate_public_portfolio(project.owner_id)
 	return jsonify({"status": "updated"})
 
 
 @bp.delete("/projects/<int:project_id>")
 def delete_project(project_id: int):
 	project = Project.query.get_or_404(project_id)
+	owner_id = project.owner_id
 	db.session.delete(project)
 	db.session.commit()
+	invalidate_public_portfolio(owner_id)
 	return jsonify({"status": "deleted"})
 
 
 
-def _find_roadmap_candidates(search_root: str):
-	candidates = []
-	name_patterns = [re.compile(r"roadmap.*\.md$", re.IGNORECASE)]
-	for root, dirs, files in os.walk(search_root):
-		depth = root[len(search_root):].count(os.sep)
-		if depth > 4:
-			dirs[:] = []
-			continue
-		for fn in files:
-			lower = fn.lower()
-			path = os.path.join(root, fn)
-			if any(p.search(lower) for p in name_patterns):
-				score = 0
-				if lower == "roadmap.md":
-					score += 10
-				score -= depth
-				try:
-					with open(path, "r", encoding="utf-8", errors="ignore") as f:
-						text = f.read(20000)
-						if "- [ ]" in text or "- [x]" in text:
-							score += 2
-				except Exception:
-					pass
-				candidates.append((score, path))
-	return [p for _, p in sorted(candidates, key=lambda t: t[0], reverse=True)[:10]]
-
-
 @bp.get("/projects/<int:project_id>/detect-roadmap")
 def detect_roadmap(project_id: int):
 	# Optionally use a provided root, else default to repo root
 	root = request.args.get("root") or os.getenv("ROADMAP_SEARCH_ROOT") or os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
-	paths = _find_roadmap_candidates(root)
+	# Index par racine, revalidé par mtime des dossiers (voir app/roadmap_discovery.py)
+	paths = find_roadmap_candidates(root)
 	return jsonify({"candidates": paths})
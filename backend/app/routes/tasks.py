@@ -1,5 +1,4 @@
 import os
-import re
 from datetime import datetime
 
 from flask import Blueprint, jsonify, request, abort
@@ -7,35 +6,53 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from .. import db
 from ..models import Task, KanbanColumn, Project
-from textwrap import dedent
+from ..pagination import keyset_page, page_args
+from ..ranking import append_rank, last_rank, needs_rebalance, rank_between, rebalance_column
+from ..jobs import enqueue, register_job
+from ..llm import chat_completion, llm_provider
+from ..roadmap import import_roadmap_items, parse_roadmap_markdown, sync_roadmap_file
+from .ai import build_prompt_reformat, read_template, roadmap_messages
 
 bp = Blueprint("tasks", __name__)
 
 
+TASK_LIST_COLUMNS = (
+	Task.id, Task.title, Task.description, Task.status, Task.priority,
+	Task.due_date, Task.project_id, Task.kanban_column_id, Task.rank, Task.created_at,
+)
+
+
+def task_row_to_dict(t):
+	return {
+		"id": t.id,
+		"title": t.title,
+		"description": t.description,
+		"status": t.status,
+		"priority": t.priority,
+		"due_date": t.due_date.isoformat() if t.due_date else None,
+		"project_id": t.project_id,
+		"kanban_column_id": t.kanban_column_id,
+		"rank": t.rank,
+	}
+
+
 @bp.get("/tasks")
 @jwt_required()
 def list_tasks():
+	stmt = db.select(*TASK_LIST_COLUMNS)
 	project_id = request.args.get("project_id", type=int)
-	query = Task.query
 	if project_id is not None:
-		query = query.filter(Task.project_id == project_id)
+		stmt = stmt.where(Task.project_id == project_id)
 	column_id = request.args.get("column_id", type=int)
 	if column_id is not None:
-		query = query.filter(Task.kanban_column_id == column_id)
-	tasks = query.order_by(Task.created_at.desc()).all()
-	return jsonify([
-		{
-			"id": t.id,
-			"title": t.title,
-			"description": t.description,
-			"status": t.status,
-			"priority": t.priority,
-			"due_date": t.due_date.isoformat() if t.due_date else None,
-			"project_id": t.project_id,
-			"kanban_column_id": t.kanban_column_id,
-		}
-		for t in tasks
-	])
+		stmt = stmt.where(Task.kanban_column_id == column_id)
+	# Toujours paginé par curseur (created_at, id): ?limit=... (DEFAULT_LIMIT par défaut) &cursor=...
+	try:
+		limit, after = page_args()
+	except ValueError:
+		return jsonify({"error": "invalid cursor"}), 400
+	tasks, next_cursor = keyset_page(db.session, stmt, Task.created_at, Task.id, limit, after)
+	return jsonify({"items": [task_row_to_dict(t) for t in tasks], "next_cursor": next_cursor})
 
 
 @bp.post("/tasks")
@@ -70,6 +87,9 @@ def create_task():
 		col = KanbanColumn.query.get(default_column_id)
 		if col:
 			task.kanban_column_id = default_column_id
+	if task.kanban_column_id:
+		# Nouvelle carte en bas de la colonne
+		task.rank = append_rank(task.kanban_column_id)
 	db.session.add(task)
 	db.session.commit()
 	return jsonify({"id": task.id}), 201
@@ -86,12 +106,84 @@ def update_task(task_id: int):
 	# Move to another column
 	if "kanban_column_id" in data:
 		col = KanbanColumn.query.get(int(data["kanban_column_id"]))
-		if col:
+		if col and col.id != task.kanban_column_id:
 			task.kanban_column_id = col.id
+			task.rank = append_rank(col.id, exclude_id=task.id)
 	db.session.commit()
 	return jsonify({"status": "updated"})
 
 
+def _neighbour_ranks(task_id: int, column_id: int, prev_id, next_id):
+	# Rangs encadrant la position cible; un seul voisin suffit, l'autre est
+	# retrouvé via l'index (kanban_column_id, rank)
+	neighbours = {}
+	ids = [i for i in (prev_id, next_id) if i]
+	if ids:
+		rows = db.session.execute(
+			db.select(Task.id, Task.rank, Task.kanban_column_id).where(Task.id.in_(ids))
+		).all()
+		neighbours = {r.id: r for r in rows}
+		if any(r.kanban_column_id != column_id for r in rows) or len(rows) != len(ids):
+			raise LookupError("neighbour not in target column")
+		if any(r.rank is None for r in rows):
+			return None
+	prev_rank = neighbours[prev_id].rank if prev_id else None
+	next_rank = neighbours[next_id].rank if next_id else None
+	others = db.select(Task.rank).where(Task.kanban_column_id == column_id, Task.id != task_id)
+	if prev_id and not next_id:
+		next_rank = db.session.scalar(others.where(Task.rank > prev_rank).order_by(Task.rank).limit(1))
+	elif next_id and not prev_id:
+		prev_rank = db.session.scalar(others.where(Task.rank < next_rank).order_by(Task.rank.desc()).limit(1))
+	elif not prev_id and not next_id:
+		prev_rank = last_rank(column_id, exclude_id=task_id)
+	return prev_rank, next_rank
+
+
+@bp.post("/tasks/<int:task_id>/move")
+@jwt_required()
+def move_task(task_id: int):
+	# Body: {kanban_column_id?, prev_id?, next_id?} — prev/next = cartes qui encadreront la tâche.
+	# Seule la ligne déplacée est écrite, sauf renumérotation ponctuelle de la colonne.
+	task = Task.query.get_or_404(task_id)
+	data = request.get_json() or {}
+	column_id = task.kanban_column_id
+	if data.get("kanban_column_id"):
+		col = KanbanColumn.query.get(int(data["kanban_column_id"]))
+		if not col:
+			return jsonify({"error": "column not found"}), 404
+		column_id = col.id
+	if not column_id:
+		return jsonify({"error": "kanban_column_id is required"}), 400
+	prev_id = int(data["prev_id"]) if data.get("prev_id") else None
+	next_id = int(data["next_id"]) if data.get("next_id") else None
+	if task_id in (prev_id, next_id):
+		return jsonify({"error": "a task cannot be its own neighbour"}), 400
+
+	rank = None
+	for attempt in range(2):
+		try:
+			bounds = _neighbour_ranks(task_id, column_id, prev_id, next_id)
+		except LookupError:
+			return jsonify({"error": "prev_id/next_id must belong to the target column"}), 400
+		if bounds is not None:
+			try:
+				rank = rank_between(*bounds)
+			except ValueError:
+				# Rangs dupliqués (déplacements concurrents): renumérotation
+				rank = None
+		if rank is not None and not needs_rebalance(rank):
+			break
+		rebalance_column(column_id)
+		rank = None
+	if rank is None:
+		db.session.rollback()
+		return jsonify({"error": "could not compute position"}), 409
+	task.kanban_column_id = column_id
+	task.rank = rank
+	db.session.commit()
+	return jsonify({"id": task.id, "kanban_column_id": column_id, "rank": rank})
+
+
 @bp.delete("/tasks/<int:task_id>")
 @jwt_required()
 def delete_task(task_id: int):
@@ -101,46 +193,6 @@ def delete_task(task_id: int):
 	return jsonify({"status": "deleted"})
 
 
-def parse_roadmap_markdown(markdown_text: str):
-	# Patterns: "- [ ] task title", "- [x] done task"
-	# Optional tags: #tag, priority [P1|P2|P3], due: YYYY-MM-DD
-	items = []
-	checkbox_re = re.compile(r"^- \[( |x)\] (.+)$")
-	priority_re = re.compile(r"\[(P[1-3])\]")
-	due_re = re.compile(r"due:\s*(\d{4}-\d{2}-\d{2})")
-	tag_re = re.compile(r"#(\w+)")
-	for line in markdown_text.splitlines():
-		m = checkbox_re.match(line.strip())
-		if not m:
-			continue
-		checked, title = m.groups()
-		status = "done" if checked == "x" else "todo"
-		priority_match = priority_re.search(title)
-		priority = "medium"
-		if priority_match:
-			p = priority_match.group(1)
-			priority = {"P1": "high", "P2": "medium", "P3": "low"}.get(p, "medium")
-		due_match = due_re.search(title)
-		due_date = None
-		if due_match:
-			try:
-				due_date = datetime.fromisoformat(due_match.group(1))
-			except Exception:
-				pass
-		tags = tag_re.findall(title)
-		clean_title = re.sub(priority_re, "", title)
-		clean_title = re.sub(due_re, "", clean_title)
-		clean_title = re.sub(tag_re, "", clean_title).strip()
-		items.append({
-			"title": clean_title.strip("- "),
-			"status": status,
-			"priority": priority,
-			"due_date": due_date.isoformat() if due_date else None,
-			"tags": tags,
-		})
-	return items
-
-
 @bp.post("/tasks/sync-roadmap")
 @jwt_required()
 def sync_roadmap():
@@ -155,35 +207,11 @@ def sync_roadmap():
 	else:
 		roadmap_path = os.getenv("ROADMAP_PATH", os.path.join(os.path.dirname(__file__), "../../..", "roadmap.md"))
 	try:
-		with open(roadmap_path, "r", encoding="utf-8") as f:
-			content = f.read()
+		# Synchro incrémentale: no-op si le fichier n'a pas changé depuis la dernière fois
+		result = sync_roadmap_file(project_id, os.path.abspath(roadmap_path))
 	except FileNotFoundError:
 		return jsonify({"error": f"roadmap not found at {roadmap_path}"}), 404
-
-	items = parse_roadmap_markdown(content)
-	created_ids = []
-	for item in items:
-		# Avoid naive duplicates by title within this project
-		exists = Task.query.filter(Task.project_id == project_id, Task.title == item["title"]).first()
-		if exists:
-			continue
-		task = Task(
-			project_id=project_id,
-			title=item["title"],
-			description=None,
-			status=item["status"],
-			priority=item["priority"],
-		)
-		if item.get("due_date"):
-			try:
-				task.due_date = datetime.fromisoformat(item["due_date"])  # type: ignore
-			except Exception:
-				pass
-		db.session.add(task)
-		db.session.commit()
-		created_ids.append(task.id)
-
-	return jsonify({"created": created_ids, "total": len(items)})
+	return jsonify(result)
 
 
 @bp.post("/tasks/import-roadmap")
@@ -196,33 +224,17 @@ def import_roadmap():
 		return jsonify({"error": "project_id and markdown are required"}), 400
 
 	items = parse_roadmap_markdown(markdown)
-	created_ids = []
-	for item in items:
-		exists = Task.query.filter(Task.project_id == project_id, Task.title == item["title"]).first()
-		if exists:
-			continue
-		task = Task(
-			project_id=project_id,
-			title=item["title"],
-			description=None,
-			status=item["status"],
-			priority=item["priority"],
-		)
-		if item.get("due_date"):
-			try:
-				task.due_date = datetime.fromisoformat(item["due_date"])  # type: ignore
-			except Exception:
-				pass
-		db.session.add(task)
-		db.session.commit()
-		created_ids.append(task.id)
-
+	created_ids = import_roadmap_items(project_id, items)
 	return jsonify({"created": created_ids, "total": len(items)})
 
 
 @bp.post("/tasks/smart-sync")
 @jwt_required()
 def smart_sync():
+	"""Enfile la synchro (lecture -> normalisation IA éventuelle -> import) et répond 202.
+
+	Suivi via GET /api/jobs/<id>; le résultat contient les ids des tâches créées.
+	"""
 	project_id = request.args.get("project_id", type=int)
 	if not project_id:
 		return jsonify({"error": "project_id is required"}), 400
@@ -232,78 +244,40 @@ def smart_sync():
 		roadmap_path = project.roadmap_path
 	else:
 		roadmap_path = os.getenv("ROADMAP_PATH", os.path.join(os.path.dirname(__file__), "../../..", "roadmap.md"))
-	try:
-		with open(roadmap_path, "r", encoding="utf-8") as f:
-			content = f.read()
-	except FileNotFoundError:
-		# Essayer détection simple à la racine du repo si aucun chemin défini
+	# Vérification immédiate (bon marché) pour garder la redirection vers l'idéation
+	if not os.path.isfile(roadmap_path):
 		return jsonify({"error": f"roadmap not found at {roadmap_path}", "suggest": "use_ideation"}), 404
 
+	job = enqueue("smart_sync", {"project_id": project_id, "path": os.path.abspath(roadmap_path)}, user_id=int(get_jwt_identity()))
+	return jsonify({"job_id": job.id, "status": job.status, "status_url": f"/api/jobs/{job.id}"}), 202
+
+
+@register_job("smart_sync")
+def run_smart_sync(payload, progress):
+	project_id, roadmap_path = payload["project_id"], payload["path"]
+	progress(10, "reading")
+	with open(roadmap_path, "r", encoding="utf-8") as f:
+		content = f.read()
+
 	items = parse_roadmap_markdown(content)
+	normalized = False
 	if not items:
 		# Tente reformatage via IA
-		api_key = os.getenv("OPENAI_API_KEY")
-		if api_key:
-			# Charger le template
-			template_path = os.getenv("TEMPLATE_PATH", os.path.join(os.path.dirname(__file__), "../../docs/ROADMAP_TEMPLATE.md"))
-			try:
-				with open(template_path, "r", encoding="utf-8") as tf:
-					template = tf.read()
-			except Exception:
-				template = ""
+		if llm_provider.enabled:
+			progress(30, "normalizing")
 			try:
-				from openai import OpenAI
-				client = OpenAI(api_key=api_key)
-				prompt = dedent(f"""
-				Tu es un assistant qui produit des roadmaps strictement formatées et exploitables par une application.
-				Convertis le texte suivant au format EXACT du template, en supprimant tout texte hors listes et en corrigeant si nécessaire priorités/tags/dates.
-				=== TEMPLATE ===
-				{template}
-				=== FIN TEMPLATE ===
-
-				Texte à reformater:
-				---
-				{content}
-				---
-
-				Tâche: Retourne UNIQUEMENT la liste normalisée, sans aucune autre phrase.
-				""")
-				resp = client.chat.completions.create(
-					model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-					messages=[
-						{"role": "system", "content": "Tu es un assistant qui produit des roadmaps strictement formatées et exploitables par une application."},
-						{"role": "user", "content": prompt},
-					],
-					temperature=0.2,
-				)
-				content_norm = resp.choices[0].message.content or ""
+				# Même prompt que /ai/generate-roadmap (mode reformat): partage le cache LLM
+				prompt = build_prompt_reformat(content, read_template())
+				# Hors requête HTTP: on peut attendre qu'un emplacement d'appel se libère
+				content_norm, _ = chat_completion(roadmap_messages(prompt), queue_timeout=120)
 				items = parse_roadmap_markdown(content_norm)
+				normalized = True
 			except Exception:
 				# fallback best-effort: extraire lignes déjà valides
 				lines = [ln for ln in content.splitlines() if ln.strip().startswith("- [")]
 				content_norm = "\n".join(lines)
 				items = parse_roadmap_markdown(content_norm)
 
-	created_ids = []
-	for item in items:
-		exists = Task.query.filter(Task.project_id == project_id, Task.title == item["title"]).first()
-		if exists:
-			continue
-		task = Task(
-			project_id=project_id,
-			title=item["title"],
-			description=None,
-			status=item["status"],
-			priority=item["priority"],
-		)
-		if item.get("due_date"):
-			try:
-				task.due_date = datetime.fromisoformat(item["due_date"])  # type: ignore
-			except Exception:
-				pass
-		db.session.add(task)
-		db.session.commit()
-		created_ids.append(task.id)
-
-	return jsonify({"created": created_ids, "total": len(items)})
-
+	progress(70, "importing")
+	created_ids = import_roadmap_items(project_id, items)
+	return {"created": created_ids, "total": len(items), "normalized": normalized}
@@ -0,0 +1,142 @@
+"""Test de charge des profils gunicorn (gunicorn.conf.py): sync, gthread, gevent.
+
+Usage: python benchmarks/bench_gunicorn_profiles.py [--clients 32] [--duration 10] [--profiles sync,gthread,gevent]
+
+Chaque profil démarre gunicorn avec une base SQLite temporaire et le faux
+backend LLM (LLM_FAKE_LATENCY s d'attente réseau simulée par appel). Les
+clients envoient un mélange de requêtes rapides (`GET /api/healthz`) et
+lentes, limitées par l'I/O (`POST /api/ai/generate-roadmap`, prompt unique
+donc jamais servi par le cache). Rapporte débit et latences par type.
+Le profil gevent est ignoré si gevent n'est pas installé.
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port() -> int:
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+def start_server(profile: str, port: int, tmp: str, latency: float):
+	env = {
+		**os.environ,
+		"GUNICORN_PROFILE": profile,
+		"GUNICORN_BIND": f"127.0.0.1:{port}",
+		"DATABASE_URL": f"sqlite:///{tmp}/{profile}.db",
+		"LLM_BACKEND": "fake",
+		"LLM_FAKE_LATENCY": str(latency),
+		"LLM_MAX_CONCURRENCY": "256",
+		"RATELIMIT_ENABLED": "false",
+		"PASSWORD_HASH_WORKERS": "0",
+	}
+	subprocess.run([sys.executable, "-m", "flask", "--app", "wsgi", "bootstrap", "--no-seed"], cwd=BACKEND_DIR, env=env,
+		capture_output=True, check=True)
+	proc = subprocess.Popen(
+		[sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+		cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+	)
+	base = f"http://127.0.0.1:{port}/api"
+	deadline = time.monotonic() + 30
+	while time.monotonic() < deadline:
+		try:
+			if requests.get(f"{base}/healthz", timeout=1).ok:
+				return proc, base
+		except requests.ConnectionError:
+			time.sleep(0.2)
+	proc.terminate()
+	raise RuntimeError(f"gunicorn ({profile}) did not start: {proc.stderr.read()[-2000:]}")
+
+
+def login(base: str) -> str:
+	account = {"email": "bench@example.com", "password": "bench-password", "username": "bench"}
+	requests.post(f"{base}/auth/register", json=account, timeout=10)
+	return requests.post(f"{base}/auth/login", json=account, timeout=10).json()["access_token"]
+
+
+def load(base: str, token: str, clients: int, duration: float):
+	results = {"healthz": [], "roadmap": [], "errors": 0}
+	lock = threading.Lock()
+	stop = time.monotonic() + duration
+
+	def client(index):
+		session = requests.Session()
+		headers = {"Authorization": f"Bearer {token}"}
+		n = 0
+		while time.monotonic() < stop:
+			n += 1
+			kind = "roadmap" if n % 2 else "healthz"
+			start = time.perf_counter()
+			try:
+				if kind == "roadmap":
+					r = session.post(f"{base}/ai/generate-roadmap", headers=headers, timeout=60,
+						json={"mode": "skeleton", "idea": f"bench {index} {n} {time.time()}"})
+				else:
+					r = session.get(f"{base}/healthz", timeout=60)
+				ok = r.status_code == 200
+			except requests.RequestException:
+				ok = False
+			with lock:
+				if ok:
+					results[kind].append(time.perf_counter() - start)
+				else:
+					results["errors"] += 1
+
+	threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	return results
+
+
+def describe(label: str, values: list, duration: float) -> str:
+	if not values:
+		return f"{label}: aucune réponse"
+	values = sorted(values)
+	p95 = values[max(0, int(len(values) * 0.95) - 1)]
+	return f"{label} {len(values) / duration:6.1f} req/s (médiane {statistics.median(values) * 1000:6.0f} ms, p95 {p95 * 1000:6.0f} ms)"
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--clients", type=int, default=32)
+	parser.add_argument("--duration", type=float, default=10.0)
+	parser.add_argument("--latency", type=float, default=0.2)
+	parser.add_argument("--profiles", default="sync,gthread,gevent")
+	args = parser.parse_args()
+
+	tmp = tempfile.mkdtemp()
+	try:
+		for profile in args.profiles.split(","):
+			if profile == "gevent" and importlib.util.find_spec("gevent") is None:
+				print(f"{profile:<8}: ignoré (gevent non installé)")
+				continue
+			proc, base = start_server(profile, free_port(), tmp, args.latency)
+			try:
+				results = load(base, login(base), args.clients, args.duration)
+			finally:
+				proc.terminate()
+				proc.wait(30)
+			print(f"{profile:<8}: {describe('healthz', results['healthz'], args.duration)} | "
+				f"{describe('roadmap', results['roadmap'], args.duration)} | erreurs {results['errors']}")
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,97 @@
+"""Fournisseur LLM: coût d'un client par requête, et comportement sous saturation.
+
+Usage: python benchmarks/bench_llm_provider.py [--requests 32] [--latency 0.5] [--concurrency 4]
+
+1. Construction d'un client OpenAI (+ pool httpx) à chaque requête vs client partagé.
+2. `--requests` appels simultanés vers le faux backend (`--latency` s chacun):
+   sans limite, tout le monde attend; avec le sémaphore, les appels en trop
+   reçoivent LLMBusy (503) en LLM_QUEUE_TIMEOUT au lieu d'occuper un worker.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.llm import FakeBackend, LLMBusy, LLMProvider  # noqa: E402
+
+
+def bench_client_construction(n: int = 50):
+	from openai import OpenAI
+	import httpx
+
+	start = time.perf_counter()
+	for _ in range(n):
+		client = OpenAI(api_key="sk-bench", http_client=httpx.Client())
+		client.close()
+	per_request = (time.perf_counter() - start) / n
+
+	shared = OpenAI(api_key="sk-bench", http_client=httpx.Client())
+	start = time.perf_counter()
+	for _ in range(n):
+		_ = shared.chat.completions
+	reuse = (time.perf_counter() - start) / n
+	shared.close()
+	print(f"client par requête : {per_request * 1000:7.2f} ms / appel (+ nouvelle connexion TLS à chaque fois)")
+	print(f"client partagé     : {reuse * 1000:7.3f} ms / appel")
+
+
+def run_burst(provider: LLMProvider, requests: int):
+	latencies = {"ok": [], "busy": []}
+	lock = threading.Lock()
+
+	def call(i):
+		start = time.perf_counter()
+		try:
+			provider.complete([{"role": "user", "content": f"burst {i}"}])
+			outcome = "ok"
+		except LLMBusy:
+			outcome = "busy"
+		with lock:
+			latencies[outcome].append(time.perf_counter() - start)
+
+	threads = [threading.Thread(target=call, args=(i,)) for i in range(requests)]
+	start = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	return latencies, time.perf_counter() - start
+
+
+def describe(label, latencies, wall):
+	parts = [f"{label:<22} mur {wall:5.2f} s"]
+	for outcome in ("ok", "busy"):
+		values = latencies[outcome]
+		if values:
+			parts.append(f"{outcome}: {len(values):3d} (médiane {statistics.median(values) * 1000:6.0f} ms, max {max(values) * 1000:6.0f} ms)")
+	print(" | ".join(parts))
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--requests", type=int, default=32)
+	parser.add_argument("--latency", type=float, default=0.5)
+	parser.add_argument("--concurrency", type=int, default=4)
+	parser.add_argument("--queue-timeout", type=float, default=0.1)
+	args = parser.parse_args()
+
+	bench_client_construction()
+
+	for label, concurrency in (("sans limite", args.requests), (f"sémaphore = {args.concurrency}", args.concurrency)):
+		provider = LLMProvider()
+		provider.max_concurrency = concurrency
+		provider._semaphore = threading.BoundedSemaphore(concurrency)
+		provider.queue_timeout = args.queue_timeout
+		provider.backend_name = "fake"
+		provider.backend = FakeBackend(latency=args.latency)
+		provider._pid = os.getpid()
+		latencies, wall = run_burst(provider, args.requests)
+		describe(label, latencies, wall)
+
+
+if __name__ == "__main__":
+	main()
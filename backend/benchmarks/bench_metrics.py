@@ -0,0 +1,86 @@
+"""Coût de l'instrumentation: latence par requête avec / sans métriques, et coût d'un scrape.
+
+Usage: python benchmarks/bench_metrics.py [--requests 2000] [--workers 8]
+
+La latence est mesurée avec le client de test Flask (sans réseau ni gunicorn)
+sur /api/healthz (aucune requête SQL) et /api/projects (JWT + SQL), par lots
+alternés avec et sans métriques dans le même processus. Le scrape simule
+`--workers` processus ayant chacun publié leurs séries dans le fichier partagé.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, statistics, sys, time
+from app import create_app
+app = create_app()
+client = app.test_client()
+client.post("/api/auth/register", json={"email": "b@example.com", "password": "pw", "username": "bench"})
+token = client.post("/api/auth/login", json={"email": "b@example.com", "password": "pw"}).get_json()["access_token"]
+headers = {"Authorization": f"Bearer {token}"}
+from app.metrics import metrics
+result = {}
+for path in ("/api/healthz", "/api/projects"):
+	times = {True: [], False: []}
+	for batch in range(int(sys.argv[1]) // 100):
+		metrics.enabled = batch % 2 == 0
+		for _ in range(100):
+			start = time.perf_counter()
+			client.get(path, headers=headers)
+			times[metrics.enabled].append(time.perf_counter() - start)
+	result[path] = [statistics.median(times[False]), statistics.median(times[True])]
+metrics.enabled = True
+metrics.flush()
+conn = metrics._conn()
+rows = conn.execute("SELECT family, name, labels, le, kind, value FROM samples").fetchall()
+# Mêmes séries publiées par d'autres workers
+for pid in range(1, int(sys.argv[2])):
+	conn.executemany(
+		"INSERT OR REPLACE INTO samples (pid, family, name, labels, le, kind, value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+		[(100000 + pid, *row) for row in rows],
+	)
+start = time.perf_counter()
+for _ in range(20):
+	text = metrics.render()
+result["render"] = (time.perf_counter() - start) / 20
+result["series"] = sum(1 for line in text.splitlines() if not line.startswith("#"))
+print(json.dumps(result))
+"""
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--requests", type=int, default=2000)
+	parser.add_argument("--workers", type=int, default=8)
+	args = parser.parse_args()
+
+	tmp = tempfile.mkdtemp()
+	try:
+		env = {
+			**os.environ,
+			"DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+			"METRICS_DB_PATH": f"{tmp}/metrics.db",
+			"RATELIMIT_ENABLED": "false",
+			"PASSWORD_HASH_WORKERS": "0",
+			"AUTO_CREATE_DB": "true",
+		}
+		out = subprocess.run([sys.executable, "-c", PROBE, str(args.requests), str(args.workers)], cwd=BACKEND_DIR,
+			env=env, capture_output=True, text=True, check=True)
+		result = json.loads(out.stdout.strip().splitlines()[-1])
+		for path in ("/api/healthz", "/api/projects"):
+			off, on = result[path]
+			print(f"{path:<14}: sans métriques {off * 1e6:7.0f} µs, avec {on * 1e6:7.0f} µs (+{(on - off) * 1e6:.0f} µs)")
+		print(f"scrape /metrics: {result['render'] * 1000:.1f} ms pour {result['series']} séries agrégées sur {args.workers} workers")
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
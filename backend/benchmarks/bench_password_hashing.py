@@ -0,0 +1,91 @@
+"""Logins par seconde selon la taille du pool de hachage, et effet sur les autres routes.
+
+Usage: python benchmarks/bench_password_hashing.py [--threads 8] [--duration 5] [--workers 0,1,2,4] [--method scrypt:32768:8:1]
+
+`--threads` threads de requête vérifient un mot de passe en boucle (rafale de
+logins) pendant `--duration` s, avec PASSWORD_HASH_WORKERS = chaque valeur de
+`--workers` (0: calcul dans le thread de la requête, comme avant). En parallèle,
+un thread simule une route légère (un peu de Python pur toutes les 10 ms) et
+mesure sa latence: c'est elle qui se dégrade quand le hachage tient le GIL/CPU.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.passwords import PasswordHasher, canonical_method  # noqa: E402
+
+
+def light_route():
+	return sum(i * i for i in range(2000))
+
+
+def run(hasher: PasswordHasher, pwhash: str, threads: int, duration: float):
+	stop = threading.Event()
+	logins = [0] * threads
+	light = []
+
+	def login_loop(index):
+		while not stop.is_set():
+			assert hasher.verify(pwhash, "correct horse")
+			logins[index] += 1
+
+	def light_loop():
+		while not stop.is_set():
+			start = time.perf_counter()
+			light_route()
+			light.append(time.perf_counter() - start)
+			time.sleep(0.01)
+
+	workers = [threading.Thread(target=login_loop, args=(i,)) for i in range(threads)]
+	workers.append(threading.Thread(target=light_loop))
+	for thread in workers:
+		thread.start()
+	time.sleep(duration)
+	stop.set()
+	for thread in workers:
+		thread.join()
+	light.sort()
+	return sum(logins) / duration, statistics.median(light), light[int(len(light) * 0.95) - 1]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--threads", type=int, default=8)
+	parser.add_argument("--duration", type=float, default=5.0)
+	parser.add_argument("--workers", default="0,1,2,4")
+	parser.add_argument("--method", default="scrypt:32768:8:1")
+	args = parser.parse_args()
+
+	method = canonical_method(args.method)
+	baseline = []
+	for _ in range(50):
+		start = time.perf_counter()
+		light_route()
+		baseline.append(time.perf_counter() - start)
+	print(f"{os.cpu_count()} CPU, méthode {method}, {args.threads} threads de requête")
+	print(f"route légère seule : médiane {statistics.median(baseline) * 1000:6.2f} ms")
+
+	for workers in (int(w) for w in args.workers.split(",")):
+		hasher = PasswordHasher()
+		hasher.method = method
+		hasher.workers = workers
+		hasher.max_pending = args.threads
+		hasher._pending = threading.BoundedSemaphore(args.threads)
+		pwhash = hasher.hash("correct horse")
+		if workers:
+			# Processus du pool démarrés avant la mesure
+			for _ in range(workers * 2):
+				hasher.verify(pwhash, "correct horse")
+		rate, median, p95 = run(hasher, pwhash, args.threads, args.duration)
+		label = "dans la requête" if workers == 0 else f"pool de {workers}"
+		print(f"{label:<16}: {rate:7.1f} logins/s | route légère médiane {median * 1000:6.2f} ms, p95 {p95 * 1000:6.2f} ms")
+		hasher.reset()
+
+
+if __name__ == "__main__":
+	main()
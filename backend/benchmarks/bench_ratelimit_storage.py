@@ -0,0 +1,80 @@
+"""Coût par requête du stockage de rate limit, et exactitude entre processus.
+
+Usage: python benchmarks/bench_ratelimit_storage.py [--hits 20000] [--processes 4] [--limit 100]
+
+1. Coût d'un hit (stratégie sliding-window-counter) : stockage mémoire par
+   défaut de Flask-Limiter vs fichier SQLite WAL partagé (sharedsqlite://).
+2. `--processes` processus (autant de workers gunicorn) tentent chacun
+   `--limit` hits sur la même clé limitée à `--limit`/minute : en mémoire,
+   chaque processus a son compteur (limit x processus acceptés); partagé,
+   le total accepté reste `--limit`.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import SlidingWindowCounterRateLimiter  # noqa: E402
+
+import app.ratelimit  # noqa: E402,F401  (schéma sharedsqlite://)
+
+
+def per_hit_cost(uri: str, hits: int):
+	limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+	item = parse(f"{hits * 10}/minute")
+	samples = []
+	for i in range(hits):
+		key = f"10.0.{i % 50}.1"
+		start = time.perf_counter()
+		limiter.hit(item, "login", key)
+		samples.append(time.perf_counter() - start)
+	samples.sort()
+	return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def worker(uri: str, limit: int, results):
+	limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+	item = parse(f"{limit}/minute")
+	results.put(sum(limiter.hit(item, "login", "10.0.0.1") for _ in range(limit)))
+
+
+def accepted_across(uri: str, processes: int, limit: int) -> int:
+	results = multiprocessing.Queue()
+	procs = [multiprocessing.Process(target=worker, args=(uri, limit, results)) for _ in range(processes)]
+	for proc in procs:
+		proc.start()
+	total = sum(results.get() for _ in procs)
+	for proc in procs:
+		proc.join()
+	return total
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--hits", type=int, default=20000)
+	parser.add_argument("--processes", type=int, default=4)
+	parser.add_argument("--limit", type=int, default=100)
+	args = parser.parse_args()
+
+	tmp = tempfile.mkdtemp()
+	try:
+		for label, uri in (("mémoire (défaut)", "memory://"), ("sharedsqlite (WAL)", f"sharedsqlite:///{tmp}/cost.db")):
+			median, p99 = per_hit_cost(uri, args.hits)
+			print(f"{label:<20}: médiane {median * 1e6:7.1f} µs, p99 {p99 * 1e6:7.1f} µs par hit")
+		for label, uri in (("mémoire (défaut)", "memory://"), ("sharedsqlite (WAL)", f"sharedsqlite:///{tmp}/shared.db")):
+			total = accepted_across(uri, args.processes, args.limit)
+			print(f"{label:<20}: {total} hits acceptés pour {args.limit}/minute sur {args.processes} processus")
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+"""Statistiques de dépôts: appels séquentiels vs pool borné, contre un faux GitHub local.
+
+Usage: python benchmarks/bench_repo_stats.py [--repos 50] [--latency 0.15] [--workers 8]
+Le faux serveur ajoute `--latency` secondes à chaque réponse (aller-retour vers api.github.com).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+LATENCY = 0.15
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+	def log_message(self, *args):
+		pass
+
+	def do_GET(self):
+		time.sleep(LATENCY)
+		parts = urlparse(self.path).path.strip("/").split("/")
+		if parts[-1] == "languages":
+			body = {"Python": 12000, "TypeScript": 3000}
+		elif parts[-1] == "commits":
+			body = [{"sha": str(i)} for i in range(12)]
+		else:
+			body = {"full_name": "/".join(parts[1:3]), "stargazers_count": 42, "language": "Python"}
+		data = json.dumps(body).encode()
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+
+def main():
+	global LATENCY
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--repos", type=int, default=50)
+	parser.add_argument("--latency", type=float, default=0.15)
+	parser.add_argument("--workers", type=int, default=8)
+	args = parser.parse_args()
+	LATENCY = args.latency
+
+	server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+	from app.github import GitHubClient  # noqa: E402
+	from app.repo_stats import RepoStatsService, count_recent_commits  # noqa: E402
+
+	names = [f"bench/repo{i}" for i in range(args.repos)]
+
+	start = time.perf_counter()
+	for name in names:
+		# Ce que ferait une vue naïve: trois appels à la suite, dépôt par dépôt
+		client = GitHubClient("seq-token", account_key="bench")
+		client.get_repo(name)
+		client.get(f"/repos/{name}/languages")
+		count_recent_commits(client, name)
+	sequential = time.perf_counter() - start
+
+	service = RepoStatsService(max_workers=args.workers)
+	start = time.perf_counter()
+	results = service.fetch([(name, "pool-token", "bench-pool") for name in names])
+	pooled = time.perf_counter() - start
+	assert len(results) == len(names)
+
+	print(f"{args.repos} dépôts, latence {args.latency * 1000:.0f} ms")
+	print(f"séquentiel : {sequential:7.2f} s")
+	print(f"pool ({args.workers:>2})  : {pooled:7.2f} s  (x{sequential / pooled:.1f})")
+	server.shutdown()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,122 @@
+"""Détection de roadmap: os.walk historique vs index scandir (à froid, puis à chaud).
+
+Usage: python benchmarks/bench_roadmap_discovery.py [--dirs 2000] [--files-per-dir 20] [--root PATH]
+Sans --root, génère un arbre synthétique (dont un gros node_modules et un .git)
+dans un dossier temporaire. Vérifie aussi que les deux versions renvoient les
+mêmes candidats et que l'ajout d'un fichier est vu par l'index.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.roadmap_discovery import RoadmapIndex  # noqa: E402
+
+
+def legacy_find(search_root: str):
+	# Copie de l'ancienne _find_roadmap_candidates (routes/projects.py)
+	candidates = []
+	name_patterns = [re.compile(r"roadmap.*\.md$", re.IGNORECASE)]
+	for root, dirs, files in os.walk(search_root):
+		depth = root[len(search_root):].count(os.sep)
+		if depth > 4:
+			dirs[:] = []
+			continue
+		for fn in files:
+			lower = fn.lower()
+			path = os.path.join(root, fn)
+			if any(p.search(lower) for p in name_patterns):
+				score = 0
+				if lower == "roadmap.md":
+					score += 10
+				score -= depth
+				try:
+					with open(path, "r", encoding="utf-8", errors="ignore") as f:
+						text = f.read(20000)
+						if "- [ ]" in text or "- [x]" in text:
+							score += 2
+				except Exception:
+					pass
+				candidates.append((score, path))
+	return [p for _, p in sorted(candidates, key=lambda t: t[0], reverse=True)[:10]]
+
+
+def make_tree(base: str, dirs: int, files_per_dir: int):
+	def fill(directory, count):
+		os.makedirs(directory, exist_ok=True)
+		for i in range(count):
+			with open(os.path.join(directory, f"file{i}.js"), "w") as f:
+				f.write("x")
+
+	with open(os.path.join(base, "roadmap.md"), "w") as f:
+		f.write("- [ ] [P1] Premier item\n")
+	for i in range(dirs):
+		# 3/4 des dossiers sous node_modules / .git, le reste dans le code
+		parent = ("node_modules", ".git", "node_modules", "src")[i % 4]
+		directory = os.path.join(base, parent, f"pkg{i // 40}", f"d{i}")
+		fill(directory, files_per_dir)
+		if i % 97 == 0 and parent == "src":
+			with open(os.path.join(directory, "ROADMAP-notes.md"), "w") as f:
+				f.write("notes\n- [x] fait\n")
+		if i % 50 == 0 and parent == "node_modules":
+			# Présents dans node_modules: ignorés par l'index, pas par l'ancienne version
+			with open(os.path.join(directory, "roadmap.md"), "w") as f:
+				f.write("vendored\n")
+
+
+def timed(fn, repeat=1):
+	start = time.perf_counter()
+	for _ in range(repeat):
+		result = fn()
+	return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--dirs", type=int, default=2000)
+	parser.add_argument("--files-per-dir", type=int, default=20)
+	parser.add_argument("--root")
+	args = parser.parse_args()
+
+	tmp = None
+	root = args.root
+	if root is None:
+		tmp = tempfile.mkdtemp()
+		root = tmp
+		make_tree(root, args.dirs, args.files_per_dir)
+	root = os.path.abspath(root)
+
+	try:
+		legacy_s, legacy = timed(lambda: legacy_find(root))
+		index = RoadmapIndex(root)
+		cold_s, cold = timed(index.candidates)
+		warm_s, warm = timed(index.candidates, repeat=20)
+		print(f"os.walk historique : {legacy_s * 1000:9.1f} ms")
+		print(f"index (à froid)    : {cold_s * 1000:9.1f} ms  ({index.stats['scanned_dirs']} dossiers lus, {index.stats['sniffed_files']} fichiers ouverts)")
+		print(f"index (à chaud)    : {warm_s * 1000:9.1f} ms")
+		ignored = [p for p in legacy if "node_modules" in p.split(os.sep) or ".git" in p.split(os.sep)]
+		kept = [p for p in legacy if p not in ignored]
+		print(f"candidats: historique {len(legacy)} (dont {len(ignored)} dans des dossiers ignorés), index {len(cold)}")
+		assert set(kept) <= set(cold), "candidat hors dossiers ignorés manquant"
+		assert cold == warm
+
+		if tmp:
+			new_dir = os.path.join(root, "src", "pkg0", "d3")
+			os.makedirs(new_dir, exist_ok=True)
+			with open(os.path.join(new_dir, "roadmap.md"), "w") as f:
+				f.write("- [ ] nouveau\n")
+			_, after = timed(index.candidates)
+			assert os.path.join(new_dir, "roadmap.md") in after, "nouveau fichier non détecté"
+			print("ajout d'un fichier: détecté au prochain appel")
+	finally:
+		if tmp:
+			shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,82 @@
+"""Import roadmap: boucle historique (1 SELECT + 1 commit par item) vs import groupé.
+
+Usage: python benchmarks/bench_roadmap_import.py [--sizes 100,1000,10000]
+DATABASE_URL permet de viser Postgres; par défaut SQLite dans un dossier temporaire.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+os.environ["AUTO_CREATE_DB"] = "false"
+
+from app import create_app, db  # noqa: E402
+from app.models import Project, Task, User  # noqa: E402
+from app.roadmap import import_roadmap_items  # noqa: E402
+
+
+def make_items(n: int):
+	return [
+		{"title": f"Tâche {i}", "status": "todo", "priority": "medium", "due_date": "2025-09-01" if i % 3 == 0 else None, "tags": []}
+		for i in range(n)
+	]
+
+
+def legacy_import(project_id: int, items):
+	created_ids = []
+	for item in items:
+		exists = Task.query.filter(Task.project_id == project_id, Task.title == item["title"]).first()
+		if exists:
+			continue
+		task = Task(project_id=project_id, title=item["title"], status=item["status"], priority=item["priority"])
+		if item.get("due_date"):
+			task.due_date = datetime.fromisoformat(item["due_date"])
+		db.session.add(task)
+		db.session.commit()
+		created_ids.append(task.id)
+	return created_ids
+
+
+def new_project(owner_id: int) -> int:
+	project = Project(owner_id=owner_id, title="bench")
+	db.session.add(project)
+	db.session.commit()
+	return project.id
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--sizes", default="100,1000,10000")
+	args = parser.parse_args()
+	sizes = [int(s) for s in args.sizes.split(",")]
+
+	app = create_app()
+	with app.app_context():
+		db.create_all()
+		user = User(email=f"bench-{time.time()}@example.com")
+		db.session.add(user)
+		db.session.commit()
+		print(f"{'items':>8} {'legacy (s)':>12} {'bulk (s)':>10} {'speedup':>8}")
+		for n in sizes:
+			items = make_items(n)
+			pid = new_project(user.id)
+			t0 = time.perf_counter()
+			legacy = legacy_import(pid, items)
+			t_legacy = time.perf_counter() - t0
+
+			pid = new_project(user.id)
+			t0 = time.perf_counter()
+			bulk = import_roadmap_items(pid, items)
+			t_bulk = time.perf_counter() - t0
+			assert len(legacy) == len(bulk) == n
+			print(f"{n:>8} {t_legacy:>12.3f} {t_bulk:>10.3f} {t_legacy / t_bulk:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,117 @@
+"""Parseur roadmap: version historique (texte entier + 3 re.sub par ligne) vs parseur en flux.
+
+Génère des roadmaps de 1 Ko à 50 Mo et mesure durée et pic mémoire (tracemalloc).
+Usage: python benchmarks/bench_roadmap_parser.py [--sizes 1K,100K,1M,10M,50M]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.roadmap import iter_roadmap_items  # noqa: E402
+
+UNITS = {"K": 1024, "M": 1024 * 1024}
+
+
+def legacy_parse(markdown_text: str):
+	items = []
+	checkbox_re = re.compile(r"^- \[( |x)\] (.+)$")
+	priority_re = re.compile(r"\[(P[1-3])\]")
+	due_re = re.compile(r"due:\s*(\d{4}-\d{2}-\d{2})")
+	tag_re = re.compile(r"#(\w+)")
+	for line in markdown_text.splitlines():
+		m = checkbox_re.match(line.strip())
+		if not m:
+			continue
+		checked, title = m.groups()
+		priority_match = priority_re.search(title)
+		priority = "medium"
+		if priority_match:
+			priority = {"P1": "high", "P2": "medium", "P3": "low"}.get(priority_match.group(1), "medium")
+		due_match = due_re.search(title)
+		due_date = datetime.fromisoformat(due_match.group(1)) if due_match else None
+		tags = tag_re.findall(title)
+		clean_title = re.sub(priority_re, "", title)
+		clean_title = re.sub(due_re, "", clean_title)
+		clean_title = re.sub(tag_re, "", clean_title).strip()
+		items.append({
+			"title": clean_title.strip("- "),
+			"status": "done" if checked == "x" else "todo",
+			"priority": priority,
+			"due_date": due_date.isoformat() if due_date else None,
+			"tags": tags,
+		})
+	return items
+
+
+def parse_size(value: str) -> int:
+	value = value.strip().upper()
+	if value[-1] in UNITS:
+		return int(float(value[:-1]) * UNITS[value[-1]])
+	return int(value)
+
+
+def generate_roadmap(path: str, size: int):
+	rnd = random.Random(size)
+	written = 0
+	phase = 0
+	with open(path, "w", encoding="utf-8") as f:
+		while written < size:
+			if rnd.random() < 0.05:
+				phase += 1
+				line = f"\n## Phase {phase} — Lot\n"
+			else:
+				box = "x" if rnd.random() < 0.3 else " "
+				due = f" due: 2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" if rnd.random() < 0.5 else ""
+				tags = " ".join(f"#tag{rnd.randint(0, 50)}" for _ in range(rnd.randint(0, 3)))
+				line = f"- [{box}] [P{rnd.randint(1, 3)}] Tâche {written} à réaliser{due} {tags}\n"
+			f.write(line)
+			written += len(line.encode("utf-8"))
+
+
+def measure(fn):
+	tracemalloc.start()
+	t0 = time.perf_counter()
+	count = fn()
+	elapsed = time.perf_counter() - t0
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return count, elapsed, peak
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--sizes", default="1K,100K,1M,10M,50M")
+	args = parser.parse_args()
+
+	tmpdir = tempfile.mkdtemp()
+	print(f"{'taille':>8} {'items':>9} {'legacy (s)':>11} {'legacy pic':>11} {'flux (s)':>9} {'flux pic':>10}")
+	for label in args.sizes.split(","):
+		size = parse_size(label)
+		path = os.path.join(tmpdir, f"roadmap-{label}.md")
+		generate_roadmap(path, size)
+
+		def run_legacy():
+			with open(path, "r", encoding="utf-8") as f:
+				return len(legacy_parse(f.read()))
+
+		def run_stream():
+			with open(path, "r", encoding="utf-8") as f:
+				return sum(1 for _ in iter_roadmap_items(f))
+
+		n_legacy, t_legacy, m_legacy = measure(run_legacy)
+		n_stream, t_stream, m_stream = measure(run_stream)
+		assert n_legacy == n_stream
+		print(f"{label:>8} {n_stream:>9} {t_legacy:>11.3f} {m_legacy / 1e6:>9.1f}Mo {t_stream:>9.3f} {m_stream / 1e6:>8.2f}Mo")
+		os.remove(path)
+
+
+if __name__ == "__main__":
+	main()
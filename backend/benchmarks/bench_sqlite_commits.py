@@ -0,0 +1,56 @@
+"""Commits SQLite: mode journal par défaut vs WAL + synchronous=NORMAL (db_engine).
+
+Usage: python benchmarks/bench_sqlite_commits.py [--commits 2000] [--dir PATH]
+
+Reproduit une boucle d'import de roadmap (un INSERT + commit par tâche) sur un
+fichier SQLite, avec le moteur par défaut puis avec les options et pragmas de
+app.db_engine. `--dir` permet de viser un disque précis (les fsync y coûtent
+plus ou moins cher que sur le tmpfs).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+
+from app.db_engine import _sqlite_pragmas, engine_options  # noqa: E402
+
+
+def run(engine, commits: int) -> float:
+	with engine.begin() as conn:
+		conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT)"))
+	start = time.perf_counter()
+	with engine.connect() as conn:
+		for i in range(commits):
+			conn.execute(text("INSERT INTO tasks (title) VALUES (:t)"), {"t": f"task {i}"})
+			conn.commit()
+	return time.perf_counter() - start
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--commits", type=int, default=2000)
+	parser.add_argument("--dir")
+	args = parser.parse_args()
+
+	tmp = tempfile.mkdtemp(dir=args.dir)
+	try:
+		url = f"sqlite:///{tmp}/default.db"
+		default = run(create_engine(url), args.commits)
+		url = f"sqlite:///{tmp}/tuned.db"
+		engine = create_engine(url, **engine_options(url))
+		event.listen(engine, "connect", _sqlite_pragmas)
+		tuned = run(engine, args.commits)
+		for label, elapsed in (("journal par défaut", default), ("WAL + NORMAL", tuned)):
+			print(f"{label:<20}: {args.commits / elapsed:8.0f} commits/s ({elapsed * 1e6 / args.commits:7.1f} µs/commit)")
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,63 @@
+"""Temps de boot d'un worker: import + create_app, requêtes SQL et modules lourds chargés.
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+
+Chaque mesure tourne dans un interpréteur neuf (comme un worker gunicorn sans
+preload), sur une base SQLite temporaire déjà préparée par `flask bootstrap`.
+Compare AUTO_CREATE_DB=true (create_all + seed au boot, l'ancien défaut des
+images) au boot normal, qui ne doit faire aucune requête SQL.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("authlib", "requests", "alembic", "flask_migrate", "openai", "httpx") if m in sys.modules]
+print(json.dumps({"elapsed": elapsed, "statements": len(statements), "heavy": heavy}))
+"""
+
+
+def probe(env: dict) -> dict:
+	out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--runs", type=int, default=5)
+	args = parser.parse_args()
+
+	tmp = tempfile.mkdtemp()
+	try:
+		env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp}/startup.db", "PYTHONDONTWRITEBYTECODE": "1"}
+		env.pop("AUTO_CREATE_DB", None)
+		subprocess.run([sys.executable, "-m", "flask", "--app", "wsgi", "bootstrap"], cwd=BACKEND_DIR, env=env,
+			capture_output=True, check=True)
+		for label, extra in (("AUTO_CREATE_DB=true", {"AUTO_CREATE_DB": "true"}), ("boot normal", {})):
+			results = [probe({**env, **extra}) for _ in range(args.runs)]
+			times = [r["elapsed"] for r in results]
+			last = results[-1]
+			print(f"{label:<20}: médiane {statistics.median(times) * 1000:6.0f} ms, {last['statements']} requêtes SQL, "
+				f"modules lourds chargés: {', '.join(last['heavy']) or 'aucun'}")
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,150 @@
+"""Vérifie par EXPLAIN que les requêtes chaudes utilisent un index (pas de scan séquentiel).
+
+Peuple une base jetable avec un gros jeu de données puis inspecte le plan de
+chaque requête: `EXPLAIN QUERY PLAN` sur SQLite, `EXPLAIN (FORMAT JSON)` sur
+Postgres. Code de sortie 1 si une requête retombe sur un scan complet.
+
+Usage:
+	python benchmarks/check_query_plans.py                       # SQLite temporaire
+	DATABASE_URL=postgresql://.../scratch python benchmarks/check_query_plans.py
+À lancer uniquement sur une base de test: le script y insère des données.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_tmpdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'plans.db')}")
+os.environ["AUTO_CREATE_DB"] = "false"
+
+from sqlalchemy import insert, text, tuple_  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Project, PublicProject, PublicRepo, Task, User  # noqa: E402
+from app.routes.projects import PROJECT_LIST_COLUMNS  # noqa: E402
+from app.routes.tasks import TASK_LIST_COLUMNS  # noqa: E402
+
+WATCHED_TABLES = {"tasks", "projects", "public_projects", "public_repos"}
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def seed(n_users: int, projects_per_user: int, tasks_per_project: int):
+	base = datetime(2025, 1, 1)
+	db.session.execute(insert(User), [
+		{"id": u, "email": f"user{u}@example.com", "username": f"user{u}", "created_at": base, "updated_at": base}
+		for u in range(1, n_users + 1)
+	])
+	projects = []
+	for u in range(1, n_users + 1):
+		for k in range(projects_per_user):
+			pid = len(projects) + 1
+			ts = base + timedelta(minutes=pid)
+			projects.append({"id": pid, "owner_id": u, "title": f"Projet {pid}", "created_at": ts, "updated_at": ts})
+	db.session.execute(insert(Project), projects)
+	batch = []
+	for p in projects:
+		for i in range(tasks_per_project):
+			ts = p["created_at"] + timedelta(seconds=i)
+			batch.append({"project_id": p["id"], "title": f"Tâche {i}", "created_at": ts, "updated_at": ts})
+			if len(batch) >= 20000:
+				db.session.execute(insert(Task), batch)
+				batch = []
+	if batch:
+		db.session.execute(insert(Task), batch)
+	db.session.execute(insert(PublicProject), [
+		{"user_id": p["owner_id"], "project_id": p["id"], "created_at": base, "updated_at": base}
+		for p in projects[::projects_per_user]
+	])
+	db.session.execute(insert(PublicRepo), [
+		{"user_id": u, "provider": "github", "repo_full_name": f"user{u}/repo", "created_at": base, "updated_at": base}
+		for u in range(1, n_users + 1)
+	])
+	db.session.commit()
+	# Statistiques à jour pour que le planificateur choisisse sur des données réalistes
+	db.session.execute(text("ANALYZE"))
+	db.session.commit()
+
+
+def hot_queries():
+	cursor = (datetime(2025, 1, 2), 1000)
+	return {
+		"tasks by project (list_tasks)": db.select(*TASK_LIST_COLUMNS)
+		.where(Task.project_id == 42)
+		.order_by(Task.created_at.desc(), Task.id.desc()),
+		"tasks by project, keyset page": db.select(*TASK_LIST_COLUMNS)
+		.where(Task.project_id == 42, tuple_(Task.created_at, Task.id) < tuple_(*cursor))
+		.order_by(Task.created_at.desc(), Task.id.desc()).limit(51),
+		"roadmap dedupe titles": db.select(Task.title).where(Task.project_id == 42),
+		"roadmap diff title lookup": db.select(Task.id, Task.title).where(Task.project_id == 42, Task.title.in_(["Tâche 1", "Tâche 2"])),
+		"projects keyset page": db.select(*PROJECT_LIST_COLUMNS)
+		.where(tuple_(Project.created_at, Project.id) < tuple_(*cursor))
+		.order_by(Project.created_at.desc(), Project.id.desc()).limit(51),
+		"projects by owner": db.select(*PROJECT_LIST_COLUMNS)
+		.where(Project.owner_id == 7)
+		.order_by(Project.created_at.desc(), Project.id.desc()).limit(51),
+		"portfolio public projects": db.select(PublicProject.project_id).where(PublicProject.user_id == 7),
+		"portfolio public repos": db.select(PublicRepo).where(PublicRepo.user_id == 7, PublicRepo.provider == "github"),
+	}
+
+
+def explain(stmt):
+	conn = db.session.connection()
+	compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+	if conn.dialect.name == "postgresql":
+		plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+		plan = json.loads(plan) if isinstance(plan, str) else plan
+		return _pg_problems(plan[0]["Plan"]), json.dumps(plan, indent=1)
+	params = tuple(compiled.params[k] for k in compiled.positiontup)
+	rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+	details = [r[-1] for r in rows]
+	problems = []
+	for detail in details:
+		m = SQLITE_FULL_SCAN.match(detail)
+		if m and m.group(1) in WATCHED_TABLES:
+			problems.append(detail)
+		if "USE TEMP B-TREE" in detail:
+			problems.append(detail)
+	return problems, "\n".join(details)
+
+
+def _pg_problems(node):
+	problems = []
+	if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES:
+		problems.append(f"Seq Scan on {node['Relation Name']}")
+	for child in node.get("Plans", []):
+		problems.extend(_pg_problems(child))
+	return problems
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--users", type=int, default=200)
+	parser.add_argument("--projects-per-user", type=int, default=5)
+	parser.add_argument("--tasks-per-project", type=int, default=200)
+	parser.add_argument("-v", "--verbose", action="store_true")
+	args = parser.parse_args()
+
+	app = create_app()
+	with app.app_context():
+		db.create_all()
+		if not db.session.scalar(db.select(Task.id).limit(1)):
+			seed(args.users, args.projects_per_user, args.tasks_per_project)
+		failures = 0
+		for name, stmt in hot_queries().items():
+			problems, plan = explain(stmt)
+			status = "FAIL" if problems else "ok"
+			print(f"[{status:>4}] {name}" + (f": {'; '.join(problems)}" if problems else ""))
+			if args.verbose or problems:
+				print("       " + plan.replace("\n", "\n       "))
+			failures += bool(problems)
+	sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+	main()
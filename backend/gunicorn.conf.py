@@ -0,0 +1,112 @@
+"""Profil serveur gunicorn (chargé par `gunicorn -c gunicorn.conf.py wsgi:app`).
+
+GUNICORN_PROFILE choisit le type de worker:
+- gthread (défaut): quelques processus x GUNICORN_THREADS threads; les routes qui
+  attendent GitHub / OpenAI / le pool de hachage ne bloquent qu'un thread.
+- gevent: un processus par CPU, GUNICORN_WORKER_CONNECTIONS greenlets chacun
+  (nécessite `pip install gevent`, + `psycogreen` pour Postgres).
+- sync: un processus par requête en cours (comportement historique).
+
+Le nombre de processus suit les CPU réellement alloués au conteneur (quota
+cgroup), sauf WEB_CONCURRENCY. L'application est chargée une fois dans le
+maître (preload_app, code partagé copy-on-write); post_fork recrée dans chaque
+worker tout ce qui tient une connexion (pools SQLAlchemy, sessions HTTP,
+pools de processus) pour qu'aucune socket ne soit partagée entre processus.
+Les métriques de /metrics sont sommées sur les workers (app/metrics.py):
+worker_exit publie les dernières valeurs d'un worker, child_exit les garde
+dans les totaux une fois le worker parti.
+"""
+import os
+
+profile = os.getenv("GUNICORN_PROFILE", "gthread").lower()
+if profile == "gevent":
+	# Avant tout import de l'application (preload): threading, ssl, socket coopératifs
+	from gevent import monkey
+	monkey.patch_all()
+	try:
+		from psycogreen.gevent import patch_psycopg
+		patch_psycopg()
+	except ImportError:
+		pass
+
+
+def _cpu_count() -> int:
+	# Quota cgroup v2 ("max 100000" ou "200000 100000"), sinon CPU visibles par le processus
+	try:
+		with open("/sys/fs/cgroup/cpu.max") as f:
+			quota, period = f.read().split()
+		if quota != "max":
+			return max(1, int(int(quota) / int(period)))
+	except (OSError, ValueError):
+		pass
+	try:
+		return len(os.sched_getaffinity(0))
+	except AttributeError:
+		return os.cpu_count() or 1
+
+
+cpus = _cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+if profile == "gevent":
+	worker_class = "gevent"
+	workers = int(os.getenv("WEB_CONCURRENCY", cpus))
+	worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+	threads = 1
+elif profile == "sync":
+	worker_class = "sync"
+	workers = int(os.getenv("WEB_CONCURRENCY", cpus * 2 + 1))
+	threads = 1
+else:
+	profile = "gthread"
+	worker_class = "gthread"
+	workers = int(os.getenv("WEB_CONCURRENCY", min(cpus * 2 + 1, 8)))
+	threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Lu par l'application pour dimensionner ses pools (connexions concurrentes par processus)
+os.environ["GUNICORN_THREADS"] = str(worker_connections if profile == "gevent" else threads)
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recyclage périodique des workers (fuites mémoire), décalé pour ne pas tous redémarrer ensemble
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+# Heartbeat des workers en mémoire (le disque overlay d'un conteneur peut bloquer)
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+
+
+def when_ready(server):
+	from app.metrics import metrics
+	metrics.wipe()
+	server.log.info("profile %s: %s workers x %s (%s CPU), preload=%s", profile, workers,
+		f"{worker_connections} connections" if profile == "gevent" else f"{threads} threads", cpus, preload_app)
+
+
+def post_fork(server, worker):
+	from app import db
+	from app.github import reset_session
+	from app.llm import llm_provider
+	from app.passwords import password_hasher
+
+	flask_app = worker.app.wsgi()
+	with flask_app.app_context():
+		for engine in db.engines.values():
+			# close=False: les connexions héritées restent ouvertes pour le maître, le worker en rouvre
+			engine.dispose(close=False)
+	reset_session()
+	llm_provider.reset()
+	password_hasher.reset()
+
+
+def worker_exit(server, worker):
+	from app.metrics import metrics
+	metrics.flush()
+
+
+def child_exit(server, worker):
+	from app.metrics import metrics
+	metrics.mark_dead(worker.pid)
@@ -0,0 +1,49 @@
+"""hot path indexes for tasks, projects and repository links
+
+Revision ID: 3f1c2a7d9b10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+Les tables existantes ont été créées par db.create_all() (AUTO_CREATE_DB):
+cette révision sert de base et n'ajoute que les index manquants.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_tasks_project_created_id", "tasks", ["project_id", "created_at", "id"]),
+    ("ix_tasks_project_title", "tasks", ["project_id", "title"]),
+    ("ix_projects_created_id", "projects", ["created_at", "id"]),
+    ("ix_projects_owner_created_id", "projects", ["owner_id", "created_at", "id"]),
+    ("ix_repository_links_project_id", "repository_links", ["project_id"]),
+]
+
+
+def _existing_indexes(inspector, table):
+    if not inspector.has_table(table):
+        return None
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = _existing_indexes(inspector, table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, _ in reversed(INDEXES):
+        existing = _existing_indexes(inspector, table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
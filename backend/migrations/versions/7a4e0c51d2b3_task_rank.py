@@ -0,0 +1,33 @@
+"""task rank for ordering inside kanban columns
+
+Revision ID: 7a4e0c51d2b3
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e0c51d2b3'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("tasks"):
+        return
+    if "rank" not in {c["name"] for c in inspector.get_columns("tasks")}:
+        with op.batch_alter_table("tasks") as batch_op:
+            batch_op.add_column(sa.Column("rank", sa.String(length=64), nullable=True))
+    if "ix_tasks_column_rank" not in {ix["name"] for ix in inspector.get_indexes("tasks")}:
+        op.create_index("ix_tasks_column_rank", "tasks", ["kanban_column_id", "rank"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_column_rank", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("rank")
@@ -0,0 +1,36 @@
+"""cluster-wide rate limit counters
+
+Revision ID: 9d3e5f1a7c20
+Revises: 4b6d1a8e2f07
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3e5f1a7c20'
+down_revision = '4b6d1a8e2f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("rate_limit_counters"):
+        return
+    op.create_table(
+        "rate_limit_counters",
+        sa.Column("node", sa.String(length=255), primary_key=True),
+        sa.Column("key", sa.String(length=512), primary_key=True),
+        sa.Column("bucket", sa.BigInteger(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_rate_limit_counters_expires_at", "rate_limit_counters", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_rate_limit_counters_expires_at", table_name="rate_limit_counters")
+    op.drop_table("rate_limit_counters")
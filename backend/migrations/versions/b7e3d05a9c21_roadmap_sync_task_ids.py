@@ -0,0 +1,32 @@
+"""ids of the tasks created by roadmap sync
+
+Revision ID: b7e3d05a9c21
+Revises: 9d3e5f1a7c20
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3d05a9c21'
+down_revision = '9d3e5f1a7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("roadmap_sync_states"):
+        return
+    if "task_ids" not in {c["name"] for c in inspector.get_columns("roadmap_sync_states")}:
+        with op.batch_alter_table("roadmap_sync_states") as batch_op:
+            batch_op.add_column(sa.Column("task_ids", sa.Text(), nullable=True))
+
+
+def downgrade():
+    if not sa.inspect(op.get_bind()).has_table("roadmap_sync_states"):
+        return
+    with op.batch_alter_table("roadmap_sync_states") as batch_op:
+        batch_op.drop_column("task_ids")
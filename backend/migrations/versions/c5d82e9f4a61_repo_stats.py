@@ -0,0 +1,43 @@
+"""repo stats table for the portfolio
+
+Revision ID: c5d82e9f4a61
+Revises: 7a4e0c51d2b3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d82e9f4a61'
+down_revision = '7a4e0c51d2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("repo_stats"):
+        return
+    op.create_table(
+        "repo_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider", sa.String(length=20), nullable=False),
+        sa.Column("repo_full_name", sa.String(length=255), nullable=False),
+        sa.Column("stars", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("dominant_language", sa.String(length=80), nullable=True),
+        sa.Column("languages", sa.Text(), nullable=True),
+        sa.Column("commits_30d", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fetched_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("provider", "repo_full_name", name="uq_repo_stats_provider_repo"),
+    )
+    op.create_index("ix_repo_stats_expires_at", "repo_stats", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_repo_stats_expires_at", table_name="repo_stats")
+    op.drop_table("repo_stats")
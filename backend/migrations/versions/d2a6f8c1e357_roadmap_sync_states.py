@@ -0,0 +1,43 @@
+"""roadmap sync state table
+
+Revision ID: d2a6f8c1e357
+Revises: b7e3d05a9c21
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a6f8c1e357'
+down_revision = 'b7e3d05a9c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Jusqu'ici créée par db.create_all() seulement: une base migrée par alembic seul ne l'avait pas
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("roadmap_sync_states"):
+        return
+    op.create_table(
+        "roadmap_sync_states",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("path", sa.String(length=512), nullable=False),
+        sa.Column("file_hash", sa.String(length=64), nullable=False),
+        sa.Column("file_mtime_ns", sa.BigInteger(), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("item_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fingerprints", sa.Text(), nullable=True),
+        sa.Column("task_ids", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_roadmap_sync_states_project_id", "roadmap_sync_states", ["project_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_roadmap_sync_states_project_id", table_name="roadmap_sync_states")
+    op.drop_table("roadmap_sync_states")
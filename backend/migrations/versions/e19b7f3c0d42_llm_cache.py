@@ -0,0 +1,40 @@
+"""llm response cache
+
+Revision ID: e19b7f3c0d42
+Revises: c5d82e9f4a61
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e19b7f3c0d42'
+down_revision = 'c5d82e9f4a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("llm_cache_entries"):
+        return
+    op.create_table(
+        "llm_cache_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=80), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_hit_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_llm_cache_entries_key", "llm_cache_entries", ["key"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_llm_cache_entries_key", table_name="llm_cache_entries")
+    op.drop_table("llm_cache_entries")
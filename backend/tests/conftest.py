@@ -0,0 +1,30 @@
+import pytest
+
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+	# Base, compteurs et métriques isolés par test; hachage dans le thread (pas de pool spawn)
+	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/test.db")
+	monkeypatch.setenv("METRICS_DB_PATH", str(tmp_path / "metrics.db"))
+	monkeypatch.setenv("CACHE_SQLITE_PATH", str(tmp_path / "cache.db"))
+	monkeypatch.setenv("RATELIMIT_STORAGE_URI", "memory://")
+	monkeypatch.setenv("RATELIMIT_ENABLED", "false")
+	monkeypatch.setenv("PASSWORD_HASH_WORKERS", "0")
+	monkeypatch.delenv("AUTO_CREATE_DB", raising=False)
+	flask_app = create_app()
+	flask_app.config["TESTING"] = True
+	with flask_app.app_context():
+		db.create_all()
+		yield flask_app
+		db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+	user = User(email="alice@example.com", username="alice", name="Alice")
+	db.session.add(user)
+	db.session.commit()
+	return user
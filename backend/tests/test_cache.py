@@ -0,0 +1,84 @@
+import threading
+import time
+
+from app.cache import ResponseCache, SQLiteBackend
+
+
+def _worker_cache(path):
+	# Un ResponseCache par "worker", même fichier partagé
+	cache = ResponseCache("test", ttl=60.0, local_ttl=0.05)
+	cache.shared = SQLiteBackend(path)
+	return cache
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+	path = str(tmp_path / "cache.db")
+	worker_a, worker_b = _worker_cache(path), _worker_cache(path)
+	assert worker_a.get_or_build("alice", lambda: "v1") == "v1"
+	assert worker_b.get_or_build("alice", lambda: "rebuilt") == "v1"
+
+	worker_a.invalidate("alice")
+	time.sleep(0.1)
+	assert worker_b.get_or_build("alice", lambda: "v2") == "v2"
+
+
+def test_invalidation_during_build_is_not_cached(tmp_path):
+	cache = _worker_cache(str(tmp_path / "cache.db"))
+	started, release = threading.Event(), threading.Event()
+
+	def slow_build():
+		started.set()
+		release.wait(5)
+		return "stale"
+
+	thread = threading.Thread(target=cache.get_or_build, args=("alice", slow_build))
+	thread.start()
+	started.wait(5)
+	cache.invalidate("alice")
+	release.set()
+	thread.join()
+	assert cache.get_or_build("alice", lambda: "fresh") == "fresh"
+	assert cache._inflight == {}
+
+
+def test_sqlite_backend_add_respects_expiry(tmp_path):
+	backend = SQLiteBackend(str(tmp_path / "cache.db"))
+	assert backend.add("lock", "1", 0.05)
+	assert not backend.add("lock", "1", 0.05)
+	time.sleep(0.1)
+	assert backend.add("lock", "1", 0.05)
+	backend.delete("lock")
+	assert backend.get("lock") is None
+
+
+def test_invalidation_from_another_worker_discards_running_build(tmp_path):
+	path = str(tmp_path / "cache.db")
+	worker_a, worker_b = _worker_cache(path), _worker_cache(path)
+	started, release = threading.Event(), threading.Event()
+
+	def slow_build():
+		started.set()
+		release.wait(5)
+		return "stale"
+
+	thread = threading.Thread(target=worker_a.get_or_build, args=("alice", slow_build))
+	thread.start()
+	started.wait(5)
+	# Le flight de A n'est pas visible depuis B: seule la génération partagée le prévient
+	worker_b.invalidate("alice")
+	release.set()
+	thread.join()
+	assert worker_a.shared.get(worker_a._key("alice")) is None
+	assert worker_b.get_or_build("alice", lambda: "fresh") == "fresh"
+	assert worker_a.get_or_build("alice", lambda: "rebuilt") == "fresh"
+
+
+def test_sqlite_backend_incr_restarts_after_expiry(tmp_path):
+	backend = SQLiteBackend(str(tmp_path / "cache.db"))
+	backend.incr("gen", 60)
+	backend.incr("gen", 60)
+	assert backend.get("gen") == "2"
+	backend.incr("gen", -1)
+	assert backend.get("gen") is None
+	backend.incr("gen", 60)
+	assert backend.get("gen") == "1"
@@ -0,0 +1,90 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app import github
+from app.github import GitHubClient
+
+PAGES = 3
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+	"""/user/repos paginé (Link rel="last"), ETag par page et 304 sur If-None-Match."""
+
+	def do_GET(self):
+		url = urlparse(self.path)
+		page = int(parse_qs(url.query).get("page", ["1"])[0])
+		etag = f'"{self.headers["Authorization"]}-{page}"'
+		self.server.calls.append((url.path, page, self.headers.get("If-None-Match")))
+		if self.headers.get("If-None-Match") == etag:
+			self.send_response(304)
+			self.send_header("ETag", etag)
+			self.end_headers()
+			return
+		body = json.dumps([{"full_name": f"alice/repo-{page}-{i}"} for i in range(2)]).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("ETag", etag)
+		base = f"http://{self.headers['Host']}{url.path}"
+		self.send_header("Link", f'<{base}?page={min(page + 1, PAGES)}&per_page=100>; rel="next", <{base}?page={PAGES}&per_page=100>; rel="last"')
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+	server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+	server.calls = []
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	monkeypatch.setenv("GITHUB_API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+	github._page_cache.clear()
+	github.reset_session()
+	yield server
+	server.shutdown()
+	server.server_close()
+	github.reset_session()
+	github._page_cache.clear()
+
+
+def test_follows_link_header_pagination(fake_github):
+	repos = GitHubClient("token-a", account_key="user:1").list_user_repos()
+	assert len(repos) == PAGES * 2
+	assert [r["full_name"] for r in repos][:2] == ["alice/repo-1-0", "alice/repo-1-1"]
+	assert sorted(page for _, page, _ in fake_github.calls) == [1, 2, 3]
+
+
+def test_unchanged_pages_are_revalidated_with_304(fake_github):
+	client = GitHubClient("token-a", account_key="user:1")
+	first = client.list_user_repos()
+	fake_github.calls.clear()
+	assert client.list_user_repos() == first
+	# Chaque page est renvoyée avec son ETag; le corps vient de _page_cache
+	assert all(etag is not None for _, _, etag in fake_github.calls)
+	assert len(fake_github.calls) == PAGES
+
+
+def test_page_cache_is_partitioned_per_account(fake_github):
+	GitHubClient("token-a", account_key="user:1").list_user_repos()
+	fake_github.calls.clear()
+	repos = GitHubClient("token-b", account_key="user:2").list_user_repos()
+	# Aucun ETag du compte 1 n'est rejoué pour le compte 2
+	assert all(etag is None for _, _, etag in fake_github.calls)
+	assert len(repos) == PAGES * 2
+
+
+def test_single_worker_client_paginates_without_a_pool(fake_github, monkeypatch):
+	def no_pool(*args, **kwargs):
+		raise AssertionError("pool imbriqué")
+
+	monkeypatch.setattr(github, "ThreadPoolExecutor", no_pool)
+	repos = GitHubClient("token-a", account_key="user:1", max_workers=1).list_user_repos()
+	assert len(repos) == PAGES * 2
+	assert [page for _, page, _ in fake_github.calls] == [1, 2, 3]
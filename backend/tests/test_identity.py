@@ -0,0 +1,70 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import db
+from app.identity import identity_cache
+
+
+def _headers(user):
+	return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+def _user_selects(client, path, headers):
+	statements = []
+
+	def record(_conn, _cursor, statement, *_args):
+		statements.append(statement)
+
+	event.listen(db.engine, "before_cursor_execute", record)
+	try:
+		response = client.get(path, headers=headers)
+	finally:
+		event.remove(db.engine, "before_cursor_execute", record)
+	return response, [s for s in statements if "FROM users" in s]
+
+
+def test_routes_without_current_user_do_not_load_the_user(app, user):
+	identity_cache.clear()
+	response, selects = _user_selects(app.test_client(), "/api/tasks", _headers(user))
+	assert response.status_code == 200
+	assert selects == []
+
+
+def test_current_user_is_loaded_once_then_cached(app, user):
+	identity_cache.clear()
+	client, headers = app.test_client(), _headers(user)
+	hits = identity_cache.stats["hits"]
+	response, selects = _user_selects(client, "/api/auth/me", headers)
+	assert response.get_json()["email"] == "alice@example.com"
+	assert len(selects) == 1
+	response, selects = _user_selects(client, "/api/auth/me", headers)
+	assert response.status_code == 200
+	assert selects == []
+	assert identity_cache.stats["hits"] == hits + 1
+
+
+def test_deleted_user_gets_401(app, user):
+	identity_cache.clear()
+	headers = _headers(user)
+	db.session.delete(user)
+	db.session.commit()
+	assert app.test_client().get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_invalidation_during_read_is_not_cached(app, user):
+	identity_cache.clear()
+	user_id = user.id
+
+	def invalidate_mid_read(*_args):
+		identity_cache.invalidate(user_id)
+
+	event.listen(db.engine, "before_cursor_execute", invalidate_mid_read)
+	try:
+		assert identity_cache.get(user_id).email == "alice@example.com"
+	finally:
+		event.remove(db.engine, "before_cursor_execute", invalidate_mid_read)
+	assert identity_cache.local.get(user_id) is None
+	# Aucune trace par utilisateur une fois la lecture terminée
+	assert identity_cache._reads == {}
+	identity_cache.get(user_id)
+	assert identity_cache.local.get(user_id) is not None
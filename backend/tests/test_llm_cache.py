@@ -0,0 +1,50 @@
+from app import db
+from app.llm import LLMCache
+from app.models import Project
+
+
+def test_follower_stops_waiting_for_a_stuck_leader(app):
+	cache = LLMCache(wait_timeout=0.05)
+	# Meneur bloqué: son vol n'est jamais terminé
+	cache._join("k")
+	assert cache.get_or_call("k", "m", lambda: "direct") == ("direct", False)
+	assert cache.stats["wait_timeouts"] == 1
+	assert cache.get_or_call("k", "m", lambda: "again") == ("direct", True)
+
+
+def test_identical_streams_share_one_upstream_call(app):
+	cache = LLMCache(wait_timeout=1.0)
+	opened = []
+
+	def open_stream():
+		opened.append(1)
+		yield from ["- [ ] a\n", "- [ ] b\n"]
+
+	leader, cached = cache.get_or_stream("k", "m", open_stream)
+	assert not cached
+	follower, cached = cache.get_or_stream("k", "m", open_stream)
+	assert cached
+	assert list(leader) == ["- [ ] a\n", "- [ ] b\n"]
+	assert list(follower) == ["- [ ] a\n", "- [ ] b\n"]
+	assert len(opened) == 1
+	assert cache.get_or_call("k", "m", lambda: "unused") == ("- [ ] a\n- [ ] b\n", True)
+
+
+def test_stream_abandoned_before_first_chunk_releases_followers(app):
+	cache = LLMCache(wait_timeout=1.0)
+	leader, _ = cache.get_or_stream("k", "m", lambda: iter(["x"]))
+	# Client parti avant le premier fragment
+	leader.close()
+	assert cache.get_or_call("k", "m", lambda: "direct") == ("direct", False)
+	assert cache.stats["wait_timeouts"] == 0
+
+
+def test_db_hit_does_not_commit_the_request_session(app, user):
+	cache = LLMCache()
+	cache.put("k", "m", "answer")
+	cache.local.clear()
+	db.session.add(Project(owner_id=user.id, title="pending"))
+	assert cache.lookup("k") == "answer"
+	assert cache.stats["db_hits"] == 1
+	db.session.rollback()
+	assert db.session.scalar(db.select(db.func.count(Project.id))) == 0
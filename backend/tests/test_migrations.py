@@ -0,0 +1,14 @@
+from flask_migrate import upgrade
+from sqlalchemy import inspect
+
+from app import db, init_migrate
+
+
+def test_alembic_alone_creates_roadmap_sync_states(app):
+	# Base antérieure à la synchro incrémentale: tout sauf roadmap_sync_states, migrée par alembic seul
+	db.drop_all()
+	db.metadata.create_all(db.engine, tables=[t for name, t in db.metadata.tables.items() if name != "roadmap_sync_states"])
+	init_migrate(app)
+	upgrade()
+	columns = {c["name"] for c in inspect(db.engine).get_columns("roadmap_sync_states")}
+	assert {"project_id", "fingerprints", "task_ids"} <= columns
@@ -0,0 +1,39 @@
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models import Project, Task, User
+from app.pagination import DEFAULT_LIMIT
+
+
+def _headers(user):
+	return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+def test_tasks_are_paginated_without_parameters(app, user):
+	project = Project(owner_id=user.id, title="P")
+	db.session.add(project)
+	db.session.flush()
+	db.session.add_all(Task(project_id=project.id, title=f"t{i}") for i in range(DEFAULT_LIMIT + 5))
+	db.session.commit()
+	client, headers = app.test_client(), _headers(user)
+
+	first = client.get(f"/api/tasks?project_id={project.id}", headers=headers).get_json()
+	assert len(first["items"]) == DEFAULT_LIMIT
+	assert first["next_cursor"]
+	rest = client.get(f"/api/tasks?project_id={project.id}&cursor={first['next_cursor']}", headers=headers).get_json()
+	assert len(rest["items"]) == 5
+	assert rest["next_cursor"] is None
+
+
+def test_projects_require_auth_and_are_scoped_to_owner(app, user):
+	bob = User(email="bob@example.com", username="bob")
+	db.session.add(bob)
+	db.session.flush()
+	db.session.add_all([Project(owner_id=user.id, title="mine"), Project(owner_id=bob.id, title="bob's")])
+	db.session.commit()
+	client = app.test_client()
+
+	assert client.get("/api/projects").status_code == 401
+	page = client.get("/api/projects?owner_id=%d" % bob.id, headers=_headers(user)).get_json()
+	assert [p["title"] for p in page["items"]] == ["mine"]
+	assert page["next_cursor"] is None
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db, repo_refresh
+from app.github import GitHubClient
+from app.models import OAuthAccount, PublicRepo, User
+from app.repo_refresh import RepoRefresher
+
+
+@pytest.fixture
+def two_accounts(app):
+	repos = []
+	for index, name in enumerate(("limited", "fresh")):
+		user = User(email=f"{name}@example.com", username=name)
+		db.session.add(user)
+		db.session.flush()
+		db.session.add(OAuthAccount(user_id=user.id, provider="github", provider_user_id=name, access_token=f"token-{name}"))
+		# Le dépôt du compte limité est le plus ancien: il passerait toujours en premier
+		repo = PublicRepo(user_id=user.id, provider="github", repo_full_name=f"{name}/repo",
+			last_synced_at=datetime.utcnow() - timedelta(days=10 - index))
+		db.session.add(repo)
+		repos.append(repo)
+	db.session.commit()
+	return repos
+
+
+def test_rate_limited_account_does_not_starve_others(two_accounts, monkeypatch):
+	limited, fresh = two_accounts
+	monkeypatch.setattr(GitHubClient, "seconds_until_available",
+		lambda self, min_remaining=1: 60.0 if self.token == "token-limited" else 0.0)
+	monkeypatch.setattr(GitHubClient, "get_repo", lambda self, full_name: {"stargazers_count": 7})
+	monkeypatch.setattr("app.routes.portfolio.invalidate_public_portfolio", lambda user_id: None)
+	refresher = RepoRefresher(max_workers=1, batch_size=1)
+
+	assert refresher.refresh_batch() == 0
+	assert refresher.stats["rate_limited"] == 1
+	assert refresher.refresh_batch() == 1
+	assert db.session.get(PublicRepo, fresh.id).stars == 7
+
+
+def test_run_forever_survives_a_failed_batch(app, monkeypatch):
+	calls = []
+
+	def refresh_batch(self):
+		calls.append(1)
+		if len(calls) == 1:
+			raise RuntimeError("database unavailable")
+		raise KeyboardInterrupt
+
+	monkeypatch.setattr(RepoRefresher, "refresh_batch", refresh_batch)
+	monkeypatch.setattr(repo_refresh.time, "sleep", lambda seconds: None)
+	refresher = RepoRefresher()
+	with pytest.raises(KeyboardInterrupt):
+		refresher.run_forever(interval=0)
+	assert len(calls) == 2
+	assert refresher.stats["errors"] == 1
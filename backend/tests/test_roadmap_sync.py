@@ -0,0 +1,47 @@
+from app import db
+from app.models import Project, Task
+from app.roadmap import sync_roadmap_file
+
+
+def _write(path, *lines):
+	path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _titles(project_id):
+	return sorted(db.session.scalars(db.select(Task.title).where(Task.project_id == project_id)))
+
+
+def test_sync_creates_updates_and_removes_synced_tasks(app, user, tmp_path):
+	project = Project(owner_id=user.id, title="P")
+	db.session.add(project)
+	db.session.commit()
+	roadmap = tmp_path / "roadmap.md"
+	_write(roadmap, "- [ ] Alpha", "- [ ] Beta")
+	result = sync_roadmap_file(project.id, str(roadmap))
+	assert len(result["created"]) == 2
+
+	_write(roadmap, "- [x] Alpha")
+	result = sync_roadmap_file(project.id, str(roadmap))
+	assert len(result["updated"]) == 1
+	assert len(result["removed"]) == 1
+	assert _titles(project.id) == ["Alpha"]
+
+
+def test_sync_keeps_manual_task_sharing_a_removed_title(app, user, tmp_path):
+	project = Project(owner_id=user.id, title="P")
+	db.session.add(project)
+	db.session.commit()
+	manual = Task(project_id=project.id, title="Alpha")
+	db.session.add(manual)
+	db.session.commit()
+	roadmap = tmp_path / "roadmap.md"
+	_write(roadmap, "- [ ] Alpha", "- [ ] Beta")
+	result = sync_roadmap_file(project.id, str(roadmap))
+	# Alpha existait déjà: dédoublonné, pas créé par la synchro
+	assert len(result["created"]) == 1
+
+	_write(roadmap, "- [ ] Gamma")
+	result = sync_roadmap_file(project.id, str(roadmap))
+	assert _titles(project.id) == ["Alpha", "Gamma"]
+	assert manual.id not in result["removed"]
+	assert db.session.get(Task, manual.id) is not None
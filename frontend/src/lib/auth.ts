@@ -28,3 +28,19 @@ export function isAuthenticated(): boolean {
 	return Boolean(getToken())
 }
 
+
+// Listes paginées par curseur ({ items, next_cursor }): suit les pages jusqu'au bout
+export async function apiFetchAll<T = any>(url: string, init: RequestInit = {}): Promise<T[]> {
+	const items: T[] = []
+	let cursor: string | null = null
+	do {
+		const sep = url.includes('?') ? '&' : '?'
+		const page = `${url}${sep}limit=500${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+		const r = await apiFetch(page, init)
+		if (!r.ok) throw new Error(`HTTP ${r.status}`)
+		const data = await r.json()
+		items.push(...data.items)
+		cursor = data.next_cursor
+	} while (cursor)
+	return items
+}
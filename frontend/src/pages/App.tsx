@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
-import { apiFetch, clearToken, getApiBaseUrl, getToken, setToken } from '../lib/auth'
+import { apiFetch, apiFetchAll, clearToken, getApiBaseUrl, getToken, setToken } from '../lib/auth'
 
 type Project = {
 	id: number
@@ -19,17 +19,20 @@ export default function App() {
 	const [email, setEmail] = useState('')
 	const [password, setPassword] = useState('')
 
-	useEffect(() => {
-		const apiBase = getApiBaseUrl()
-		fetch(`${apiBase}/api/projects`)
-			.then(r => r.json())
+	// Projets de l'utilisateur connecté (la liste n'est plus publique)
+	function loadProjects() {
+		apiFetchAll<Project>(`${getApiBaseUrl()}/api/projects`)
 			.then(setProjects)
 			.catch(e => setError(String(e)))
+	}
 
+	useEffect(() => {
+		const apiBase = getApiBaseUrl()
 		if (getToken()) {
 			apiFetch(`${apiBase}/api/auth/me`).then(async r => {
 				if (r.ok) setMe(await r.json())
 			})
+			loadProjects()
 		}
 	}, [])
 
@@ -48,6 +51,7 @@ export default function App() {
 			setToken(data.access_token)
 			const meRes = await apiFetch(`${apiBase}/api/auth/me`)
 			if (meRes.ok) setMe(await meRes.json())
+			loadProjects()
 		} catch (err: any) {
 			setError(err.message || String(err))
 		}
@@ -56,6 +60,7 @@ export default function App() {
 	function logout() {
 		clearToken()
 		setMe(null)
+		setProjects([])
 	}
 
 	const apiBase = getApiBaseUrl()
@@ -1,5 +1,5 @@
-import { useEffect, useState } from 'react'
-import { apiFetch, getApiBaseUrl } from '../lib/auth'
+import { useEffect, useRef, useState } from 'react'
+import { apiFetch, apiFetchAll, getApiBaseUrl } from '../lib/auth'
 
 type Project = {
 	id: number
@@ -8,6 +8,9 @@ type Project = {
 	roadmap_path?: string | null
 }
 
+// Au-delà, on cesse de suivre le job de synchro (il continue côté serveur)
+const SYNC_TIMEOUT_MS = 120_000
+
 export default function Dashboard() {
 	const [me, setMe] = useState<{ email: string } | null>(null)
 	const [projects, setProjects] = useState<Project[]>([])
@@ -26,19 +29,20 @@ export default function Dashboard() {
 	const [roadmapPath, setRoadmapPath] = useState('')
 	const [detecting, setDetecting] = useState(false)
 	const [candidates, setCandidates] = useState<string[]>([])
+	const syncPolling = useRef<AbortController | null>(null)
+
+	// Plus de suivi de job une fois la page quittée
+	useEffect(() => () => syncPolling.current?.abort(), [])
 
 	useEffect(() => {
 		const api = getApiBaseUrl()
 		apiFetch(`${api}/api/auth/me`).then(async r => {
 			if (r.ok) setMe(await r.json())
 		}).catch(e => setError(String(e)))
-		apiFetch(`${api}/api/projects`).then(async r => {
-			if (r.ok) {
-				const list: Project[] = await r.json()
-				setProjects(list)
-				if (list.length) setSelectedProjectId(list[0].id)
-				if (list.length) setRoadmapPath(list[0].roadmap_path || '')
-			}
+		apiFetchAll<Project>(`${api}/api/projects`).then(list => {
+			setProjects(list)
+			if (list.length) setSelectedProjectId(list[0].id)
+			if (list.length) setRoadmapPath(list[0].roadmap_path || '')
 		}).catch(e => setError(String(e)))
 		apiFetch(`${api}/api/portfolio/me`).then(async r => { if (r.ok) setPortfolio(await r.json()) })
 	}, [])
@@ -70,8 +74,16 @@ export default function Dashboard() {
 		if (!selectedProjectId) return
 		const api = getApiBaseUrl()
 		await apiFetch(`${api}/api/projects/${selectedProjectId}`, { method: 'PUT', body: JSON.stringify({ roadmap_path: roadmapPath }) })
-		const r = await apiFetch(`${api}/api/projects`)
-		if (r.ok) setProjects(await r.json())
+		setProjects(await apiFetchAll<Project>(`${api}/api/projects`))
+	}
+
+	async function reloadTasks() {
+		const api = getApiBaseUrl()
+		try {
+			setTasks(await apiFetchAll(`${api}/api/tasks?project_id=${selectedProjectId}`))
+		} catch (e) {
+			setError(String(e))
+		}
 	}
 
 	async function loadGithubRepos() {
@@ -97,14 +109,13 @@ export default function Dashboard() {
 	useEffect(() => {
 		const api = getApiBaseUrl()
 		if (selectedProjectId) {
-			Promise.all([
-				apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`),
-				apiFetch(`${api}/api/kanban/board?project_id=${selectedProjectId}`)
-			]).then(async ([tr, br]) => {
-				if (tr.ok) setTasks(await tr.json())
+			// Board + tâches en un seul appel
+			apiFetch(`${api}/api/kanban/board/snapshot?project_id=${selectedProjectId}`).then(async br => {
 				if (br.ok) {
 					const b = await br.json()
-					setColumns(b.columns || [])
+					const cols = b.columns || []
+					setColumns(cols)
+					setTasks([...cols.flatMap((c: any) => c.tasks || []), ...(b.unassigned || [])])
 				}
 			})
 		}
@@ -122,8 +133,7 @@ export default function Dashboard() {
 		})
 		if (res.ok) {
 			setNewTaskTitle('')
-			const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-			if (list.ok) setTasks(await list.json())
+			await reloadTasks()
 		}
 	}
 
@@ -154,7 +164,8 @@ export default function Dashboard() {
 
 	async function persistColumnOrder(cols: any[]) {
 		const api = getApiBaseUrl()
-		await Promise.all(cols.map((c, idx) => apiFetch(`${api}/api/kanban/columns/${c.id}`, { method: 'PUT', body: JSON.stringify({ order_index: idx }) })))
+		// Ordre complet en une requête (une transaction côté serveur)
+		await apiFetch(`${api}/api/kanban/columns`, { method: 'PUT', body: JSON.stringify({ project_id: selectedProjectId, order: cols.map(c => c.id) }) })
 	}
 
 	function onColumnDragStart(e: React.DragEvent, fromIndex: number) {
@@ -168,21 +179,23 @@ export default function Dashboard() {
 	async function onColumnDrop(e: React.DragEvent, toIndex: number) {
 		e.preventDefault()
 		const fromIdxStr = e.dataTransfer.getData('text/column')
-		if (fromIdxStr) {
-			const fromIdx = Number(fromIdxStr)
-			if (Number.isFinite(fromIdx) && fromIdx !== toIndex) {
-				const newCols = reorder(columns, fromIdx, toIndex)
-				setColumns(newCols)
-				await persistColumnOrder(newCols)
-			}
+		if (!fromIdxStr) {
+			// Carte lâchée sur la colonne, hors d'une autre carte: en fin de colonne
+			await onDrop(e, columns[toIndex].id)
+			return
+		}
+		const fromIdx = Number(fromIdxStr)
+		if (Number.isFinite(fromIdx) && fromIdx !== toIndex) {
+			const newCols = reorder(columns, fromIdx, toIndex)
+			setColumns(newCols)
+			await persistColumnOrder(newCols)
 		}
 	}
 
 	async function updateTaskStatus(id: number, status: string) {
 		const api = getApiBaseUrl()
 		await apiFetch(`${api}/api/tasks/${id}`, { method: 'PUT', body: JSON.stringify({ status }) })
-		const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-		if (list.ok) setTasks(await list.json())
+		await reloadTasks()
 	}
 
 	function startEdit(t: any) {
@@ -202,35 +215,65 @@ export default function Dashboard() {
 		const api = getApiBaseUrl()
 		await apiFetch(`${api}/api/tasks/${editingId}`, { method: 'PUT', body: JSON.stringify({ title: editTitle, description: editDescription }) })
 		cancelEdit()
-		const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-		if (list.ok) setTasks(await list.json())
+		await reloadTasks()
 	}
 
 	async function deleteTask(id: number) {
 		const api = getApiBaseUrl()
 		await apiFetch(`${api}/api/tasks/${id}`, { method: 'DELETE' })
-		const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-		if (list.ok) setTasks(await list.json())
+		await reloadTasks()
+	}
+
+	// Ordre dans une colonne: rang lexicographique, les tâches sans rang à la fin
+	function byRank(a: any, b: any) {
+		if (a.rank === b.rank) return 0
+		if (a.rank == null) return 1
+		if (b.rank == null) return -1
+		return a.rank < b.rank ? -1 : 1
 	}
 
 	function onDragStart(e: React.DragEvent, id: number) {
+		// Pas de remontée: la colonne parente est elle aussi déplaçable
+		e.stopPropagation()
 		e.dataTransfer.setData('text/plain', String(id))
 	}
 
+	// Dépôt avant la carte `beforeId` (ou en fin de colonne): seuls les voisins sont envoyés,
+	// le serveur calcule le rang entre eux
+	async function moveCard(id: number, columnId: number, beforeId: number | null) {
+		const ordered = tasks.filter(t => t.kanban_column_id === columnId && t.id !== id).sort(byRank)
+		const index = beforeId == null ? ordered.length : ordered.findIndex(t => t.id === beforeId)
+		if (index < 0) return
+		const api = getApiBaseUrl()
+		const r = await apiFetch(`${api}/api/tasks/${id}/move`, {
+			method: 'POST',
+			body: JSON.stringify({ kanban_column_id: columnId, prev_id: ordered[index - 1]?.id ?? null, next_id: ordered[index]?.id ?? null }),
+		})
+		if (!r.ok) {
+			const data = await r.json().catch(() => null)
+			setError(data?.error || `Déplacement impossible (HTTP ${r.status})`)
+		}
+		await reloadTasks()
+	}
+
+	async function onCardDrop(e: React.DragEvent, columnId: number, beforeId: number) {
+		e.preventDefault()
+		e.stopPropagation()
+		const id = Number(e.dataTransfer.getData('text/plain'))
+		if (id) await moveCard(id, columnId, beforeId)
+	}
+
 	function onDragOver(e: React.DragEvent) {
 		e.preventDefault()
 	}
 
 	async function onDrop(e: React.DragEvent, newStatusOrColumnId: string | number) {
 		e.preventDefault()
-		const idStr = e.dataTransfer.getData('text/plain')
-		const id = Number(idStr)
-		if (!Number.isFinite(id)) return
+		const id = Number(e.dataTransfer.getData('text/plain'))
+		// Rien de lisible (pas une carte): NaN ou 0
+		if (!id) return
 		if (typeof newStatusOrColumnId === 'number') {
-			const api = getApiBaseUrl()
-			await apiFetch(`${api}/api/tasks/${id}`, { method: 'PUT', body: JSON.stringify({ kanban_column_id: newStatusOrColumnId }) })
-			const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-			if (list.ok) setTasks(await list.json())
+			await moveCard(id, newStatusOrColumnId, null)
 		} else {
 			await updateTaskStatus(id, newStatusOrColumnId)
 		}
@@ -244,8 +287,38 @@ export default function Dashboard() {
 			window.location.href = '/ideation'
 			return
 		}
-		const list = await apiFetch(`${api}/api/tasks?project_id=${selectedProjectId}`)
-		if (list.ok) setTasks(await list.json())
+		// La synchro tourne en tâche de fond: on suit le job jusqu'à sa fin
+		if (r.status === 202) {
+			const { job_id } = await r.json()
+			syncPolling.current?.abort()
+			const controller = new AbortController()
+			syncPolling.current = controller
+			const deadline = Date.now() + SYNC_TIMEOUT_MS
+			try {
+				while (true) {
+					await new Promise(resolve => setTimeout(resolve, 1000))
+					if (controller.signal.aborted) return
+					if (Date.now() > deadline) {
+						setError('La synchronisation prend plus de temps que prévu, rechargez la page dans quelques minutes')
+						break
+					}
+					const jr = await apiFetch(`${api}/api/jobs/${job_id}`, { signal: controller.signal })
+					if (!jr.ok) break
+					const job = await jr.json()
+					if (job.status === 'failed') {
+						setError(job.error || 'Échec de la synchronisation')
+						break
+					}
+					if (job.status === 'succeeded') break
+				}
+			} catch (e) {
+				if (controller.signal.aborted) return
+				setError(String(e))
+			} finally {
+				if (syncPolling.current === controller) syncPolling.current = null
+			}
+		}
+		await reloadTasks()
 	}
 
 	return (
@@ -331,8 +404,8 @@ export default function Dashboard() {
 								<button className="underline" onClick={() => deleteColumn(col.id)}>Supprimer</button>
 							</div>
 							<ul className="space-y-2">
-								{tasks.filter(t => t.kanban_column_id === col.id).map(t => (
-									<li key={t.id} className="border rounded p-3" draggable onDragStart={(e) => onDragStart(e, t.id)}>
+								{tasks.filter(t => t.kanban_column_id === col.id).sort(byRank).map(t => (
+									<li key={t.id} className="border rounded p-3" draggable onDragStart={(e) => onDragStart(e, t.id)} onDragOver={onDragOver} onDrop={(e) => onCardDrop(e, col.id, t.id)}>
 										<div className="font-semibold">{t.title}</div>
 										<div className="text-sm opacity-80">{t.description}</div>
 										<div className="text-sm mt-1">Priorité: {t.priority}</div>
@@ -1,7 +1,8 @@
 import { useEffect, useState } from 'react'
-import { apiFetch, getApiBaseUrl } from '../lib/auth'
+import { apiFetch, apiFetchAll, getApiBaseUrl } from '../lib/auth'
 
 type Project = { id: number; title: string }
+type PreviewItem = { title: string; status: string; priority: string; due_date: string | null; tags: string[] }
 
 export default function Ideation() {
 	const [projects, setProjects] = useState<Project[]>([])
@@ -10,6 +11,7 @@ export default function Ideation() {
 	const [raw, setRaw] = useState('')
 	const [template, setTemplate] = useState('')
 	const [roadmap, setRoadmap] = useState('')
+	const [preview, setPreview] = useState<PreviewItem[]>([])
 	const [loading, setLoading] = useState(false)
 	const [error, setError] = useState<string | null>(null)
 
@@ -22,28 +24,46 @@ export default function Ideation() {
 					const data = await r.json()
 					setTemplate(data.template || '')
 				}
-				const pr = await apiFetch(`${api}/api/projects`)
-				if (pr.ok) {
-					const list: Project[] = await pr.json()
-					setProjects(list)
-					if (list.length) setSelectedProjectId(list[0].id)
-				}
+				const list = await apiFetchAll<Project>(`${api}/api/projects`)
+				setProjects(list)
+				if (list.length) setSelectedProjectId(list[0].id)
 			} catch {}
 		})()
 	}, [])
 
-	async function generate() {
+	// Génération en flux (SSE): le texte et l'aperçu des tâches se remplissent au fil de l'eau
+	async function streamRoadmap(body: object) {
 		setLoading(true)
 		setError(null)
+		setRoadmap('')
+		setPreview([])
 		try {
 			const api = getApiBaseUrl()
-			const res = await apiFetch(`${api}/api/ai/generate-roadmap`, {
+			const res = await apiFetch(`${api}/api/ai/generate-roadmap/stream`, {
 				method: 'POST',
-				body: JSON.stringify({ mode: 'skeleton', idea })
+				body: JSON.stringify(body)
 			})
-			if (!res.ok) throw new Error('Échec génération')
-			const data = await res.json()
-			setRoadmap(data.roadmap)
+			if (!res.ok || !res.body) throw new Error('Échec génération')
+			const reader = res.body.getReader()
+			const decoder = new TextDecoder()
+			let buffer = ''
+			while (true) {
+				const { done, value } = await reader.read()
+				if (done) break
+				buffer += decoder.decode(value, { stream: true })
+				const blocks = buffer.split('\n\n')
+				buffer = blocks.pop() || ''
+				for (const block of blocks) {
+					const event = block.match(/^event: (.*)$/m)?.[1]
+					const data = block.match(/^data: (.*)$/m)?.[1]
+					if (!event || !data) continue
+					const payload = JSON.parse(data)
+					if (event === 'token') setRoadmap(r => r + payload.delta)
+					else if (event === 'item') setPreview(items => [...items, payload])
+					else if (event === 'done') setRoadmap(payload.roadmap)
+					else if (event === 'error') throw new Error(payload.error)
+				}
+			}
 		} catch (e: any) {
 			setError(e.message || String(e))
 		} finally {
@@ -51,23 +71,12 @@ export default function Ideation() {
 		}
 	}
 
-	async function reformat() {
-		setLoading(true)
-		setError(null)
-		try {
-			const api = getApiBaseUrl()
-			const res = await apiFetch(`${api}/api/ai/generate-roadmap`, {
-				method: 'POST',
-				body: JSON.stringify({ mode: 'reformat', raw })
-			})
-			if (!res.ok) throw new Error('Échec reformatage')
-			const data = await res.json()
-			setRoadmap(data.roadmap)
-		} catch (e: any) {
-			setError(e.message || String(e))
-		} finally {
-			setLoading(false)
-		}
+	function generate() {
+		return streamRoadmap({ mode: 'skeleton', idea })
+	}
+
+	function reformat() {
+		return streamRoadmap({ mode: 'reformat', raw })
 	}
 
 	async function importRoadmap() {
@@ -130,6 +139,19 @@ export default function Ideation() {
 				<div className="space-y-2">
 					<h3 className="font-semibold mb-2">Résultat</h3>
 					<pre className="whitespace-pre-wrap border rounded p-3 bg-white text-black">{roadmap}</pre>
+					{preview.length > 0 && (
+						<ul className="border rounded p-3 space-y-1 text-sm">
+							{preview.map((item, i) => (
+								<li key={i} className="flex gap-2">
+									<span>{item.status === 'done' ? '☑' : '☐'}</span>
+									<span className="font-medium">{item.title}</span>
+									<span className="opacity-70">{item.priority}</span>
+									{item.due_date && <span className="opacity-70">{item.due_date.slice(0, 10)}</span>}
+									{item.tags.map(tag => <span key={tag} className="opacity-70">#{tag}</span>)}
+								</li>
+							))}
+						</ul>
+					)}
 					<div className="flex gap-2">
 						<button className="border px-3 py-1 rounded" onClick={() => navigator.clipboard.writeText(roadmap)}>Copier</button>
 						<button className="bg-black text-white px-3 py-1 rounded" onClick={importRoadmap} disabled={!selectedProjectId || loading}>Créer les tâches dans le projet</button>